@@ -7,103 +7,570 @@ Purpose: Takes a Jira export with columns in any order and produces an output fi
          consistent ordering, that can be used in Excel etc. Also merges multi-partite
          fields (such as labels, sprints) into a single field to ensure consistent
          column count
+         Given a folder or wildcard pattern instead of a file, merges all the exports
+         it matches into one output, keeping the most recently updated row per issue
+         With --xlsx the output is an Excel workbook rather than CSV, with the
+         dates as Excel dates and the estimates and story points as numbers
+         With --incremental, a daily re-export is converted against the last
+         output: rows unchanged since then are copied from it as they are, and
+         only new and changed rows are converted. A delta file lists the issues
+         added, changed and removed since the last conversion
 '''
 import csv
-from sys import argv, exit
-from os.path import exists
-from os import rename
+import json                                 # Incremental conversion index
+import re
+from hashlib import blake2b                 # Row content hashes
+from collections import namedtuple, deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from glob import glob, has_magic
+from io import BytesIO, StringIO, TextIOWrapper
+from sys import argv, exit, path
+from os.path import abspath, basename, dirname, exists, getsize, isdir, join, splitext
+from os import rename, replace, stat
+
+# Shared modules live in the JiraCommon project alongside this one
+path.append(join(dirname(abspath(__file__)), '..', '..', 'JiraCommon', 'src'))
+from run_metrics import metrics, MetricsArguments # Run metrics
+from xlsx_writer import XlsxWriter, ExcelSerial, DatetimeSerial # Excel output
+
+# Set column header mapping
+#                  Input column                   Output column
+COLUMN_MAPPING = (['Issue key',                   'Issue key'],
+                  ['Priority',                    'Priority'],
+                  ['Summary',                     'Summary'],
+                  ['Issue Type',                  'Issue type'],
+                  ['Description',                 'Description'],
+                  ['Status',                      'Status'],
+                  ['Components',                  'Component'],
+                  ['Reporter',                    'Reporter'],
+                  ['Assignee',                    'Assignee'],
+                  ['Created',                     'Created'],
+                  ['Updated',                     'Updated'],
+                  ['Resolved',                    'Resolved'],
+                  ['Resolution',                  'Resolution'],
+                  ['Custom field (EPD Team)',     'EPD team'],
+                  ['Custom field (Epic Link)',    'Epic link'],
+                  ['Custom field (Epic Name)',    'Epic name'],
+                  ['Custom field (Story Points)', 'Story points'],
+                  ['Fix versions',                'Fix versions'],
+                  ['Sprint',                      'Sprints'],
+                  ['Labels',                      'Labels'],
+                  ['Original estimate',           'Original estimate'],
+                  ['Remaining Estimate',          'Remaining estimate'],
+                  ['Time Spent',                  'Time spent'],
+                  ['Custom field (Flagged)',      'Flagged'])
+
+# Set output field list and order
+# Note the text must match the output column text in the mapping above
+OUTPUT_LIST = ('Issue key',
+               'Priority',
+               'Summary',
+               'Issue type',
+               'Description',
+               'Status',
+               'Component',
+               'Reporter',
+               'Assignee',
+               'Created',
+               'Updated',
+               'Resolved',
+               'Resolution',
+               'EPD team',
+               'Epic link',
+               'Epic name',
+               'Story points',
+               'Fix versions',
+               'Sprints',
+               'Labels',
+               'Original estimate',
+               'Remaining estimate',
+               'Time spent',
+               'Flagged')
+
+# Positions of the multi-partite fields in the output
+SPRINTS_FIELD = OUTPUT_LIST.index('Sprints')
+LABELS_FIELD = OUTPUT_LIST.index('Labels')
+COMPONENT_FIELD = OUTPUT_LIST.index('Component')
+KEY_FIELD = OUTPUT_LIST.index('Issue key')
+UPDATED_FIELD = OUTPUT_LIST.index('Updated')
+
+# Positions of the fields written as Excel dates and numbers in an Excel output
+DATE_FIELDS = tuple(OUTPUT_LIST.index(field) for field in ('Created', 'Updated', 'Resolved'))
+NUMBER_FIELDS = tuple(OUTPUT_LIST.index(field) for field in ('Story points', 'Original estimate', 'Remaining estimate', 'Time spent'))
+
+# Date formats Jira uses for the Updated column, depending on its date settings
+UPDATED_FORMATS = ('%d/%b/%y %I:%M %p', '%d/%b/%y %H:%M', '%d/%m/%Y %H:%M', '%Y-%m-%d %H:%M')
+
+# Incremental conversion index layout, changed if the layout ever does
+INDEX_VERSION = 1
+
+# Month numbers for the abbreviated month names in Jira's default date format
+MONTHS = {name: number for number, name in enumerate(('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'), 1)}
+
+# Column plan compiled from an input header row:
+#   fields          - the input column index for each output field, or None if absent
+#   sprint_cols etc - the input column indexes making up each multi-partite field
+#   key_col         - the input column index of the issue key, or None if absent
+ColumnPlan = namedtuple('ColumnPlan', ['fields', 'sprint_cols', 'labels_cols', 'components_cols', 'key_col'])
+
+
+# Work out once, from the header row, where each output field comes from
+def CompilePlan(header):
+    # Match input columns with output fields. Where an input column is repeated
+    # the last one wins
+    sources = {}
+    for index, col in enumerate(header):
+        for source, dest in COLUMN_MAPPING:
+            if col == source:
+                sources[dest] = index
+    fields = tuple(sources.get(dest) for dest in OUTPUT_LIST)
+
+    # Identify which columns hold multi-partite data
+    sprint_cols = tuple(index for index, col in enumerate(header) if col == "Sprint")
+    labels_cols = tuple(index for index, col in enumerate(header) if col == "Labels")
+    components_cols = tuple(index for index, col in enumerate(header) if col == "Components")
+
+    return ColumnPlan(fields, sprint_cols, labels_cols, components_cols, sources.get('Issue key'))
+
+
+# Re-order and combine one input row according to the plan.
+# Returns the output row and a warning message, or None if there's nothing to report
+def TransformRow(row, plan):
+    output_row = [row[i] if i is not None else '' for i in plan.fields]
+
+    # Now add labels, sprints, components multi-partite field
+    output_row[SPRINTS_FIELD] = '|'.join([row[i] for i in plan.sprint_cols if row[i] != ''])
+    output_row[LABELS_FIELD] = '|'.join([row[i] for i in plan.labels_cols if row[i] != ''])
+    components = [row[i] for i in plan.components_cols if row[i] != '']
+    output_row[COMPONENT_FIELD] = '|'.join(components)
+
+    warning = None
+    if len(components) > 1:
+        issue_key = row[plan.key_col] if plan.key_col is not None else None
+        warning = f'\nWarning - {issue_key} has multiple components set'
+    return output_row, warning
+
+
+# Split a file into byte ranges of roughly chunk_size, each ending on a CSV record
+# boundary. A newline only ends a record if it's outside a quoted field, which
+# is where an even number of quote characters has been seen since the start of
+# the file, so multi-line descriptions are never split between chunks
+def FindChunks(input_filename, chunk_size, block_size=1 << 20):
+    chunks = []
+    start = 0
+    target = chunk_size
+    position = 0    # File offset of the current block
+    quotes = 0      # Quote characters before the current block
+    with open(input_filename, 'rb') as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            counted_to = 0
+            counted = quotes
+            # Look for record boundaries at or after the target in this block
+            while target < position + len(block):
+                newline = block.find(b'\n', max(target - position, 0))
+                if newline == -1:
+                    break
+                counted = counted + block.count(b'"', counted_to, newline)
+                counted_to = newline
+                if counted % 2 == 0:
+                    chunks.append((start, position + newline + 1))
+                    start = position + newline + 1
+                    target = start + chunk_size
+                else:
+                    target = position + newline + 1
+            quotes = quotes + block.count(b'"')
+            position = position + len(block)
+    if start < position:
+        chunks.append((start, position))
+    return chunks
+
+
+# Transform the rows in one byte range of the input file, as a worker process.
+# Returns the CSV text for the output rows (or the rows themselves, with
+# as_rows set), the row count and any warnings
+def TransformChunk(input_filename, start, end, plan, as_rows=False):
+    with open(input_filename, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    # Decode as the serial path does, translating newlines in quoted fields the same way
+    reader = csv.reader(TextIOWrapper(BytesIO(data), encoding='utf-8'))
+    if start == 0:
+        next(reader, None)  # Skip the header row
+
+    output = [] if as_rows else StringIO()
+    writerow = output.append if as_rows else csv.writer(output).writerow
+    rows = 0
+    warnings = []
+    for row in reader:
+        output_row, warning = TransformRow(row, plan)
+        if warning:
+            warnings.append(warning)
+        rows = rows + 1
+        writerow(output_row)
+    return output if as_rows else output.getvalue(), rows, warnings
+
+
+# Generator transforming the input file in chunks on a pool of worker processes,
+# returning the results of TransformChunk in the original row order
+def TransformChunks(input_filename, plan, processes, as_rows=False):
+    # Aim for several chunks per process so the work evens out, but keep them
+    # small enough that the chunks in flight don't take up much memory
+    chunk_size = min(max(getsize(input_filename) // (processes * 4), 1 << 20), 64 << 20)
+    chunks = FindChunks(input_filename, chunk_size)
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        pending = deque()
+        for start, end in chunks:
+            pending.append(executor.submit(TransformChunk, input_filename, start, end, plan, as_rows))
+            if len(pending) > processes * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+# Get the input files for an input name: the name itself, or the CSV files in
+# a folder or matching a wildcard pattern, in natural order so 'Jira (2).csv'
+# comes before 'Jira (10).csv'. Previous outputs and delta files are skipped
+def FindInputFiles(input_name):
+    if isdir(input_name):
+        input_files = glob(join(input_name, '*.csv'))
+    elif has_magic(input_name):
+        input_files = glob(input_name)
+    else:
+        return [input_name] if exists(input_name) else []
+
+    def natural_key(filename):
+        return [int(part) if part.isdigit() else part.lower() for part in re.split(r'(\d+)', splitext(basename(filename))[0])]
+
+    return sorted((f for f in input_files if not f.endswith(('_transformed.csv', '_delta.csv'))), key=natural_key)
+
+
+# Parse an Updated value for comparison, or return None if it's in an unknown format
+def ParseUpdated(updated):
+    for fmt in UPDATED_FORMATS:
+        try:
+            return datetime.strptime(updated, fmt)
+        except ValueError:
+            pass
+    return None
+
+
+# Get the Excel serial number for a date from a Jira export, or None if it's in
+# an unknown format. Jira's default format (28/Oct/21 2:05 PM) is picked apart
+# directly, as strptime would take most of the time of an Excel conversion
+def ExportDateSerial(value):
+    parts = value.split(' ')
+    if len(parts) == 3 and parts[2] in ('AM', 'PM'):
+        try:
+            day, month, year = parts[0].split('/')
+            hour, minute = parts[1].split(':')
+            if len(year) == 2:
+                hour = int(hour) % 12 + (12 if parts[2] == 'PM' else 0)
+                return ExcelSerial(2000 + int(year), MONTHS[month], int(day), hour * 3600 + int(minute) * 60)
+        except (ValueError, KeyError):
+            pass
+    parsed = ParseUpdated(value)
+    return DatetimeSerial(parsed) if parsed is not None else None
+
+
+# Open the output file: an Excel workbook if its name ends in .xlsx, which is
+# also its own writer, otherwise a CSV file
+def OpenOutput(output_filename):
+    if output_filename.endswith('.xlsx'):
+        return XlsxWriter(output_filename, 'Jira Export', DATE_FIELDS, NUMBER_FIELDS, ExportDateSerial)
+    return open(output_filename, 'w', newline='', encoding='utf-8')
+
+
+# Index a whole input file, as a worker process, without keeping its rows.
+# Returns the file's column plan (None if it's empty) and, for each row in file
+# order, its issue key and Updated date and where to find it again: the byte
+# offset and length of its record, and its place among the record's rows
+def IndexFile(input_filename):
+    plan = None
+    entries = []
+    offset = 0
+    with open(input_filename, 'rb') as f:
+        for record in ReadRecords(f):
+            for part, row in enumerate(ParseRecord(record)):
+                if plan is None:
+                    plan = CompilePlan(row)
+                    continue
+                key_col, updated_col = plan.fields[KEY_FIELD], plan.fields[UPDATED_FIELD]
+                entries.append((row[key_col] if key_col is not None else '', row[updated_col] if updated_col is not None else '',
+                                offset, len(record), part))
+            offset = offset + len(record)
+    return plan, entries
+
+
+# Merge several exports into one output file. Where an issue appears more than
+# once, the row with the latest Updated date is kept, or the row from the later
+# file if the dates can't be compared. Issues are written in the order they
+# first appear. The files are indexed first, keeping only where each issue's
+# winning row is, and the winning rows are then read back and converted one
+# at a time, so the rows are never all in memory. Returns the input row count
+# and the number of duplicates removed
+def MergeFiles(input_files, output_filename, processes, ticket_messages):
+    if processes > 1:
+        executor = ProcessPoolExecutor(max_workers=processes)
+        results = executor.map(IndexFile, input_files)
+    else:
+        executor = None
+        results = map(IndexFile, input_files)
+
+    plans = []
+    merged = {}
+    total_rows = 0
+    for file_number, (plan, entries) in enumerate(results):
+        plans.append(plan)
+        for key, updated, offset, length, part in entries:
+            total_rows = total_rows + 1
+            key = key or total_rows # Rows without a key can't be matched
+            kept = merged.get(key)
+            if kept is not None:
+                kept_updated = ParseUpdated(kept[0])
+                row_updated = ParseUpdated(updated)
+                if kept_updated is not None and row_updated is not None and row_updated < kept_updated:
+                    continue
+            merged[key] = (updated, file_number, offset, length, part)
+    if executor is not None:
+        executor.shutdown()
+
+    # Read the winning rows back in the order their issues first appear. Most
+    # come from the latest file, so it's kept open until a row comes from another
+    source = None
+    source_number = None
+    try:
+        with OpenOutput(output_filename) as output_file:
+            writer = output_file if isinstance(output_file, XlsxWriter) else csv.writer(output_file)
+            writer.writerow(OUTPUT_LIST)
+            for _, file_number, offset, length, part in merged.values():
+                if file_number != source_number:
+                    if source is not None:
+                        source.close()
+                    source = open(input_files[file_number], 'rb')
+                    source_number = file_number
+                source.seek(offset)
+                output_row, warning = TransformRow(ParseRecord(source.read(length))[part], plans[file_number])
+                if warning:
+                    ticket_messages.append(warning)
+                writer.writerow(output_row)
+    finally:
+        if source is not None:
+            source.close()
+    return total_rows, total_rows - len(merged)
+
+
+# Split a file opened in binary into its CSV records as raw bytes, without
+# parsing them. As in FindChunks, a newline only ends a record if an even
+# number of quote characters has been seen since the record started
+def ReadRecords(f):
+    lines = []
+    quotes = 0
+    for line in f:
+        lines.append(line)
+        quotes = quotes + line.count(b'"')
+        if quotes % 2 == 0:
+            yield b''.join(lines)
+            lines = []
+            quotes = 0
+    if lines:
+        yield b''.join(lines)
+
+
+# Get the content hash of a raw record. The line ending isn't part of the
+# content, so the last row of a file hashes the same with or without one
+def RecordHash(record):
+    return blake2b(record.rstrip(b'\r\n'), digest_size=16).hexdigest()
+
+
+# Parse a raw record into its rows (normally one), decoding and translating
+# newlines in quoted fields as the serial path does
+def ParseRecord(record):
+    return list(csv.reader(StringIO(record.decode('utf-8'), newline=None)))
+
+
+# Get a row as CSV bytes, as csv.writer writes it to the output file
+def CsvBytes(row):
+    output = StringIO()
+    csv.writer(output).writerow(row)
+    return output.getvalue().encode('utf-8')
+
+
+# Copy the bytes between start and end of one file to another, if there are any
+def CopyRange(source, target, start, end):
+    if start >= end:
+        return
+    source.seek(start)
+    while start < end:
+        data = source.read(min(end - start, 1 << 20))
+        if not data:
+            break
+        target.write(data)
+        start = start + len(data)
+
+
+# Load the index of the last incremental conversion: for each output row, its
+# issue key, the hash of its input record, its byte offset and length in the
+# output file, and its warning. Returns None if there isn't one, or if the
+# output has been written since (by a full conversion, say) or the input's
+# header row is different
+def LoadIndex(index_filename, output_filename, header_hash):
+    try:
+        with open(index_filename, encoding='utf-8') as f:
+            index = json.load(f)
+        output = stat(output_filename)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(index, dict) or index.get('index_version') != INDEX_VERSION or index.get('header') != header_hash \
+            or index.get('output_size') != output.st_size or index.get('output_time') != output.st_mtime_ns:
+        return None
+    return index['rows']
+
+
+# Convert an input file against the last conversion's output and index. Rows
+# whose input records hash the same as last time are copied from the last
+# output, in runs of neighbouring rows, without being parsed; the rest are
+# converted. Writes the output, its index and a delta file of the issues
+# added, changed and removed. Returns the row count and the number of rows
+# added, changed, removed and unchanged, or None if the input is empty
+def ConvertIncremental(input_filename, output_filename, ticket_messages):
+    index_filename = splitext(output_filename)[0] + '.index'
+    delta_filename = splitext(input_filename)[0] + '_delta.csv'
+    transform_row = metrics.timed('transform', TransformRow, 'rows_converted')
+    counts = {'added': 0, 'changed': 0, 'removed': 0, 'unchanged': 0}
+
+    with open(input_filename, 'rb') as f:
+        records = ReadRecords(f)
+        header_record = next(records, None)
+        if header_record is None:
+            return None
+        header_hash = RecordHash(header_record)
+        plan = CompilePlan(ParseRecord(header_record)[0])
+
+        old_rows = LoadIndex(index_filename, output_filename, header_hash)
+        if old_rows is None:
+            print('No index of the last conversion to compare with, converting every row as added.')
+            old_rows = []
+        old_by_hash = {old[1]: old for old in old_rows}
+        old_keys = {old[0] for old in old_rows}
+        old_output = open(output_filename, 'rb') if old_rows else None
+
+        rows = []
+        seen_keys = set()
+        with open(output_filename + '.tmp', 'wb') as output, open(delta_filename + '.tmp', 'wb') as delta:
+            header_bytes = CsvBytes(OUTPUT_LIST)
+            output.write(header_bytes)
+            delta.write(CsvBytes(('Change',) + OUTPUT_LIST))
+            offset = len(header_bytes)
+            copy_start = copy_end = 0   # Range of the last output still to be copied
+
+            with metrics.phase('read'):
+                for record in records:
+                    record_hash = RecordHash(record)
+                    old = old_by_hash.get(record_hash)
+                    if old is not None:
+                        # Unchanged, so carry on the run of rows to copy if it follows on
+                        key, _, old_offset, length, warning = old
+                        if old_offset != copy_end:
+                            CopyRange(old_output, output, copy_start, copy_end)
+                            copy_start = old_offset
+                        copy_end = old_offset + length
+                        rows.append([key, record_hash, offset, length, warning])
+                        offset = offset + length
+                        if warning:
+                            ticket_messages.append(warning)
+                        seen_keys.add(key)
+                        counts['unchanged'] = counts['unchanged'] + 1
+                        continue
+
+                    CopyRange(old_output, output, copy_start, copy_end)
+                    copy_start = copy_end = 0
+                    for row in ParseRecord(record):
+                        output_row, warning = transform_row(row, plan)
+                        if warning:
+                            ticket_messages.append(warning)
+                        data = CsvBytes(output_row)
+                        output.write(data)
+                        key = output_row[KEY_FIELD]
+                        rows.append([key, record_hash, offset, len(data), warning])
+                        offset = offset + len(data)
+                        change = 'changed' if key in old_keys else 'added'
+                        delta.write(change.encode() + b',' + data)
+                        seen_keys.add(key)
+                        counts[change] = counts[change] + 1
+                CopyRange(old_output, output, copy_start, copy_end)
+
+            # Issues in the last output but not this one, as they were last converted
+            for key, _, old_offset, length, _ in old_rows:
+                if key and key not in seen_keys:
+                    delta.write(b'removed,')
+                    CopyRange(old_output, delta, old_offset, old_offset + length)
+                    counts['removed'] = counts['removed'] + 1
+
+        if old_output is not None:
+            old_output.close()
+
+    # Swap the new files in, the index last, so an interrupted run leaves an
+    # index that no longer matches and the next run converts everything
+    replace(output_filename + '.tmp', output_filename)
+    replace(delta_filename + '.tmp', delta_filename)
+    with open(index_filename + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump({'index_version': INDEX_VERSION, 'header': header_hash, 'output_size': offset,
+                   'output_time': stat(output_filename).st_mtime_ns, 'rows': rows}, f, separators=(',', ':'))
+    replace(index_filename + '.tmp', index_filename)
+
+    metrics.count('issues', len(rows))
+    metrics.count('rows_copied', counts['unchanged'])
+    metrics.count('rows_written', len(rows))
+    return len(rows), counts
+
 
 def main(argv):
+    # Run metrics (optional): --metrics=<file> writes a JSON file of phase
+    # timings, counts and peak memory, --progress shows a live progress line,
+    # and --profile=<file> writes a cProfile profile of the run
+    argv, metrics_file, progress, profile_file = MetricsArguments(argv)
+
+    # Write an Excel workbook rather than CSV (optional, --xlsx)
+    xlsx = '--xlsx' in argv
+    argv = [arg for arg in argv if arg != '--xlsx']
+
+    # Convert only what has changed since the last conversion (optional, --incremental)
+    incremental = '--incremental' in argv
+    argv = [arg for arg in argv if arg != '--incremental']
+
     #Check for input file being passed
     if not argv: # If not passed as argument, ask for it
         input_filename = input('Enter input file name: ')
     else:
         input_filename = argv[0]
 
-    if not exists(input_filename):
+    input_files = FindInputFiles(input_filename)
+    if not input_files:
         print(f'File "{input_filename}" does not exist, exiting.')
         exit()
+
+    # Number of worker processes (optional, 1 converts in this process)
+    try:
+        processes = int(argv[1]) if len(argv) > 1 else 1
+    except ValueError:
+        print(f'Invalid process count "{argv[1]}", exiting.')
+        exit()
+
+    if incremental and (xlsx or len(input_files) > 1):
+        print('Incremental conversion needs a single input file and CSV output, exiting.')
+        exit()
     
     # Initialise message sets
     messages = []
     ticket_messages = []
     
-    # Set column header mapping
-    #                  Input column                   Output column
-    column_mapping = (['Issue key',                   'Issue key'],
-                      ['Priority',                    'Priority'],
-                      ['Summary',                     'Summary'],
-                      ['Issue Type',                  'Issue type'],
-                      ['Description',                 'Description'],
-                      ['Status',                      'Status'],
-                      ['Components',                  'Component'],
-                      ['Reporter',                    'Reporter'],
-                      ['Assignee',                    'Assignee'],
-                      ['Created',                     'Created'],
-                      ['Updated',                     'Updated'],
-                      ['Resolved',                    'Resolved'],
-                      ['Resolution',                  'Resolution'],
-                      ['Custom field (EPD Team)',     'EPD team'],
-                      ['Custom field (Epic Link)',    'Epic link'],
-                      ['Custom field (Epic Name)',    'Epic name'],
-                      ['Custom field (Story Points)', 'Story points'],
-                      ['Fix versions',                'Fix versions'],
-                      ['Sprint',                      'Sprints'],
-                      ['Labels',                      'Labels'],
-                      ['Original estimate',           'Original estimate'],
-                      ['Remaining Estimate',          'Remaining estimate'],
-                      ['Time Spent',                  'Time spent'],
-                      ['Custom field (Flagged)',      'Flagged'])
-    
-    # Set output field list and order
-    # Note the text must match the output column text in the mapping above
-    output_list = ('Issue key',
-                   'Priority',
-                   'Summary',
-                   'Issue type',
-                   'Description',
-                   'Status',
-                   'Component',
-                   'Reporter',
-                   'Assignee',
-                   'Created',
-                   'Updated',
-                   'Resolved',
-                   'Resolution',
-                   'EPD team',
-                   'Epic link',
-                   'Epic name',
-                   'Story points',
-                   'Fix versions',
-                   'Sprints',
-                   'Labels',
-                   'Original estimate',
-                   'Remaining estimate',
-                   'Time spent',
-                   'Flagged')
-    
-    # Create a dict from the output list
-    output_dict = dict.fromkeys(output_list)
-    
-    # Open the input file with UTF-8 encoding (Jira encoding)
-    with open(input_filename, "r", encoding="utf-8") as f:
-        reader = csv.reader(f)
-        data = list(reader)
-        
-    # Identify which columns hold multi-partite data
-    sprint_cols = []
-    labels_cols = []
-    components_cols = []
-    for index, col in enumerate(data[0]):
-        if col == "Sprint":
-            sprint_cols.append(index)
-        elif col == "Labels":
-            labels_cols.append(index)
-        elif col == "Components":
-            components_cols.append(index)
-                      
-    #Create the output filename from the input filename, appended with '_transformed'
-    output_filename = input_filename.split('.csv')[0] + "_transformed.csv"
+    #Create the output filename from the (first) input filename, appended with '_transformed'
+    output_filename = input_files[0].split('.csv')[0] + ("_transformed.xlsx" if xlsx else "_transformed.csv")
     
     # Check for output file already open
     if exists(output_filename):
@@ -112,74 +579,77 @@ def main(argv):
         except OSError:
             print(f'Access error on {output_filename} - Check it\'s not open elsewhere')
             exit()
+
+    metrics.start('ConvertJiraExport', metrics_file, progress, profile_file)
             
-    # If all good, open the file for output
-    with open(output_filename, 'w', newline='', encoding='utf-8') as csvfile:
+    # If all good, convert only what has changed since the last conversion
+    if incremental:
+        result = ConvertIncremental(input_files[0], output_filename, ticket_messages)
+        if result is None:
+            print(f'File "{input_files[0]}" is empty, exiting.')
+            exit()
+        total_rows, counts = result
+        messages.append(f'\nDone - {total_rows} rows processed, {counts["added"]} added, {counts["changed"]} changed, '
+                        f'{counts["removed"]} removed, {counts["unchanged"]} unchanged.')
+    # Or merge several inputs into the output file
+    elif len(input_files) > 1:
+        with metrics.phase('merge'):
+            total_rows, duplicates = MergeFiles(input_files, output_filename, processes, ticket_messages)
+        metrics.count('issues', total_rows)
+        metrics.count('rows_written', total_rows - duplicates)
+        messages.append(f'\nDone - {total_rows} rows processed from {len(input_files)} files, {duplicates} duplicates removed.')
+    else:
+        # Otherwise open the input file with UTF-8 encoding (Jira encoding) and the file for output.
+        # Rows are streamed from one to the other, so only one row is held in memory at a time
+        input_filename = input_files[0]
+        with open(input_filename, "r", encoding="utf-8") as f, \
+             OpenOutput(output_filename) as csvfile:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                print(f'File "{input_filename}" is empty, exiting.')
+                exit()
+            plan = CompilePlan(header)
     
-        # Intialise the writer and write the header row
-        writer = csv.DictWriter(csvfile, fieldnames = output_list)
-        writer.writeheader()
+            # Intialise the writer and write the header row
+            writer = csvfile if xlsx else csv.writer(csvfile)
+            writer.writerow(OUTPUT_LIST)
         
-        # Loop through all rows, re-ordering and combining data
-        # Starting at second row so we don't process the header row
-        total_rows = 0
-        for row in enumerate(data[1:]):
-            # Match input data item with appropriate output column
-            for index, col in enumerate(data[0]):
-                for source, dest in column_mapping:
-                    if col == source:
-                        output_dict[dest]= row[1][index]
-                
-            # Now add labels, sprints, components multi-partite field
-            labels = ''
-            first_label = True
-            for i in labels_cols:
-                label = row[1][i]
-                if label != '':
-                    if not first_label:
-                        labels = labels + "|"
-                    labels = labels + label
-                    first_label = False
-    
-            sprints = ''
-            first_sprint = True
-            for i in sprint_cols:
-                sprint = row[1][i]
-                if sprint != '':
-                    if not first_sprint:
-                        sprints = sprints + "|"
-                    sprints = sprints + sprint
-                    first_sprint = False
+            # Loop through all rows after the header, re-ordering and combining data
+            total_rows = 0
+            if processes > 1:
+                # Convert the file in chunks across worker processes, writing each
+                # chunk and merging its warnings in the original row order
+                with metrics.phase('convert'):
+                    for output, rows, warnings in TransformChunks(input_filename, plan, processes, xlsx):
+                        with metrics.phase('write'):
+                            if xlsx:
+                                writer.writerows(output)
+                            else:
+                                csvfile.write(output)
+                        ticket_messages.extend(warnings)
+                        total_rows = total_rows + rows
+                        metrics.count('issues', rows)
+                        metrics.count('rows_written', rows)
+            else:
+                # Reading is whatever the transforming and writing don't take
+                transform_row = metrics.timed('transform', TransformRow, 'issues')
+                write_row = metrics.timed('write', writer.writerow, 'rows_written')
+                with metrics.phase('read'):
+                    for row in reader:
+                        output_row, warning = transform_row(row, plan)
+                        if warning:
+                            ticket_messages.append(warning)
                     
-            components = ''
-            comp_count = 0
-            first_component = True
-            for i in components_cols:
-                component = row[1][i]
-                if component != '':
-                    if not first_component:
-                        components = components + "|"
-                    comp_count = comp_count + 1
-                    components = components + component
-                    first_component = False
-            if comp_count > 1:
-                ticket_messages.append(f'\nWarning - {output_dict["Issue key"]} has multiple components set')
+                        total_rows = total_rows + 1 # Increment row count
                     
-            # Set the field values
-            output_dict['Sprints'] = sprints
-            output_dict['Labels'] = labels
-            output_dict['Component'] = components
-            
-            total_rows = total_rows + 1 # Increment row count
-            
-            # Write the line to output file
-            writer.writerow(output_dict)
-        
-    # Close the file
-#    csvfile.close()
+                        # Write the line to output file
+                        write_row(output_row)
+        messages.append(f'\nDone - {total_rows} rows processed.')
+
+    metrics.finish()
 
     # Build  and print the status message set
-    messages.append(f'\nDone - {total_rows} rows processed.')
     for message in ticket_messages:
         messages.append(message)
     print(' '.join(messages))
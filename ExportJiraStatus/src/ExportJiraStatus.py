@@ -10,120 +10,86 @@
 # Retrieve search query from config file
 # Pass config file name as argument to program DONE
 # Get field config/order from config file?
-# Update to extract > 1000 issues https://stackoverflow.com/questions/41858291/exporting-1000-issues-from-jira
+# Update to extract > 1000 issues https://stackoverflow.com/questions/41858291/exporting-1000-issues-from-jira DONE
 
 
 
 # Import modules
 from datetime import datetime   # date/time functions
-from jira import JIRA           # Jira functions
-from sys import argv, exit      # Command line arguments
-from configparser import ConfigParser, NoOptionError
-import pytz
+from itertools import chain     # Putting the first record back
+from sys import argv, path      # Command line arguments, module search path
+from os.path import abspath, dirname, join # Locating the shared modules
 
-# Function to convert Jira date to Excel date.
-def ConvertDate(jira_date, tz_correction=False):
-    fmt = '%d/%m/%Y %H:%M:%S'
-    datetimeObj = datetime.strptime(jira_date,'%Y-%m-%dT%H:%M:%S.%f%z')
-    # Correct for DST if required
-    if tz_correction:
-        lon = pytz.timezone('Europe/London')
-        issue_dt = datetime(datetimeObj.year, datetimeObj.month, datetimeObj.day, datetimeObj.hour, datetimeObj.minute, datetimeObj.second, tzinfo=pytz.utc)
-        datetimeObj = issue_dt.astimezone(lon)
-
-    return datetimeObj.strftime(fmt)
+# Shared modules live in the JiraCommon project alongside this one
+path.append(join(dirname(abspath(__file__)), '..', '..', 'JiraCommon', 'src'))
+from jira_client import ReadConfig, ReadCommonOptions, RequiredOption, Option, OutputFile, ConnectJira # Config and Jira connection
+from jira_search import SearchRecords   # Paged and concurrent Jira searches
+from jira_cache import OpenCache, SyncProject, CachedRecords # Local issue cache
+from jira_dates import DateConverter    # Jira to Excel date conversion
+from run_metrics import metrics         # Run metrics
+from output_stages import RunStages, StatusChangesStage, StatusIndexStage # Output files
 
 
 def main(argv):
       
-    #Check for config file being passed
-    if not argv:
-        print('No config file passed, exiting.')
-        exit()
-        
     # Parse the config file to extract token values
-    print('Parsing config file...', end='', flush=True)
-    config = ConfigParser()
-    config['DEFAULT']={}
-    try:
-        with open(argv[0]) as f:
-            config.read_file(f)
-    except IOError:
-        print('Config file does not exist, exiting.')
-        quit()
+    config = ReadConfig(argv)
          
     # Get options from config file
-    try:
-        jira_url = config.get('DEFAULT', 'jira_url')
-    except NoOptionError:
-        print('Jira URL not provided in config file, exiting.')
-        quit()
+    project_id = RequiredOption(config, 'project_id', 'No project ID provided in config file, exiting.')
+    convert_dst = RequiredOption(config, 'convert_dst', 'No DST correction flag provided in config file, exiting.')
 
-    try:
-        auth_user = config.get('DEFAULT', 'auth_user')
-    except NoOptionError:
-        print('User name not provided in config file, exiting.')
-        quit()
+    # Fetch, output and run metrics options (optional)
+    options = ReadCommonOptions(config)
 
-    try:
-        auth_token = config.get('DEFAULT', 'auth_token')
-    except NoOptionError:
-        print('Authentication token not provided in config file, exiting.')
-        quit()
+    # Point-in-time status index file to write (optional, read by StatusAsOf)
+    status_index_file = Option(config, 'status_index_file')
 
-    try:
-        project_id = config.get("DEFAULT","project_id")
-    except NoOptionError:
-        print('No project ID provided in config file, exiting.')
-        quit()
-        
-    try:
-        convert_dst = config.get('DEFAULT', 'convert_dst')
-    except NoOptionError:
-        print('No DST correction flag provided in config file, exiting.')
+    # Status list, needed for the status index. Issues that have never changed
+    # status are taken to be in the first status in the index
+    statuses = []
+    if status_index_file:
+        statuses = RequiredOption(config, 'status_list', 'No Status list provided in config file, exiting.').split(', ')
                 
     print('done.')
+    metrics.start('ExportJiraStatus', options.metrics_file, options.progress, options.profile_file)
+
+    # Convert Jira dates to Excel-compatible a batch at a time, correcting for
+    # DST if required
+    convert_dates = metrics.timed('convert_dates', DateConverter(convert_dst).convert_many)
+
     # Authenticate with Jira
-    auth_jira = JIRA(jira_url, basic_auth=(auth_user, auth_token))
+    auth_jira = ConnectJira(config, options.fetch_workers)
     
     print (f'Extracting issues from project {project_id}...', end='', flush=True)
-    # Get all issues from selected project in issue order.
-    # Setting maxResults to false returns all records
+    # Get all issues from selected project in issue order, one page at a time.
     # Expanding changelog returns all change details, which include status transitions
-    search_string = 'project=' + project_id + ' ORDER BY issue ASC'
-    issues = auth_jira.search_issues(search_string, maxResults=0, expand=['changelog'])
+    if options.cache_file:
+        cache = OpenCache(options.cache_file)
+        fetched = SyncProject(cache, auth_jira, project_id, options.page_size, options.fetch_workers, options.full_resync, options.raw_json)
+        print(f'{fetched} updated...', end='', flush=True)
+        records = CachedRecords(cache, project_id)
+    else:
+        search_string = 'project=' + project_id + ' ORDER BY issue ASC'
+        records = SearchRecords(auth_jira, search_string, options.page_size, options.fetch_workers, options.raw_json)
+    record = next(records, None)
     print('done.')
     
     # Check there are records to process
-    if len(issues) > 0:
+    if record:
         # Define filename with current date/time suffix
         dt = datetime.now().strftime("%Y-%m-%d_%H%M%S")
         
-        file_name = 'C:\\Users\\Jim.Strange\\Valtech\\UK.Client.Wiggle - General\\01 Delivery Management\\WiggleCRC Jira Tracking\\Deep Dive\\Jira Status Export ' + dt + '.csv'
+        file_name = OutputFile(config, 'Jira Status Export ' + dt + '.' + options.output_format)
         
-        # Open file for writing data
-        with open(file_name, 'w') as output_file:
-            # Heading for tabular file output
-            output_file.write('Issue, Issue Type, Date, From, To')
-            
-            print('Creating change log...', end='', flush=True),
-            # Loop through all issues and write status change info
-            for issue in issues:
-                for history in issue.changelog.histories:
-                    for item in history.items:
-                        if item.field == 'status':#
-#                            if new_issue:
-#                                converted_date = ConvertDate(issue.fields.created, convert_dst)
-#                                output_file.write(f'\n{issue.key},{issue.fields.issuetype.name},{converted_date},None,{item.fromString}')
-#                                new_issue = False
-                            # Convert Jira date format to Excel-compatible
-                            converted_date = ConvertDate(history.created, convert_dst)
-                            from_string = item.fromString
-                            output_file.write(f'\n{issue.key},{issue.fields.issuetype.name},{converted_date},{item.fromString},{item.toString}')
-                            #print(f'\n{issue.key},{issue.fields.issuetype.name},{converted_date},{item.fromString},{item.toString}')
-                converted_date = ConvertDate(issue.fields.created, convert_dst)
-                output_file.write(f'\n{issue.key},{issue.fields.issuetype.name},{converted_date},None,{from_string}')   
+        # Write the status changes, and the status index if asked for, in one pass
+        stages = [StatusChangesStage(file_name, convert_dates)]
+        if status_index_file:
+            stages.append(StatusIndexStage(status_index_file, statuses))
+        print('Creating change log...', end='', flush=True),
+        RunStages(chain([record], records), stages)
     
+    metrics.finish()
     print('Finished.')
     
     
@@ -0,0 +1,93 @@
+'''
+Created on 18 Oct 2026
+
+Purpose: Answers "what status was every issue in on date D" from the status index
+         written by ExportJiraStatus, without going back to Jira.
+         Given one date, lists each issue that existed then with its status.
+         Given a date range, writes a daily snapshot with a column per date.
+         Dates are dd/mm/yyyy, optionally followed by hh:mm, in UK time. A
+         date on its own means the end of that day, so the status reported is
+         the one the issue ended the day in.
+
+Usage:   StatusAsOf.py <index file> <date> [<end date>] [<status>]
+         Output is CSV on standard output. With a status, only issues in that
+         status on (any of) the date(s) are listed.
+'''
+
+# Import modules
+import csv                      # CSV output
+from datetime import datetime, timedelta   # date/time functions
+from sys import argv, exit, path, stdout # Command line arguments, module search path
+from os.path import abspath, dirname, exists, join # Locating the shared modules
+import pytz
+
+# Shared modules live in the JiraCommon project alongside this one
+path.append(join(dirname(abspath(__file__)), '..', '..', 'JiraCommon', 'src'))
+from status_index import StatusIndex, NO_STATUS # Point-in-time status index
+
+# Time of day looked up for a date given without a time: the last second of it
+END_OF_DAY = timedelta(days=1, seconds=-1)
+
+
+# Parse a dd/mm/yyyy date with an optional hh:mm time. Returns the date and
+# whether it had a time, or None if it isn't a date
+def ParseDate(text):
+    for fmt, has_time in (('%d/%m/%Y %H:%M', True), ('%d/%m/%Y', False)):
+        try:
+            return datetime.strptime(text, fmt), has_time
+        except ValueError:
+            pass
+    return None, False
+
+
+def main(argv):
+
+    #Check for index file and date being passed
+    if len(argv) < 2:
+        print('Usage: StatusAsOf.py <index file> <date> [<end date>] [<status>]')
+        print('       Dates are dd/mm/yyyy [hh:mm] UK time; a date without a time means the end of that day.')
+        exit()
+
+    if not exists(argv[0]):
+        print(f'Index file "{argv[0]}" does not exist, exiting.')
+        exit()
+    index = StatusIndex.load(argv[0])
+
+    # Work out the dates to report on: one, or every day in a range
+    start, has_time = ParseDate(argv[1])
+    if start is None:
+        print(f'Invalid date "{argv[1]}", exiting.')
+        exit()
+    dates = [start]
+    rest = argv[2:]
+    end = ParseDate(rest[0])[0] if rest else None
+    if end is not None:
+        rest = rest[1:]
+        while dates[-1] + timedelta(days=1) <= end:
+            dates.append(dates[-1] + timedelta(days=1))
+
+    # Anything left over is the status to filter on
+    status_filter = rest[0] if rest else None
+    london = pytz.timezone('Europe/London')
+    cutoff = timedelta(0) if has_time else END_OF_DAY
+    times = [int(london.localize(date + cutoff).timestamp()) for date in dates]
+
+    # Look up every issue's status on every date in one go
+    snapshots = index.snapshots(times)
+
+    if status_filter is not None:
+        if status_filter not in index.status_names:
+            print(f'Status "{status_filter}" does not appear in the index, exiting.')
+            exit()
+        wanted = (snapshots == index.status_names.index(status_filter)).any(axis=1)
+    else:
+        wanted = (snapshots != NO_STATUS).any(axis=1)
+
+    writer = csv.writer(stdout, lineterminator='\n')
+    writer.writerow(['Issue', 'Issue Type'] + [date.strftime('%d/%m/%Y %H:%M' if has_time else '%d/%m/%Y') for date in dates])
+    for i in wanted.nonzero()[0]:
+        writer.writerow([index.keys[i], index.type_names[index.issue_types[i]]] + [index.status_name(code) for code in snapshots[i]])
+
+
+if __name__ == '__main__':
+    main(argv[1:])
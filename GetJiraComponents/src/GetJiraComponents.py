@@ -2,79 +2,84 @@
 Created on 18 Oct 2021
 
 @author: Jim.Strange
+
+Purpose: Exports the components of one or more projects, with each component's
+         lead, description and number of issues, to a single CSV file.
+         project_id is a project key, a comma separated list of them, or ALL
+         for every project the user can see. Component lists and issue counts
+         are fetched fetch_workers at a time, and can be kept in a response
+         cache file so a repeat run within cache_ttl seconds makes almost no
+         requests.
 '''
 # Import modules
 from datetime import datetime   # date/time functions
-from jira import JIRA           # Jira functions
-from sys import argv            # Command line arguments
-from configparser import ConfigParser, NoOptionError
+from sys import argv, path      # Command line arguments, module search path
+from os.path import abspath, dirname, join # Locating the shared modules
+
+# Shared modules live in the JiraCommon project alongside this one
+path.append(join(dirname(abspath(__file__)), '..', '..', 'JiraCommon', 'src'))
+from jira_client import ReadConfig, RequiredOption, Option, OutputFile, ConnectJira # Config and Jira connection
+from response_cache import ResponseCache # Cached project and component responses
+from jira_components import FetchComponents, WriteComponents # Components and their issue counts
+from run_metrics import metrics         # Run metrics
+
 
 def main(argv):
-    
-    #Check for config file being passed
-    if not argv:
-        print('No config file passed, exiting.')
-        exit()
-        
+
     # Parse the config file to extract token values
-    print('Parsing config file...', end='', flush=True)
-    config = ConfigParser()
-    config['DEFAULT']={}
-    try:
-        with open(argv[0]) as f:
-            config.read_file(f)
-    except IOError:
-        print('Config file does not exist, exiting.')
-        quit()
-         
+    config = ReadConfig(argv)
+
     # Get options from config file
-    try:
-        jira_url = config.get('DEFAULT', 'jira_url')
-    except NoOptionError:
-        print('Jira URL not provided in config file, exiting.')
-        quit()
+    project_ids = RequiredOption(config, 'project_id', 'No project ID provided in config file, exiting.').split(',')
+    project_ids = [project_id.strip() for project_id in project_ids if project_id.strip()]
 
-    try:
-        auth_user = config.get('DEFAULT', 'auth_user')
-    except NoOptionError:
-        print('User name not provided in config file, exiting.')
-        quit()
+    # Number of requests made at once (optional, 1 fetches serially)
+    fetch_workers = Option(config, 'fetch_workers', 1)
 
-    try:
-        auth_token = config.get('DEFAULT', 'auth_token')
-    except NoOptionError:
-        print('Authentication token not provided in config file, exiting.')
-        quit()
+    # Count the issues with each component (optional, a request per component)
+    issue_counts = Option(config, 'issue_counts', True)
+
+    # Response cache file (optional), and how many seconds a cached response
+    # is used for before Jira is asked again
+    cache_file = Option(config, 'response_cache_file')
+    cache_ttl = Option(config, 'cache_ttl', 3600)
+
+    # Run metrics (optional): a JSON file of phase timings, counts and peak
+    # memory, a live progress line, and a cProfile profile of the run
+    metrics_file = Option(config, 'metrics_file')
+    progress = Option(config, 'progress', False)
+    profile_file = Option(config, 'profile_file')
+    print('done.')
+    metrics.start('GetJiraComponents', metrics_file, progress, profile_file)
 
-    try:
-        project_id = config.get("DEFAULT","project_id")
-    except NoOptionError:
-        print('No project ID provided in config file, exiting.')
-        quit()
-        
     # Authenticate with Jira
-    auth_jira = JIRA(jira_url, basic_auth=(auth_user, auth_token))
-    
-    components = auth_jira.project_components(project_id)
-    
+    auth_jira = ConnectJira(config, fetch_workers)
+    cache = ResponseCache(cache_file, cache_ttl)
+
+    if [project_id.upper() for project_id in project_ids] == ['ALL']:
+        with metrics.phase('projects'):
+            project_ids = [project['key'] for project in cache.get_json(auth_jira, 'project')]
+
+    print (f'Extracting components from project {", ".join(project_ids)}...')
+    components, counts = FetchComponents(cache, auth_jira, project_ids, fetch_workers, issue_counts)
+
     if len(components) == 0:
-        print ('No components in project EPD')
+        print (f'No components in project {", ".join(project_ids)}')
+        metrics.finish()
         quit()
-    
-    print (f'Extracting components from project {project_id}...')
+
         # Define filename with current date/time suffix
     dt = datetime.now().strftime("%Y-%m-%d_%H%M%S")
-    file_name = 'C:\\Users\\Jim.Strange\\Valtech\\UK.Client.Wiggle - General\\01 Delivery Management\\WiggleCRC Jira Tracking\\Deep Dive\\' + project_id + ' Components Export ' + dt + '.csv'
-        
-    # Open file for writing data
-    with open(file_name, 'w') as output_file:
-        
-        print('Writing components...'),
-        # Loop through all issues and write status change info
-        for component in components:
-            output_file.write(f'{component.name}\n')
+    if len(project_ids) == 1:
+        file_name = OutputFile(config, project_ids[0] + ' Components Export ' + dt + '.csv')
+    else:
+        file_name = OutputFile(config, 'Jira Components Export ' + dt + '.csv')
+
+    print('Writing components...')
+    WriteComponents(file_name, components, counts)
+    metrics.finish()
     print('Finished.')
-    
-    
+
+
 if __name__ == '__main__':
-    main(argv[1:])
\ No newline at end of file
+    main(argv[1:])
@@ -0,0 +1,248 @@
+'''
+Created on 18 Oct 2026
+
+Purpose: Benchmarks the scripts against a FakeJira serving synthetic projects,
+         so their throughput can be measured without touching the real Jira.
+         For each project size, each tool is run as its own process and timed,
+         reporting wall time, issues per second, CPU time, peak memory (RSS)
+         and the number of requests it made. ConvertJiraExport converts a
+         synthetic Jira CSV export of the same project.
+
+         Results are compared with a stored baseline, and the run fails (exit
+         code 1) if any tool got slower or bigger than the baseline by more
+         than the tolerance, or made more requests. The first run, or a run
+         with save_baseline set, stores its results as the baseline instead.
+         Each tool's phase timings, from its run metrics, go in the results
+         file alongside.
+
+Usage:   Benchmark.py <config file>
+         Baselines only mean something on the machine that recorded them.
+         Peak RSS is read from /proc, so is only measured on Linux, and only
+         covers the tool's own process, not any worker processes it starts.
+         CPU time isn't measured on Windows.
+'''
+
+# Import modules
+import json                     # Baseline and results files
+import os                       # Process resource usage
+from subprocess import Popen, DEVNULL, STDOUT # Running the tools
+from sys import argv, exit, executable, path # Command line arguments, module search path
+from tempfile import TemporaryDirectory # Tool configs and output files
+from time import perf_counter, sleep # Wall time, polling the tools
+from os.path import abspath, dirname, exists, join # Locating the tools and shared modules
+
+# Shared modules live in the JiraCommon project alongside this one
+path.append(join(dirname(abspath(__file__)), '..', '..', 'JiraCommon', 'src'))
+from jira_client import ReadConfig, Option # Config file handling
+from jira_search import SEARCH_FIELDS # Fields the scripts search for
+from synthetic_jira import SyntheticProject, WriteExportCsv, STATUSES # Synthetic projects
+from FakeJira import FakeJira   # Stand-in Jira server
+
+REPO_DIR = join(dirname(abspath(__file__)), '..', '..')
+TOOLS = ('ExportJiraStatus', 'StatusFlow', 'GetJiraComponents', 'ConvertJiraExport')
+
+# Tools that work through every issue, so have an issues per second figure
+ISSUE_TOOLS = ('ExportJiraStatus', 'StatusFlow', 'ConvertJiraExport')
+
+# Seconds between peak RSS readings while a tool runs
+POLL_INTERVAL = 0.01
+
+# Wall time differences smaller than this many seconds are noise, not regressions
+MIN_SECONDS = 0.5
+
+
+# Write a config file for the Jira scripts, pointing them at the fake Jira and
+# writing their output to output_dir
+def WriteToolConfig(filename, port, output_dir, config):
+    with open(filename, 'w') as f:
+        f.write('[DEFAULT]\n'
+                f'jira_url = http://localhost:{port}/\n'
+                'auth_user = benchmark\n'
+                'auth_token = benchmark\n'
+                'project_id = EPD\n'
+                'convert_dst = TRUE\n'
+                f'status_list = {", ".join(STATUSES)}\n'
+                f'output_dir = {output_dir}\n'
+                f'metrics_file = {join(output_dir, "metrics.json")}\n'
+                f'page_size = {Option(config, "page_size", 100)}\n'
+                f'fetch_workers = {Option(config, "fetch_workers", 1)}\n'
+                f'raw_json = {Option(config, "raw_json", "FALSE")}\n'
+                f'output_format = {Option(config, "output_format", "csv")}\n'
+                'max_retries = 10\n'
+                'retry_backoff = 0.1\n')
+
+
+# Get a running process's peak RSS so far in MB, from Linux's /proc, or None
+# if it can't be read
+def PeakRss(pid):
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+# Run one tool to completion. Returns the wall time, CPU time and peak RSS (in
+# MB), any of which may be None if it can't be measured, and the exit code.
+# Peak RSS is polled while the tool runs: the rusage maximum isn't used, as on
+# Linux it starts from the size of this process when the tool was started
+def RunTool(command, log_filename):
+    with open(log_filename, 'w') as log:
+        start = perf_counter()
+        process = Popen(command, stdout=log, stderr=STDOUT, stdin=DEVNULL)
+        if not hasattr(os, 'wait4'):
+            process.wait()
+            return perf_counter() - start, None, None, process.returncode
+
+        peak_rss = None
+        while True:
+            peak_rss = PeakRss(process.pid) or peak_rss
+            pid, status, usage = os.wait4(process.pid, os.WNOHANG)
+            if pid:
+                break
+            sleep(POLL_INTERVAL)
+        seconds = perf_counter() - start
+        process.returncode = os.waitstatus_to_exitcode(status)
+    return seconds, usage.ru_utime + usage.ru_stime, peak_rss, process.returncode
+
+
+# Benchmark every tool against one project size. Returns a result per tool
+def BenchmarkSize(issues, tools, config):
+    project = SyntheticProject(issues=issues)
+    server = FakeJira(project, latency=Option(config, 'latency', 0.0), page_limit=Option(config, 'page_limit', 100),
+                      throttle=Option(config, 'throttle', 0.0))
+    server.prepare(SEARCH_FIELDS)
+    server.start()
+    results = []
+    try:
+        with TemporaryDirectory() as work_dir:
+            config_file = join(work_dir, 'config.txt')
+            WriteToolConfig(config_file, server.port, work_dir, config)
+            for tool in tools:
+                script = join(REPO_DIR, tool, 'src', tool + '.py')
+                if tool == 'ConvertJiraExport':
+                    export_file = join(work_dir, 'Jira Export.csv')
+                    if not exists(export_file):
+                        WriteExportCsv(project, export_file)
+                    command = [executable, script, export_file, str(Option(config, 'convert_processes', 1)),
+                               '--metrics=' + join(work_dir, 'metrics.json')]
+                    if Option(config, 'output_format', 'csv').lower() == 'xlsx':
+                        command.append('--xlsx')
+                else:
+                    command = [executable, script, config_file]
+
+                metrics_file = join(work_dir, 'metrics.json')
+                if exists(metrics_file):
+                    os.remove(metrics_file)
+                before = server.stats()
+                seconds, cpu, peak_rss, returncode = RunTool(command, join(work_dir, tool + '.log'))
+                after = server.stats()
+                requests = sum(count - before.get(name, 0) for name, count in after.items() if name not in ('bytes', 'throttled'))
+                if returncode != 0:
+                    with open(join(work_dir, tool + '.log')) as log:
+                        print(f'\n{tool} failed with exit code {returncode}:\n{log.read()[-2000:]}')
+
+                results.append({'tool': tool, 'issues': issues, 'seconds': round(seconds, 3),
+                                'issues_per_second': round(issues / seconds, 1) if tool in ISSUE_TOOLS else None,
+                                'cpu_seconds': round(cpu, 3) if cpu is not None else None,
+                                'peak_rss_mb': round(peak_rss, 1) if peak_rss is not None else None,
+                                'requests': requests,
+                                'throttled': after.get('throttled', 0) - before.get('throttled', 0),
+                                'ok': returncode == 0})
+                # Where the time went, from the tool's own run metrics
+                if exists(metrics_file):
+                    with open(metrics_file) as f:
+                        results[-1]['phases'] = json.load(f)['phases']
+    finally:
+        server.shutdown()
+        server.server_close()
+    return results
+
+
+# Compare results with the baseline. Returns a message per regression
+def FindRegressions(results, baseline, tolerance):
+    regressions = []
+    for result in results:
+        name = f'{result["tool"]} {result["issues"]}'
+        if not result['ok']:
+            regressions.append(f'{name}: failed')
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if base.get('seconds') and result['seconds'] > max(base['seconds'] * (1 + tolerance), base['seconds'] + MIN_SECONDS):
+            regressions.append(f'{name}: wall time {result["seconds"]} against a baseline of {base["seconds"]}')
+        if result['peak_rss_mb'] and base.get('peak_rss_mb') and result['peak_rss_mb'] > base['peak_rss_mb'] * (1 + tolerance):
+            regressions.append(f'{name}: peak RSS {result["peak_rss_mb"]} against a baseline of {base["peak_rss_mb"]}')
+        if result['requests'] > base.get('requests', result['requests']):
+            regressions.append(f'{name}: {result["requests"]} requests against a baseline of {base["requests"]}')
+    return regressions
+
+
+def PrintResults(results):
+    print(f'\n{"Tool":<20}{"Issues":>8}{"Seconds":>10}{"Issues/s":>10}{"CPU s":>9}{"Peak RSS MB":>13}{"Requests":>10}')
+    for result in results:
+        rate = result['issues_per_second']
+        cpu = result['cpu_seconds']
+        rss = result['peak_rss_mb']
+        print(f'{result["tool"]:<20}{result["issues"]:>8}{result["seconds"]:>10.2f}{rate if rate is not None else "":>10}'
+              f'{cpu if cpu is not None else "":>9}{rss if rss is not None else "":>13}{result["requests"]:>10}'
+              + ('' if result['ok'] else '  FAILED'))
+
+
+def main(argv):
+
+    # Parse the config file to extract token values
+    config = ReadConfig(argv)
+
+    # Project sizes and tools to benchmark
+    sizes = [int(size) for size in Option(config, 'sizes', '1000, 10000, 100000').split(',')]
+    tools = [tool.strip() for tool in Option(config, 'tools', ', '.join(TOOLS)).split(',') if tool.strip()]
+    for tool in tools:
+        if tool not in TOOLS:
+            print(f'Unknown tool {tool}, exiting.')
+            exit(2)
+
+    # Baseline to compare with, how much worse a result can be before it
+    # counts as a regression, and whether to replace the baseline
+    baseline_file = Option(config, 'baseline_file', join(dirname(abspath(__file__)), 'benchmark_baseline.json'))
+    tolerance = Option(config, 'tolerance', 0.25)
+    save_baseline = Option(config, 'save_baseline', False)
+
+    # File to write this run's results to (optional)
+    results_file = Option(config, 'results_file')
+    print('done.')
+
+    results = []
+    for issues in sizes:
+        print(f'Benchmarking {issues} issues...', end='', flush=True)
+        results.extend(BenchmarkSize(issues, tools, config))
+        print('done.')
+    PrintResults(results)
+
+    if results_file:
+        with open(results_file, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    baseline = {}
+    if exists(baseline_file):
+        with open(baseline_file) as f:
+            baseline = json.load(f)
+    regressions = FindRegressions(results, baseline, tolerance)
+
+    if save_baseline or not baseline:
+        baseline.update((f'{result["tool"]} {result["issues"]}', result) for result in results if result['ok'])
+        with open(baseline_file, 'w') as f:
+            json.dump(baseline, f, indent=2)
+        print(f'\nBaseline saved to {baseline_file}')
+
+    if regressions:
+        print('\nRegressions against the baseline:\n  ' + '\n  '.join(regressions))
+        exit(1)
+    print('\nFinished.')
+
+
+if __name__ == '__main__':
+    main(argv[1:])
@@ -0,0 +1,109 @@
+'''
+Created on 18 Oct 2026
+
+Purpose: Checks that the ways ExportJiraStatus can fetch a project all give the
+         same export. A reference export is made from a FakeJira that embeds
+         every changelog in full and never throttles, fetching serially. The
+         same synthetic project is then exported again with changelogs cut
+         short by the search, as Jira Server and Jira Cloud each cut them, with
+         requests throttled, and with concurrent fetching, raw JSON and the
+         local cache, and each export is compared with the reference.
+
+         The check fails (exit code 1) if any export differs from the
+         reference, or if any run fails.
+
+Usage:   CheckFetch.py [<issues>]
+         Checks a project of the given number of issues (default 1000).
+'''
+
+# Import modules
+from configparser import ConfigParser # Tool config settings for each check
+from glob import glob           # Finding the exports
+from subprocess import run, DEVNULL, STDOUT # Running the export
+from sys import argv, exit, executable, path # Command line arguments, module search path
+from tempfile import TemporaryDirectory # Tool configs and output files
+from os import mkdir            # An output folder per run
+from os.path import abspath, dirname, join # Locating the tools and shared modules
+
+# Shared modules live in the JiraCommon project alongside this one
+path.append(join(dirname(abspath(__file__)), '..', '..', 'JiraCommon', 'src'))
+from jira_search import SEARCH_FIELDS # Fields the scripts search for
+from synthetic_jira import SyntheticProject, MAX_HISTORIES # Synthetic projects
+from FakeJira import FakeJira   # Stand-in Jira server
+from Benchmark import WriteToolConfig # Tool config files
+
+EXPORT_SCRIPT = join(dirname(abspath(__file__)), '..', '..', 'ExportJiraStatus', 'src', 'ExportJiraStatus.py')
+
+# Fetches to check: a name, the FakeJira settings and the tool config options.
+# Throttled requests are retried straight away, so the check doesn't wait
+CHECKS = (
+    ('truncated', {}, {}),
+    ('truncated, 4 workers', {}, {'fetch_workers': 4}),
+    ('truncated, raw JSON, 4 workers', {}, {'raw_json': 'TRUE', 'fetch_workers': 4}),
+    ('truncated, cache, 4 workers', {}, {'fetch_workers': 4, 'cache_file': True}),
+    ('truncated cloud', {'cloud': True}, {}),
+    ('truncated cloud, raw JSON, 4 workers', {'cloud': True}, {'raw_json': 'TRUE', 'fetch_workers': 4}),
+    ('throttled, 4 workers', {'throttle': 0.2}, {'fetch_workers': 4}),
+    ('throttled, raw JSON, 4 workers', {'throttle': 0.2}, {'raw_json': 'TRUE', 'fetch_workers': 4}),
+    ('throttled cloud', {'cloud': True, 'throttle': 0.2}, {}),
+)
+
+
+# Export the project from a FakeJira with the given settings. Returns the
+# export's contents, or None if the export failed
+def Export(project, work_dir, name, server_settings, options):
+    server = FakeJira(project, **server_settings)
+    server.prepare(SEARCH_FIELDS)
+    server.start()
+    try:
+        output_dir = join(work_dir, name)
+        mkdir(output_dir)
+        config_file = join(output_dir, 'config.txt')
+        settings = ConfigParser()
+        settings.read_dict({'DEFAULT': {option: str(value) for option, value in options.items() if option != 'cache_file'}})
+        WriteToolConfig(config_file, server.port, output_dir, settings)
+        if options.get('cache_file'):
+            with open(config_file, 'a') as f:
+                f.write(f'cache_file = {join(output_dir, "cache.db")}\n')
+
+        with open(join(output_dir, 'ExportJiraStatus.log'), 'w') as log:
+            returncode = run([executable, EXPORT_SCRIPT, config_file], stdout=log, stderr=STDOUT, stdin=DEVNULL).returncode
+        exports = glob(join(output_dir, 'Jira Status Export *.csv'))
+        if returncode != 0 or len(exports) != 1:
+            with open(join(output_dir, 'ExportJiraStatus.log')) as log:
+                print(f'\n{name} failed with exit code {returncode}:\n{log.read()[-2000:]}')
+            return None
+        with open(exports[0], 'rb') as f:
+            return f.read()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def main(argv):
+    issues = int(argv[0]) if argv else 1000
+    project = SyntheticProject(issues=issues)
+
+    failures = []
+    with TemporaryDirectory() as work_dir:
+        print(f'Exporting {issues} issues for reference...', end='', flush=True)
+        reference = Export(project, work_dir, 'reference', {'changelog_limit': MAX_HISTORIES}, {})
+        if reference is None:
+            exit(1)
+        print('done.')
+
+        for name, server_settings, options in CHECKS:
+            print(f'Checking {name}...', end='', flush=True)
+            export = Export(project, work_dir, name.replace(',', '').replace(' ', '_'), server_settings, options)
+            if export != reference:
+                failures.append(name)
+            print('done.' if export == reference else 'FAILED.')
+
+    if failures:
+        print('\nExports that differ from the reference:\n  ' + '\n  '.join(failures))
+        exit(1)
+    print('\nFinished.')
+
+
+if __name__ == '__main__':
+    main(argv[1:])
@@ -0,0 +1,343 @@
+'''
+Created on 18 Oct 2026
+
+Purpose: A stand-in Jira Server on localhost, serving a SyntheticProject, for
+         benchmarking the scripts without going near the real Jira. It answers
+         the requests the scripts make: searches (startAt paging, updated and
+         key > clauses, field selection and changelog expansion, with embedded
+         changelogs cut short as Jira does), issue changelogs, the server time,
+         the project list, and project components with their issue counts.
+         Project and component responses carry an ETag, and an If-None-Match
+         that still matches gets a 304.
+
+         With cloud set it behaves as Jira Cloud instead: searches go through
+         search/jql and page with next page tokens, the old search endpoint is
+         gone, and an embedded changelog that is cut short holds the most
+         recent histories rather than the first ones, still with startAt 0.
+
+         Latency, the page size limit, the embedded changelog limit and
+         throttling (HTTP 429 with Retry-After on a share of requests) are all
+         configurable. Requests are counted per endpoint, with the bytes sent.
+         Search results are rendered to JSON once per issue and kept, so after
+         prepare the server spends little time on each request and a benchmark
+         mostly measures the script it is serving.
+
+Usage:   FakeJira.py [<issues>] [<port>] [<projects>] [--cloud]
+         Serves project EPD, and projects P2, P3... up to the number of
+         projects (default 1), on the given port (default 8765) until stopped.
+         With --cloud it answers as Jira Cloud.
+         Point a script's config file at it with
+             jira_url = http://localhost:8765/
+'''
+
+# Import modules
+import json                     # Response bodies
+import re                       # Request paths and JQL
+from datetime import datetime, timezone # Server time
+from hashlib import md5         # ETags
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from random import Random       # Throttling
+from sys import argv, path      # Command line arguments, module search path
+from threading import Lock, Thread # Request counts, serving in the background
+from time import sleep          # Latency
+from urllib.parse import urlsplit, parse_qs
+from os.path import abspath, dirname, join # Locating the shared modules
+
+# Shared modules live in the JiraCommon project alongside this one
+path.append(join(dirname(abspath(__file__)), '..', '..', 'JiraCommon', 'src'))
+from synthetic_jira import SyntheticProject # Generated issues
+
+SERVER_INFO = {'baseUrl': 'http://localhost', 'version': '9.12.0', 'versionNumbers': [9, 12, 0],
+               'deploymentType': 'Server', 'buildNumber': 912000, 'serverTitle': 'Fake Jira'}
+CLOUD_SERVER_INFO = dict(SERVER_INFO, version='1001.0.0', versionNumbers=[1001, 0, 0], deploymentType='Cloud',
+                         buildNumber=100000)
+
+# The fields the synthetic issues have. The jira library refetches the field
+# list before every search until it gets a non-empty one
+FIELDS = [{'id': field_id, 'key': field_id, 'name': name, 'custom': False, 'navigable': True, 'searchable': True,
+           'clauseNames': [field_id]}
+          for field_id, name in (('issuetype', 'Issue Type'), ('created', 'Created'), ('updated', 'Updated'),
+                                 ('status', 'Status'), ('priority', 'Priority'), ('assignee', 'Assignee'),
+                                 ('summary', 'Summary'), ('description', 'Description'),
+                                 ('components', 'Component/s'), ('labels', 'Labels'))]
+
+ISSUE_PATH = re.compile(r'/rest/api/2/issue/([^/]+)(/changelog)?$')
+COMPONENTS_PATH = re.compile(r'/rest/api/2/project/([^/]+)/components$')
+COUNTS_PATH = re.compile(r'/rest/api/2/component/(\d+)/relatedIssueCounts$')
+PROJECT_CLAUSE = re.compile(r'project\s*=\s*"?(\w+)"?', re.IGNORECASE)
+UPDATED_CLAUSE = re.compile(r'updated\s*>=\s*"([^"]+)"', re.IGNORECASE)
+KEY_CLAUSE = re.compile(r'\bkey\s*>\s*"?\w+-(\d+)"?', re.IGNORECASE)
+
+
+class FakeJira(ThreadingHTTPServer):
+    '''
+    Fake Jira serving 'project', a SyntheticProject or a list of them, on
+    localhost. port 0 picks a free port, which is then in self.port.
+      latency         - seconds added to every response
+      page_limit      - most issues a search returns, whatever it asks for
+      changelog_limit - most histories embedded in a search result
+      throttle        - share of requests answered 429, retry_after seconds later
+      cloud           - answer as Jira Cloud rather than Jira Server
+    '''
+    daemon_threads = True
+
+    def __init__(self, project, port=0, latency=0.0, page_limit=100, changelog_limit=100, throttle=0.0, retry_after=0, seed=1, cloud=False):
+        super().__init__(('127.0.0.1', port), FakeJiraHandler)
+        self.port = self.server_address[1]
+        projects = project if isinstance(project, (list, tuple)) else [project]
+        self.projects = {project.project_id: project for project in projects}
+        self.latency = latency
+        self.page_limit = page_limit
+        self.changelog_limit = changelog_limit
+        self.throttle = throttle
+        self.retry_after = retry_after
+        self.cloud = cloud
+        self.random = Random(seed)
+        self.lock = Lock()
+        self.counts = {}
+        self.rendered = {}
+
+    # Count a request against an endpoint
+    def count(self, name, sent=0):
+        with self.lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+            self.counts['bytes'] = self.counts.get('bytes', 0) + sent
+
+    # Get a copy of the request counts so far
+    def stats(self):
+        with self.lock:
+            return dict(self.counts)
+
+    # Decide whether to throttle a request
+    def throttled(self):
+        if not self.throttle:
+            return False
+        with self.lock:
+            return self.random.random() < self.throttle
+
+    # Serve requests on a background thread until shutdown is called
+    def start(self):
+        thread = Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+    # Get the project a search is for and the issue numbers it matches, in
+    # issue order, or None if the project isn't one of ours
+    def search(self, jql):
+        project = PROJECT_CLAUSE.search(jql)
+        project = self.projects.get(project.group(1).upper()) if project else None
+        if project is None:
+            return None, None
+        numbers = range(1, project.issues + 1)
+        updated = UPDATED_CLAUSE.search(jql)
+        if updated:
+            # Jira compares to the minute, with dates as yyyy/mm/dd hh:mm
+            since = updated.group(1).replace('/', '-').replace(' ', 'T')[:16]
+            all_updated = project.updated()
+            numbers = [number for number in numbers if all_updated[number - 1][:16] >= since]
+        after = KEY_CLAUSE.search(jql)
+        if after:
+            numbers = [number for number in numbers if number > int(after.group(1))]
+        return project, numbers
+
+    # Get an issue as a search returns it, with only the fields asked for (None
+    # for all of them) and the changelog, if expanded, cut off at the
+    # changelog limit: the first histories on Jira Server, the most recent on
+    # Jira Cloud
+    def search_issue(self, project, number, fields, changelog):
+        issue = project.issue(number)
+        if fields is not None:
+            issue['fields'] = {name: value for name, value in issue['fields'].items() if name in fields}
+        full_changelog = issue.pop('changelog')
+        if changelog:
+            histories = full_changelog['histories']
+            histories = histories[-self.changelog_limit:] if self.cloud else histories[:self.changelog_limit]
+            issue['changelog'] = {'startAt': 0, 'maxResults': len(histories), 'total': full_changelog['total'], 'histories': histories}
+        return issue
+
+    # Get the JSON for an issue in a search result, rendering it the first time
+    # it's asked for with these fields
+    def render(self, project, number, fields, changelog):
+        rendered = self.rendered.setdefault((project.project_id, fields, changelog), {})
+        data = rendered.get(number)
+        if data is None:
+            data = rendered[number] = json.dumps(self.search_issue(project, number, fields, changelog), separators=(',', ':')).encode('utf-8')
+        return data
+
+    # Render every issue for searches asking for these fields (comma separated)
+    # ahead of time, and count the issues with each component, so neither is
+    # charged to the tool being timed
+    def prepare(self, fields, changelog=True):
+        fields = frozenset(fields.split(','))
+        for project in self.projects.values():
+            for number in range(1, project.issues + 1):
+                self.render(project, number, fields, changelog)
+            project.component_counts()
+
+    # Get the project and issue number for an issue key, or None if it isn't
+    # one of ours
+    def issue_number(self, key):
+        prefix, _, number = key.rpartition('-')
+        project = self.projects.get(prefix)
+        if project is None or not number.isdigit() or not 1 <= int(number) <= project.issues:
+            return None, None
+        return project, int(number)
+
+    # Get the project and component for a component id, or None if it isn't
+    # one of ours
+    def component(self, component_id):
+        for project in self.projects.values():
+            for component in project.components():
+                if component['id'] == component_id:
+                    return project, component
+        return None, None
+
+
+class FakeJiraHandler(BaseHTTPRequestHandler):
+    '''
+    Answers one request to a FakeJira
+    '''
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes, which Nagle's algorithm
+    # would hold up on a kept-alive connection
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, name, body, status=200, headers=()):
+        self.send_data(name, json.dumps(body, separators=(',', ':')).encode('utf-8'), status, headers)
+
+    # Send a response with an ETag, or a 304 if the client already has it
+    def send_tagged_json(self, name, body):
+        data = json.dumps(body, separators=(',', ':')).encode('utf-8')
+        etag = '"' + md5(data).hexdigest() + '"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_data(name + ' not modified', b'', 304, [('ETag', etag)])
+        else:
+            self.send_data(name, data, 200, [('ETag', etag)])
+
+    def send_data(self, name, data, status=200, headers=()):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json;charset=UTF-8')
+        self.send_header('Content-Length', str(len(data)))
+        for header, value in headers:
+            self.send_header(header, value)
+        self.end_headers()
+        self.wfile.write(data)
+        self.server.count(name, len(data))
+
+    def send_error_json(self, name, status, message):
+        self.send_json(name, {'errorMessages': [message], 'errors': {}}, status)
+
+    def do_GET(self):
+        server = self.server
+        url = urlsplit(self.path)
+        # Repeated parameters are joined, as the jira library sends field lists that way
+        query = {name: ','.join(values) for name, values in parse_qs(url.query).items()}
+        if server.latency:
+            sleep(server.latency)
+        if server.throttled():
+            self.send_json('throttled', {'errorMessages': ['Rate limit exceeded.']}, 429, [('Retry-After', str(server.retry_after))])
+            return
+
+        if url.path == '/rest/api/2/serverInfo':
+            self.send_json('serverInfo', dict(CLOUD_SERVER_INFO if server.cloud else SERVER_INFO,
+                                              serverTime=datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000+0000')))
+        elif url.path == '/rest/api/2/field':
+            self.send_json('field', FIELDS)
+        elif url.path == '/rest/api/2/search' and server.cloud:
+            self.send_error_json('search', 410, 'The requested API has been removed. Please use /rest/api/3/search/jql.')
+        elif url.path == '/rest/api/2/search':
+            self.do_search(query)
+        elif url.path == '/rest/api/2/search/jql' and server.cloud:
+            self.do_search(query)
+        elif url.path == '/rest/api/2/project':
+            self.send_tagged_json('project', [{'self': f'http://localhost/rest/api/2/project/{project.seed + 10000}',
+                                               'id': str(project.seed + 10000), 'key': project.project_id,
+                                               'name': f'{project.project_id} project', 'projectTypeKey': 'software'}
+                                              for project in server.projects.values()])
+        elif COMPONENTS_PATH.match(url.path):
+            project = server.projects.get(COMPONENTS_PATH.match(url.path).group(1))
+            if project is None:
+                self.send_error_json('components', 404, 'No project could be found with key.')
+            else:
+                self.send_tagged_json('components', project.components())
+        elif COUNTS_PATH.match(url.path):
+            project, component = server.component(COUNTS_PATH.match(url.path).group(1))
+            if project is None:
+                self.send_error_json('issue counts', 404, 'The component does not exist.')
+            else:
+                self.send_tagged_json('issue counts', {'self': component['self'], 'issueCount': project.component_counts().get(component['name'], 0)})
+        elif ISSUE_PATH.match(url.path):
+            self.do_issue(ISSUE_PATH.match(url.path), query)
+        else:
+            self.send_error_json('other', 404, f'No handler for {url.path}')
+
+    def do_search(self, query):
+        server = self.server
+        project, numbers = server.search(query.get('jql', ''))
+        if project is None:
+            self.send_error_json('search', 400, 'The value in field \'project\' does not exist.')
+            return
+        # Jira Cloud pages with an opaque token, here the offset of the page
+        if server.cloud:
+            start_at = int(query.get('nextPageToken', 'page-0')[len('page-'):])
+        else:
+            start_at = int(query.get('startAt', 0))
+        max_results = min(int(query.get('maxResults', 50)), server.page_limit)
+        fields = query.get('fields', '*navigable')
+        fields = None if '*all' in fields or '*navigable' in fields else frozenset(fields.split(','))
+        changelog = 'changelog' in query.get('expand', '').split(',')
+        issues = b','.join(server.render(project, number, fields, changelog) for number in numbers[start_at:start_at + max_results])
+        if server.cloud:
+            end = start_at + max_results
+            tail = f'],"nextPageToken":"page-{end}","isLast":false}}' if end < len(numbers) else '],"isLast":true}'
+            self.send_data('search', b'{"issues":[' + issues + tail.encode('utf-8'))
+            return
+        heading = f'{{"expand":"schema,names","startAt":{start_at},"maxResults":{max_results},"total":{len(numbers)},"issues":['
+        self.send_data('search', heading.encode('utf-8') + issues + b']}')
+
+    def do_issue(self, match, query):
+        server = self.server
+        project, number = server.issue_number(match.group(1))
+        name = 'changelog' if match.group(2) else 'issue'
+        if project is None:
+            self.send_error_json(name, 404, 'Issue does not exist or you do not have permission to see it.')
+            return
+        issue = project.issue(number)
+        if name == 'changelog':
+            # One page of the changelog, oldest first
+            histories = issue['changelog']['histories']
+            start_at = int(query.get('startAt', 0))
+            max_results = min(int(query.get('maxResults', 100)), 100)
+            self.send_json(name, {'self': issue['self'] + '/changelog', 'startAt': start_at, 'maxResults': max_results,
+                                  'total': len(histories), 'isLast': start_at + max_results >= len(histories),
+                                  'values': histories[start_at:start_at + max_results]})
+        else:
+            # The whole changelog comes with the issue
+            if 'changelog' not in query.get('expand', ''):
+                del issue['changelog']
+            self.send_json(name, issue)
+
+
+def main(argv):
+    cloud = '--cloud' in argv
+    argv = [arg for arg in argv if arg != '--cloud']
+    issues = int(argv[0]) if argv else 1000
+    port = int(argv[1]) if len(argv) > 1 else 8765
+    project_count = int(argv[2]) if len(argv) > 2 else 1
+    projects = [SyntheticProject(issues=issues)]
+    projects.extend(SyntheticProject(f'P{number}', issues, seed=number) for number in range(2, project_count + 1))
+    server = FakeJira(projects, port, cloud=cloud)
+    print(f'Serving {issues} issues in each of {", ".join(server.projects)} on http://localhost:{server.port}/'
+          f'{" as Jira Cloud" if cloud else ""} (Ctrl-C to stop)')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
+
+
+if __name__ == '__main__':
+    main(argv[1:])
@@ -0,0 +1,184 @@
+'''
+Created on 18 Oct 2026
+
+Purpose: Synthetic Jira projects for benchmarking. Issues are generated on
+         demand from the project seed and the issue number, so a project of any
+         size costs no memory and is the same every time it is generated.
+
+         Each issue walks the status list from the first status: mostly one
+         step forward, sometimes skipping a status, and sometimes going back
+         for rework, spending a log-normally distributed time in each status.
+         A small share of issues are long-lived, with enough rework to take
+         their changelogs past the 100 histories a search returns.
+'''
+import csv                                  # Jira CSV exports
+from math import exp, log                   # Log-normal dwell times
+from random import Random                   # Seeded per-issue generators
+from jira_dates import DateConverter, CivilFromDays # UK time offsets, calendar dates
+
+STATUSES = ('New', 'Refining', 'Ready for Development', 'In Development', 'Review & Fix',
+            'Ready for QA', 'Test & Fix', 'Demo', 'Done')
+ISSUE_TYPES = (('Story', 55), ('Bug', 30), ('Task', 10), ('Sub-task', 5))
+COMPONENTS = ('Basket', 'Checkout', 'Search', 'Payments', 'Accounts', 'Delivery', 'Content', 'Platform')
+PRIORITIES = ('Highest', 'High', 'Medium', 'Low')
+PEOPLE = ('Alex Smith', 'Sam Jones', 'Chris Taylor', 'Jo Brown', 'Pat Wilson', 'Nic Evans')
+MONTHS = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+# Median hours spent in a status, by position in the status list
+DWELL_HOURS = (48, 24, 72, 60, 12, 24, 16, 24)
+LONG_LIVED_SHARE = 0.015
+MAX_HISTORIES = 400
+
+# Filler text for descriptions, sliced to length rather than generated
+FILLER = ('As a customer I want the page to load quickly, so that I can find what I need. ' * 60)
+
+
+class SyntheticProject:
+    '''
+    A project of 'issues' issues numbered from 1, created over the two years up
+    to 'end' (seconds since the epoch). Issues come back as the raw JSON Jira
+    returns from a search with the changelog expanded, histories oldest first
+    '''
+    def __init__(self, project_id='EPD', issues=1000, seed=1, statuses=STATUSES, end=1767225600):
+        self.project_id = project_id
+        self.issues = issues
+        self.seed = seed
+        self.statuses = tuple(statuses)
+        self.end = end
+        self.start = end - 730 * 86400
+        self.uk_time = DateConverter(True)
+        self.type_names = [name for name, weight in ISSUE_TYPES]
+        self.type_weights = [weight for name, weight in ISSUE_TYPES]
+        self._updated = None
+        self._component_counts = None
+
+    # Format seconds since the epoch as a Jira date in UK time
+    def jira_date(self, epoch, millis=0):
+        offset = self.uk_time.offset(epoch)
+        days, seconds = divmod(epoch + offset, 86400)
+        year, month, day = CivilFromDays(days)
+        hour, seconds = divmod(seconds, 3600)
+        minute, second = divmod(seconds, 60)
+        return f'{year:04d}-{month:02d}-{day:02d}T{hour:02d}:{minute:02d}:{second:02d}.{millis:03d}+{offset // 3600:02d}00'
+
+    # Walk an issue through the statuses from its created time. Returns the
+    # changelog histories and the issue's current status
+    def walk(self, rng, number, created):
+        # Long-lived issues bounce between the later statuses, quickly, until
+        # they have built up a long history
+        long_lived = rng.random() < LONG_LIVED_SHARE
+        target = rng.randrange(120, MAX_HISTORIES) if long_lived else 0
+        done = len(self.statuses) - 1
+        histories = []
+        status = 0
+        when = created
+        while status < done and len(histories) < MAX_HISTORIES:
+            rework = 0.6 if len(histories) < target else 0.12
+            median = DWELL_HOURS[status % len(DWELL_HOURS)] * (360 if long_lived else 3600)
+            when = when + int(exp(log(median) + rng.gauss(0, 1.0))) + 60
+            if when >= self.end:
+                break
+
+            step = rng.random()
+            if status >= 3 and step < rework:
+                next_status = status - 1
+            elif step < rework + 0.08:
+                next_status = min(status + 2, done)
+            else:
+                next_status = status + 1
+
+            items = [{'field': 'status', 'fieldtype': 'jira', 'from': str(status + 1), 'fromString': self.statuses[status],
+                      'to': str(next_status + 1), 'toString': self.statuses[next_status]}]
+            if rng.random() < 0.3:
+                items.append({'field': 'assignee', 'fieldtype': 'jira', 'fromString': rng.choice(PEOPLE), 'toString': rng.choice(PEOPLE)})
+            histories.append({'id': str(number * 1000 + len(histories)), 'author': {'displayName': rng.choice(PEOPLE)},
+                              'created': self.jira_date(when, rng.randrange(1000)), 'items': items})
+            status = next_status
+
+            # Other fields change along the way too
+            if rng.random() < 0.2:
+                when = when + rng.randrange(60, 7200)
+                histories.append({'id': str(number * 1000 + len(histories)), 'author': {'displayName': rng.choice(PEOPLE)},
+                                  'created': self.jira_date(min(when, self.end - 1), rng.randrange(1000)),
+                                  'items': [{'field': 'Story Points', 'fieldtype': 'custom', 'fromString': None, 'toString': str(rng.choice((1, 2, 3, 5, 8)))}]})
+        return histories, status
+
+    # Get one issue, numbered from 1, as raw search JSON with its full changelog
+    def issue(self, number):
+        rng = Random(self.seed * 1000003 + number)
+        created = self.start + (self.end - self.start) * (number - 1) // max(self.issues, 1) + rng.randrange(3600)
+        issue_type = rng.choices(self.type_names, self.type_weights)[0]
+        histories, status = self.walk(rng, number, created)
+        updated = histories[-1]['created'] if histories else self.jira_date(created + 60)
+        components = rng.sample(COMPONENTS, rng.choice((0, 1, 1, 1, 2)))
+        return {'expand': 'operations,changelog', 'id': str(10000 + number), 'key': f'{self.project_id}-{number}',
+                'self': f'http://localhost/rest/api/2/issue/{10000 + number}',
+                'fields': {'issuetype': {'name': issue_type, 'subtask': issue_type == 'Sub-task'},
+                           'created': self.jira_date(created),
+                           'updated': updated,
+                           'status': {'name': self.statuses[status]},
+                           'priority': {'name': rng.choice(PRIORITIES)},
+                           'assignee': {'displayName': rng.choice(PEOPLE)},
+                           'summary': f'Synthetic issue {number}',
+                           'description': FILLER[:rng.randrange(100, 3000)],
+                           'components': [{'name': name} for name in components],
+                           'labels': rng.sample(('web', 'app', 'api', 'tech-debt'), rng.randrange(3))},
+                'changelog': {'startAt': 0, 'maxResults': len(histories), 'total': len(histories), 'histories': histories}}
+
+    # Get the updated date of every issue, in issue order, for date searches
+    def updated(self):
+        if self._updated is None:
+            self._updated = [self.issue(number)['fields']['updated'] for number in range(1, self.issues + 1)]
+        return self._updated
+
+    # Get the project's components as Jira returns them. Component ids are
+    # numbered from the seed, so projects with different seeds don't share any
+    def components(self):
+        return [{'self': f'http://localhost/rest/api/2/component/{self.seed * 1000 + index + 1}',
+                 'id': str(self.seed * 1000 + index + 1), 'name': name,
+                 'description': f'{name} pages and services', 'lead': {'displayName': PEOPLE[index % len(PEOPLE)]},
+                 'assigneeType': 'PROJECT_DEFAULT', 'project': self.project_id}
+                for index, name in enumerate(COMPONENTS)]
+
+    # Get the number of issues with each component, by component name
+    def component_counts(self):
+        if self._component_counts is None:
+            counts = dict.fromkeys(COMPONENTS, 0)
+            for number in range(1, self.issues + 1):
+                for component in self.issue(number)['fields']['components']:
+                    counts[component['name']] = counts[component['name']] + 1
+            self._component_counts = counts
+        return self._component_counts
+
+
+# Format a Jira date as the Jira CSV export does, e.g. 28/Oct/21 2:05 PM
+def ExportDate(jira_date):
+    hour = int(jira_date[11:13])
+    return f'{jira_date[8:10]}/{MONTHS[int(jira_date[5:7]) - 1]}/{jira_date[2:4]} {(hour + 11) % 12 + 1}:{jira_date[14:16]} {"AM" if hour < 12 else "PM"}'
+
+
+# Write a project out as a Jira CSV export, with the repeated Sprint, Labels
+# and Components columns and multi-line descriptions the real ones have
+def WriteExportCsv(project, filename):
+    header = ['Summary', 'Issue key', 'Issue id', 'Issue Type', 'Status', 'Priority', 'Resolution', 'Assignee', 'Reporter',
+              'Created', 'Updated', 'Resolved', 'Fix versions', 'Components', 'Components', 'Description',
+              'Labels', 'Labels', 'Sprint', 'Sprint', 'Custom field (EPD Team)', 'Custom field (Epic Link)',
+              'Custom field (Story Points)', 'Custom field (Flagged)', 'Original estimate', 'Remaining Estimate', 'Time Spent']
+    with open(filename, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for number in range(1, project.issues + 1):
+            issue = project.issue(number)
+            fields = issue['fields']
+            done = fields['status']['name'] == project.statuses[-1]
+            components = [c['name'] for c in fields['components']] + ['', '']
+            labels = fields['labels'] + ['', '']
+            sprint = (number * 7 // max(project.issues, 1)) + 1
+            description = fields['description']
+            writer.writerow([fields['summary'], issue['key'], issue['id'], fields['issuetype']['name'], fields['status']['name'],
+                             fields['priority']['name'], 'Done' if done else '', fields['assignee']['displayName'], 'Alex Smith',
+                             ExportDate(fields['created']), ExportDate(fields['updated']), ExportDate(fields['updated']) if done else '',
+                             '', components[0], components[1], description[:80] + '\r\n\r\n"' + description[80:160] + '", ' + description[160:],
+                             labels[0], labels[1], f'Sprint {sprint}', f'Sprint {sprint - 1}' if number % 3 == 0 and sprint > 1 else '',
+                             'Team A' if number % 2 else 'Team B', f'{project.project_id}-{(number % 50) + 1}',
+                             (number % 8) + 1, 'Impediment' if number % 40 == 0 else '', '', '', ''])
@@ -0,0 +1,174 @@
+'''
+Created on 18 Oct 2026
+
+Purpose: Flow metrics over a TransitionTable - time in each status, lead and
+         cycle time percentiles per issue type, weekly throughput and daily
+         cumulative flow counts. Everything is computed with NumPy over the
+         whole table at once rather than issue by issue.
+
+         Statuses are ranked by their position in the configured status list.
+         An issue is done when its current status is the last one in the list,
+         and cycle time starts when it first reaches the cycle start status or
+         anything after it.
+'''
+import csv                                  # Output files
+import numpy                                # Array calculations
+from datetime import datetime, timezone    # Formatting dates
+
+DAY = 86400
+PERCENTILES = (50, 85, 95)
+
+
+# Work out, for each table row, the time the issue left that status (as_of if
+# it's still there) and whether it's the issue's current status
+def RowEnds(issue, time, as_of):
+    current = numpy.ones(len(issue), dtype=bool)
+    current[:-1] = issue[1:] != issue[:-1]
+    leave = numpy.empty_like(time)
+    leave[:-1] = time[1:]
+    leave[current] = as_of
+    return leave, current
+
+
+# Seconds each issue has spent in each status, re-entries included, as an
+# issues x statuses matrix. Time in the done status isn't counted
+def TimeInStatus(table, done_code, as_of):
+    issue, time, status = table.columns()
+    leave, current = RowEnds(issue, time, as_of)
+    duration = numpy.maximum(leave - time, 0)
+    duration[current & (status == done_code)] = 0
+
+    totals = numpy.bincount(issue.astype(numpy.int64) * len(table.status_names) + status, weights=duration,
+                            minlength=len(table.keys) * len(table.status_names))
+    return totals.reshape(len(table.keys), len(table.status_names))
+
+
+# Lead and cycle times of the issues that are done. Returns the done issues'
+# indexes, their completion times, and their lead and cycle times in seconds.
+# Cycle time is -1 for issues that never passed through the cycle start status
+def FlowTimes(table, ranks, start_rank, done_code):
+    issue, time, status = table.columns()
+    current = numpy.ones(len(issue), dtype=bool)
+    current[:-1] = issue[1:] != issue[:-1]
+    done_rows = current & (status == done_code)
+    done_issues = issue[done_rows].astype(numpy.int64)
+    completed = time[done_rows]
+
+    created = numpy.frombuffer(table.created, dtype=numpy.int64)
+    lead = completed - created[done_issues]
+
+    # First time each issue reached the cycle start status or beyond
+    started_rows = ranks[status] >= start_rank
+    started = numpy.full(len(table.keys), numpy.iinfo(numpy.int64).max)
+    numpy.minimum.at(started, issue[started_rows], time[started_rows])
+    started = started[done_issues]
+    cycle = numpy.where(started <= completed, completed - started, -1)
+    return done_issues, completed, lead, cycle
+
+
+# Number of issues done in each week. Returns the Monday each week starts on (in
+# days since the epoch) and the counts, including weeks where nothing was done
+def Throughput(completed):
+    if len(completed) == 0:
+        return numpy.zeros(0, dtype=numpy.int64), numpy.zeros(0, dtype=numpy.int64)
+    # 1970-01-01 was a Thursday, so weeks start 3 days before each multiple of 7
+    weeks = (completed // DAY + 3) // 7
+    counts = numpy.bincount(weeks - weeks.min())
+    return (numpy.arange(len(counts)) + weeks.min()) * 7 - 3, counts
+
+
+# Number of issues in each status at the end of each day (UTC) from the first
+# issue's creation up to as_of. Returns the days (since the epoch) and a
+# days x statuses matrix of counts
+def CumulativeFlow(table, as_of):
+    issue, time, status = table.columns()
+    if len(issue) == 0:
+        return numpy.zeros(0, dtype=numpy.int64), numpy.zeros((0, len(table.status_names)), dtype=numpy.int64)
+    leave, current = RowEnds(issue, time, as_of)
+    leave[current] = numpy.iinfo(numpy.int64).max // 2
+
+    # An issue counts on day d if it was in the status at the end of that day,
+    # i.e. between its entering and leaving the status. Mark the first and
+    # last+1 day of each stay, then sum down the days
+    first_day = time.min() // DAY
+    days = as_of // DAY - first_day + 1
+    enter_index = numpy.clip(-(-time // DAY) - 1 - first_day, 0, days)
+    leave_index = numpy.clip(-(-leave // DAY) - 1 - first_day, 0, days)
+    stays = enter_index < leave_index
+
+    changes = numpy.zeros((days + 1, len(table.status_names)), dtype=numpy.int64)
+    numpy.add.at(changes, (enter_index[stays], status[stays]), 1)
+    numpy.add.at(changes, (leave_index[stays], status[stays]), -1)
+    return numpy.arange(days) + first_day, numpy.cumsum(changes, axis=0)[:-1]
+
+
+# Format days since the epoch as an Excel-compatible date
+def FormatDay(day):
+    return datetime.fromtimestamp(int(day) * DAY, timezone.utc).strftime('%d/%m/%Y')
+
+
+# Format a number of seconds as days
+def FormatDays(seconds):
+    return f'{seconds / DAY:.2f}'
+
+
+# Calculate the flow metrics for a table and write them to a set of CSV files
+# named from output_prefix. statuses is the configured status list, which sets
+# the column order and the status ranks
+def WriteFlowMetrics(table, statuses, cycle_start, output_prefix, as_of):
+    # Rank each status code by its position in the status list. Statuses that
+    # aren't in the list are ranked below all of them
+    codes = [table.status_code(name) for name in statuses]
+    ranks = numpy.full(len(table.status_names), -1)
+    ranks[codes] = numpy.arange(len(codes))
+    done_code = table.status_code(statuses[-1])
+    start_rank = statuses.index(cycle_start)
+    status_columns = list(range(len(table.status_names)))
+
+    # Time in each status, per issue
+    in_status = TimeInStatus(table, done_code, as_of)
+    with open(output_prefix + ' Time In Status.csv', 'w', newline='') as output_file:
+        writer = csv.writer(output_file)
+        writer.writerow(['Issue ID', 'Issue Type'] + table.status_names)
+        for index, key in enumerate(table.keys):
+            writer.writerow([key, table.type_names[table.issue_types[index]]] + [FormatDays(in_status[index, code]) for code in status_columns])
+
+    # Lead and cycle times, per done issue and as percentiles per issue type
+    done_issues, completed, lead, cycle = FlowTimes(table, ranks, start_rank, done_code)
+    with open(output_prefix + ' Flow Times.csv', 'w', newline='') as output_file:
+        writer = csv.writer(output_file)
+        writer.writerow(['Issue ID', 'Issue Type', 'Done', 'Lead Time', 'Cycle Time'])
+        for index, done, lead_time, cycle_time in zip(done_issues, completed, lead, cycle):
+            writer.writerow([table.keys[index], table.type_names[table.issue_types[index]], FormatDay(done // DAY),
+                             FormatDays(lead_time), FormatDays(cycle_time) if cycle_time >= 0 else ''])
+
+    issue_types = numpy.frombuffer(table.issue_types, dtype=numpy.int16)[done_issues]
+    with open(output_prefix + ' Flow Percentiles.csv', 'w', newline='') as output_file:
+        writer = csv.writer(output_file)
+        writer.writerow(['Issue Type', 'Done'] + [f'Lead Time P{p}' for p in PERCENTILES] + [f'Cycle Time P{p}' for p in PERCENTILES])
+        for code, issue_type in enumerate(table.type_names):
+            type_lead = lead[issue_types == code]
+            type_cycle = cycle[(issue_types == code) & (cycle >= 0)]
+            row = [issue_type, len(type_lead)]
+            for times in (type_lead, type_cycle):
+                if len(times):
+                    row.extend(FormatDays(value) for value in numpy.percentile(times, PERCENTILES))
+                else:
+                    row.extend([''] * len(PERCENTILES))
+            writer.writerow(row)
+
+    # Issues done per week
+    weeks, counts = Throughput(completed)
+    with open(output_prefix + ' Throughput.csv', 'w', newline='') as output_file:
+        writer = csv.writer(output_file)
+        writer.writerow(['Week Commencing', 'Done'])
+        for week, count in zip(weeks, counts):
+            writer.writerow([FormatDay(week), count])
+
+    # Issues in each status at the end of each day
+    days, flow = CumulativeFlow(table, as_of)
+    with open(output_prefix + ' Cumulative Flow.csv', 'w', newline='') as output_file:
+        writer = csv.writer(output_file)
+        writer.writerow(['Date'] + table.status_names)
+        for day, counts in zip(days, flow):
+            writer.writerow([FormatDay(day)] + counts.tolist())
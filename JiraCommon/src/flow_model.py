@@ -0,0 +1,251 @@
+'''
+Created on 18 Oct 2026
+
+Purpose: In-memory flow model of a project for the flow service: the date each
+         issue last entered each status, as StatusFlow writes them, kept up to
+         date one change at a time from Jira webhooks rather than by fetching
+         the whole project again. Counts of issues by current status and by
+         issue type, and of issues done each week, are adjusted as each issue
+         changes, so reading them doesn't mean going through every issue.
+
+         The model can be saved to a snapshot file and loaded again, so a
+         restarted service carries on from where it was rather than starting
+         with a full fetch.
+'''
+import json                                 # Snapshot files
+from datetime import datetime, timezone     # Webhook timestamps
+from os import replace                      # Saving snapshots safely
+from threading import Lock                  # Webhooks and reads arrive on different threads
+from jira_dates import JiraEpoch, CivilFromDays # Comparing dates, week starts
+
+DAY = 86400
+
+# Snapshot file layout, changed if the layout ever does
+SNAPSHOT_VERSION = 1
+
+# Weeks of throughput in the summary
+THROUGHPUT_WEEKS = 26
+
+
+# Get the date of the Monday starting the week a Jira date falls in, as yyyy-mm-dd (UTC)
+def WeekStart(jira_date):
+    # 1970-01-01 was a Thursday, so weeks start 3 days before each multiple of 7
+    year, month, day = CivilFromDays((JiraEpoch(jira_date) // DAY + 3) // 7 * 7 - 3)
+    return f'{year:04d}-{month:02d}-{day:02d}'
+
+
+# Is Jira date a the same as or later than Jira date b (or is there no b)?
+def NotBefore(a, b):
+    return b is None or a == b or JiraEpoch(a) >= JiraEpoch(b)
+
+
+# Get the date of the change a webhook reports. The issue's updated date is in
+# the same form as changelog dates from the REST API; if it's missing, the
+# webhook's own timestamp (milliseconds since the epoch) is used instead
+def ChangeDate(payload):
+    updated = ((payload.get('issue') or {}).get('fields') or {}).get('updated')
+    if updated:
+        return updated
+    timestamp = payload.get('timestamp')
+    when = datetime.fromtimestamp(timestamp / 1000, timezone.utc) if timestamp else datetime.now(timezone.utc)
+    return when.strftime('%Y-%m-%dT%H:%M:%S.') + f'{when.microsecond // 1000:03d}+0000'
+
+
+class IssueFlow:
+    '''
+    One issue in the flow model. dates maps statuses in the status list to
+    the Jira date the issue last entered them
+    '''
+    __slots__ = ('issue_type', 'created', 'last_change', 'status', 'status_date', 'dates')
+
+    def __init__(self, issue_type, created, last_change, status, status_date, dates):
+        self.issue_type = issue_type
+        self.created = created
+        self.last_change = last_change
+        self.status = status
+        self.status_date = status_date
+        self.dates = dates
+
+
+class FlowModel:
+    '''
+    Flow model of one project, for a status list whose last status is done.
+    Safe to update and read from several threads. version goes up with every
+    change, so anything worked out from the model can be kept until it does
+    '''
+    def __init__(self, project_id, statuses):
+        self.project_id = project_id
+        self.statuses = list(statuses)
+        self.status_set = frozenset(self.statuses)
+        self.done_status = self.statuses[-1]
+        self.issues = {}
+        self.status_counts = {}
+        self.type_counts = {}
+        self.done_weeks = {}
+        self.events = 0
+        self.last_event = None
+        self.version = 0
+        self.lock = Lock()
+        self.rendered = {}
+
+    # Add an issue's contribution to the counts, or take it away again
+    def count(self, flow, step):
+        for counts, name in ((self.status_counts, flow.status), (self.type_counts, flow.issue_type)):
+            counts[name] = counts.get(name, 0) + step
+            if counts[name] == 0:
+                del counts[name]
+        if flow.status == self.done_status and flow.dates.get(self.done_status):
+            week = WeekStart(flow.dates[self.done_status])
+            self.done_weeks[week] = self.done_weeks.get(week, 0) + step
+            if self.done_weeks[week] == 0:
+                del self.done_weeks[week]
+
+    # Record an issue entering a status. Webhooks can arrive out of order, so
+    # only a change later than the one already seen moves the current status
+    def enter(self, flow, status, date):
+        if status in self.status_set and NotBefore(date, flow.dates.get(status)):
+            flow.dates[status] = date
+        if status and NotBefore(date, flow.status_date):
+            flow.status = status
+            flow.status_date = date
+
+    # Add or replace an issue from an IssueRecord, as fetched when the model
+    # is first built
+    def add_record(self, record):
+        dates = {}
+        for transition in record.transitions:
+            if transition.to_status in self.status_set:
+                dates[transition.to_status] = transition.created
+        if record.transitions:
+            status, status_date = record.transitions[-1].to_status, record.transitions[-1].created
+        else:
+            status, status_date = self.statuses[0], record.created
+        flow = IssueFlow(record.issue_type, record.created, record.last_change, status, status_date, dates)
+        with self.lock:
+            old = self.issues.get(record.key)
+            if old is not None:
+                self.count(old, -1)
+            self.issues[record.key] = flow
+            self.count(flow, 1)
+            self.version = self.version + 1
+
+    # Apply one Jira webhook payload (jira:issue_created, jira:issue_updated or
+    # jira:issue_deleted). Returns False if it isn't about an issue in this project
+    def apply_event(self, payload):
+        issue = payload.get('issue') or {}
+        key = issue.get('key')
+        if not key or key.rsplit('-', 1)[0] != self.project_id:
+            return False
+        fields = issue.get('fields') or {}
+        date = ChangeDate(payload)
+
+        with self.lock:
+            flow = self.issues.get(key)
+            if flow is not None:
+                self.count(flow, -1)
+            if payload.get('webhookEvent') == 'jira:issue_deleted':
+                self.issues.pop(key, None)
+            else:
+                if flow is None:
+                    # An issue created since the model was built (or missed)
+                    created = fields.get('created') or date
+                    status = (fields.get('status') or {}).get('name') or self.statuses[0]
+                    flow = self.issues[key] = IssueFlow('', created, None, status, created, {})
+                issue_type = (fields.get('issuetype') or {}).get('name')
+                if issue_type:
+                    flow.issue_type = issue_type
+
+                items = (payload.get('changelog') or {}).get('items') or ()
+                if items and NotBefore(date, flow.last_change):
+                    flow.last_change = date
+                for item in items:
+                    if item.get('field') == 'status':
+                        self.enter(flow, item.get('toString'), date)
+                self.count(flow, 1)
+            self.events = self.events + 1
+            self.last_event = date
+            self.version = self.version + 1
+        return True
+
+    # Get something worked out from the model, such as a response body, from
+    # render() the first time it's asked for since the model last changed
+    def cached(self, name, render):
+        with self.lock:
+            version, value = self.rendered.get(name, (None, None))
+            if version != self.version:
+                value = render()
+                self.rendered[name] = (self.version, value)
+            return value
+
+    # Summary of the model: counts of issues by status and type, and the
+    # number done in each of the latest weeks. Call with the lock held
+    def summary(self):
+        status_counts = {status: self.status_counts.get(status, 0) for status in self.statuses}
+        status_counts.update((status, count) for status, count in self.status_counts.items() if status not in status_counts)
+        weeks = sorted(self.done_weeks)[-THROUGHPUT_WEEKS:]
+        return {'project': self.project_id,
+                'issues': len(self.issues),
+                'done': self.status_counts.get(self.done_status, 0),
+                'status_counts': status_counts,
+                'type_counts': dict(sorted(self.type_counts.items())),
+                'weekly_throughput': {week: self.done_weeks[week] for week in weeks},
+                'events': self.events,
+                'last_event': self.last_event,
+                'version': self.version}
+
+    # One issue's flow, or None if it isn't in the model. Call with the lock held
+    def issue(self, key):
+        flow = self.issues.get(key)
+        if flow is None:
+            return None
+        return {'key': key, 'issue_type': flow.issue_type, 'created': flow.created, 'last_change': flow.last_change,
+                'status': flow.status, 'status_date': flow.status_date,
+                'dates': {status: flow.dates[status] for status in self.statuses if status in flow.dates}}
+
+    # Rows as StatusFlow writes them, in issue order: the key, then the date
+    # the issue last entered each status, converted by convert_date. The first
+    # status takes the date of the issue's last change, or that of the last
+    # issue that had one. Call with the lock held
+    def status_rows(self, convert_date):
+        last_change = None
+        for key in sorted(self.issues, key=lambda key: int(key.rsplit('-', 1)[1])):
+            flow = self.issues[key]
+            if flow.last_change:
+                last_change = flow.last_change
+            row = [key] + [convert_date(flow.dates[status]) if status in flow.dates else '' for status in self.statuses]
+            row[1] = convert_date(last_change) if last_change else ''
+            yield row
+
+    # Save the model to a snapshot file. The file is written alongside and
+    # then swapped in, so an interrupted save can't damage it
+    def save(self, file_name):
+        with self.lock:
+            snapshot = json.dumps({'snapshot_version': SNAPSHOT_VERSION, 'project': self.project_id,
+                                   'statuses': self.statuses, 'events': self.events, 'last_event': self.last_event,
+                                   'issues': {key: [flow.issue_type, flow.created, flow.last_change, flow.status,
+                                                    flow.status_date, flow.dates]
+                                              for key, flow in self.issues.items()}},
+                                  separators=(',', ':'))
+        with open(file_name + '.tmp', 'w', encoding='utf-8') as f:
+            f.write(snapshot)
+        replace(file_name + '.tmp', file_name)
+
+    # Load a model from a snapshot file. Returns None if the snapshot is for
+    # another project or status list, or can't be read
+    @classmethod
+    def load(cls, file_name, project_id, statuses):
+        try:
+            with open(file_name, encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if snapshot.get('snapshot_version') != SNAPSHOT_VERSION or snapshot.get('project') != project_id \
+                or snapshot.get('statuses') != list(statuses):
+            return None
+        model = cls(project_id, statuses)
+        for key, values in snapshot['issues'].items():
+            flow = model.issues[key] = IssueFlow(*values)
+            model.count(flow, 1)
+        model.events = snapshot.get('events', 0)
+        model.last_event = snapshot.get('last_event')
+        return model
@@ -0,0 +1,179 @@
+'''
+Created on 18 Oct 2026
+
+Purpose: Local SQLite cache of each project's issues and status transitions.
+         The first sync loads the whole project, later syncs only fetch issues
+         updated since the last one started, and the export outputs are then
+         generated from the cache rather than from Jira. A sync that is
+         interrupted picks up after the last issue of its last completed page
+         the next time it is run. Once a day, issues deleted from the project
+         or moved out of it are cleared out of the cache.
+'''
+import sqlite3                              # Local cache database
+from datetime import datetime, timedelta, timezone # Sync watermarks
+from itertools import groupby               # Grouping transitions by issue
+from time import time                       # When the cache was last pruned
+import pytz                                 # The user's time zone
+from jira.exceptions import JIRAError       # Jira HTTP errors
+from jira_records import IssueRecord, Transition
+from jira_search import SearchRecords, SearchKeys # Jira searches
+from run_metrics import metrics             # Phase timings
+
+# Time taken off the server time a sync starts at to give the next sync's
+# watermark, allowing for Jira's search index catching up with recent edits
+WATERMARK_SLACK = timedelta(minutes=10)
+
+# Seconds between checks for issues deleted or moved out of a project
+PRUNE_INTERVAL = 86400
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS issues (
+    issue_key    TEXT PRIMARY KEY,
+    project      TEXT NOT NULL,
+    issue_number INTEGER NOT NULL,
+    issue_type   TEXT NOT NULL,
+    created      TEXT NOT NULL,
+    updated      TEXT,
+    last_change  TEXT
+);
+CREATE INDEX IF NOT EXISTS issues_by_project ON issues (project, issue_number);
+CREATE TABLE IF NOT EXISTS transitions (
+    issue_key    TEXT NOT NULL,
+    seq          INTEGER NOT NULL,
+    created      TEXT NOT NULL,
+    from_status  TEXT,
+    to_status    TEXT,
+    PRIMARY KEY (issue_key, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sync (
+    project      TEXT PRIMARY KEY,
+    watermark    TEXT NOT NULL
+);
+DROP TABLE IF EXISTS checkpoint;
+CREATE TABLE IF NOT EXISTS resume (
+    project      TEXT PRIMARY KEY,
+    search       TEXT NOT NULL,
+    last_key     TEXT NOT NULL,
+    watermark    TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pruned (
+    project      TEXT PRIMARY KEY,
+    pruned_at    REAL NOT NULL
+);
+'''
+
+
+# Open the cache file, creating the tables if this is a new cache
+def OpenCache(cache_file):
+    connection = sqlite3.connect(cache_file)
+    connection.executescript(SCHEMA)
+    return connection
+
+
+# Replace an issue and its transitions in the cache
+def StoreRecord(connection, project_id, record):
+    issue_number = int(record.key.rsplit('-', 1)[1])
+    connection.execute('DELETE FROM transitions WHERE issue_key = ?', (record.key,))
+    connection.execute('INSERT OR REPLACE INTO issues VALUES (?, ?, ?, ?, ?, ?, ?)',
+                       (record.key, project_id, issue_number, record.issue_type, record.created, record.updated, record.last_change))
+    connection.executemany('INSERT INTO transitions VALUES (?, ?, ?, ?, ?)',
+                           [(record.key, seq, t.created, t.from_status, t.to_status) for seq, t in enumerate(record.transitions)])
+
+
+# Get the watermark for the next sync: the server time now, less the slack,
+# as yyyy/mm/dd hh:mm in the user's time zone, which is how JQL reads dates.
+# Taken before anything is fetched, so edits made while the sync is running
+# are picked up by the next one
+def SyncWatermark(auth_jira):
+    try:
+        now = datetime.strptime(auth_jira.server_info()['serverTime'], '%Y-%m-%dT%H:%M:%S.%f%z')
+    except (KeyError, ValueError):
+        now = datetime.now(timezone.utc)
+    try:
+        now = now.astimezone(pytz.timezone(auth_jira.myself()['timeZone']))
+    except (JIRAError, KeyError, pytz.UnknownTimeZoneError):
+        pass    # Left in the server's time zone, the default for users
+    return (now - WATERMARK_SLACK).strftime('%Y/%m/%d %H:%M')
+
+
+# Clear issues out of the cache that are no longer in the project, having been
+# deleted or moved to another project, going by a listing of the project's
+# keys. Returns the number removed
+def PruneProject(connection, auth_jira, project_id):
+    with metrics.phase('prune'):
+        keys = set(SearchKeys(auth_jira, 'project=' + project_id))
+    gone = [row for row in connection.execute('SELECT issue_key FROM issues WHERE project = ?', (project_id,))
+            if row[0] not in keys]
+    with connection:
+        connection.executemany('DELETE FROM transitions WHERE issue_key = ?', gone)
+        connection.executemany('DELETE FROM issues WHERE issue_key = ?', gone)
+        connection.execute('INSERT OR REPLACE INTO pruned VALUES (?, ?)', (project_id, time()))
+    metrics.count('issues_removed', len(gone))
+    return len(gone)
+
+
+# Bring the cached copy of a project up to date with Jira and return the number
+# of issues fetched. Only issues updated since the last sync started are
+# requested, unless the project has never been synced or a full resync is
+# forced. Issues are fetched in key order and the last key of every page is
+# checkpointed, so an interrupted sync carries on after it rather than
+# starting again. Deleted and moved issues are cleared out once a day
+def SyncProject(connection, auth_jira, project_id, page_size=100, workers=1, full_resync=False, raw=False):
+    row = connection.execute('SELECT watermark FROM sync WHERE project = ?', (project_id,)).fetchone()
+    checkpoint = connection.execute('SELECT search, last_key, watermark FROM resume WHERE project = ?', (project_id,)).fetchone()
+    if checkpoint is not None and not full_resync:
+        # Carry on with the interrupted search after its last stored issue.
+        # Its watermark is still from when it first started, so anything
+        # updated since then is fetched by the next sync
+        search_string, last_key, watermark = checkpoint
+    else:
+        last_key = None
+        watermark = SyncWatermark(auth_jira)
+        if full_resync or row is None:
+            # Drop everything held for the project, including the watermark, so
+            # a full load is started again if it can't be resumed
+            with connection:
+                connection.execute('DELETE FROM transitions WHERE issue_key IN (SELECT issue_key FROM issues WHERE project = ?)', (project_id,))
+                connection.execute('DELETE FROM issues WHERE project = ?', (project_id,))
+                connection.execute('DELETE FROM sync WHERE project = ?', (project_id,))
+                connection.execute('INSERT OR REPLACE INTO pruned VALUES (?, ?)', (project_id, time()))
+            search_string = 'project=' + project_id
+        else:
+            search_string = 'project=' + project_id + ' AND updated >= "' + row[0] + '"'
+
+    # Following on from a key rather than an offset, so issues edited or
+    # deleted while the sync was stopped can't shift the results past any
+    resume_string = search_string + (' AND key > "' + last_key + '"' if last_key else '') + ' ORDER BY key ASC'
+    fetched = 0
+    store = metrics.phase('cache_write')
+    for record in SearchRecords(auth_jira, resume_string, page_size, workers, raw):
+        with store:
+            StoreRecord(connection, project_id, record)
+        fetched = fetched + 1
+        if fetched % page_size == 0:
+            connection.execute('INSERT OR REPLACE INTO resume VALUES (?, ?, ?, ?)',
+                               (project_id, search_string, record.key, watermark))
+            connection.commit()
+
+    connection.execute('INSERT OR REPLACE INTO sync VALUES (?, ?)', (project_id, watermark))
+    connection.execute('DELETE FROM resume WHERE project = ?', (project_id,))
+    connection.commit()
+
+    pruned = connection.execute('SELECT pruned_at FROM pruned WHERE project = ?', (project_id,)).fetchone()
+    if pruned is None or time() - pruned[0] >= PRUNE_INTERVAL:
+        PruneProject(connection, auth_jira, project_id)
+    return fetched
+
+
+# Generator returning the cached issues of a project as IssueRecords, in issue order
+def CachedRecords(connection, project_id):
+    rows = connection.execute('''SELECT i.issue_key, i.issue_type, i.created, i.updated, i.last_change,
+                                        t.created, t.from_status, t.to_status
+                                 FROM issues i LEFT JOIN transitions t ON t.issue_key = i.issue_key
+                                 WHERE i.project = ?
+                                 ORDER BY i.issue_number, t.seq''', (project_id,))
+    for key, issue_rows in groupby(rows, lambda row: row[0]):
+        first = next(issue_rows)
+        transitions = [Transition(*first[5:])] if first[5] is not None else []
+        transitions.extend(Transition(*row[5:]) for row in issue_rows)
+        yield IssueRecord(key, first[1], first[2], first[3], first[4], transitions)
@@ -0,0 +1,263 @@
+'''
+Created on 18 Oct 2026
+
+Purpose: Shared config file handling and Jira connection for the scripts.
+         The connection keeps a pool of persistent HTTP connections sized to
+         the number of fetch workers, asks for gzip-compressed responses, and
+         retries throttled (429) and transient server errors (5xx) with
+         exponential backoff, honouring any Retry-After the server sends.
+         An optional request rate limit is shared by every worker thread.
+         A long-running process, such as the JiraTool worker, can keep its
+         connections between runs, so later runs skip connecting again.
+'''
+from collections import namedtuple             # Options shared by the scripts
+from configparser import ConfigParser, NoOptionError
+from os.path import join                        # Output file paths
+from email.utils import parsedate_to_datetime   # HTTP-date Retry-After values
+from random import uniform                      # Backoff jitter
+from threading import Lock                      # Shared rate limiter
+from time import monotonic, sleep, time         # Rate limiting and backoff
+from jira import JIRA                           # Jira functions
+from requests.adapters import HTTPAdapter       # Connection pooling
+from requests.exceptions import ConnectionError as RequestConnectionError, Timeout
+from run_metrics import metrics                 # Request counts and timings
+
+# Responses worth retrying: throttling and transient server errors
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+MAX_BACKOFF = 60
+
+# Connections kept for reuse, by their connection details, once
+# KeepConnections has been called. None while connections aren't kept
+kept_connections = None
+
+# Where the scripts write their output unless output_dir is set in the config
+DEFAULT_OUTPUT_DIR = 'C:\\Users\\Jim.Strange\\Valtech\\UK.Client.Wiggle - General\\01 Delivery Management\\WiggleCRC Jira Tracking\\Deep Dive\\'
+
+# Output file formats the scripts can write
+OUTPUT_FORMATS = ('csv', 'xlsx')
+
+# The fetch, output and run metrics options the scripts share
+CommonOptions = namedtuple('CommonOptions', ['page_size', 'fetch_workers', 'cache_file', 'full_resync', 'raw_json',
+                                             'output_format', 'metrics_file', 'progress', 'profile_file'])
+
+
+# Read the config file named on the command line, exiting if there isn't one.
+# The caller prints 'done.' once it has read its options
+def ReadConfig(argv):
+    #Check for config file being passed
+    if not argv:
+        print('No config file passed, exiting.')
+        quit()
+
+    # Parse the config file to extract token values
+    print('Parsing config file...', end='', flush=True)
+    config = ConfigParser()
+    config['DEFAULT']={}
+    try:
+        with open(argv[0]) as f:
+            config.read_file(f)
+    except IOError:
+        print('Config file does not exist, exiting.')
+        quit()
+    return config
+
+
+# Get a config option that must be there, exiting with the message if it isn't
+def RequiredOption(config, name, message):
+    try:
+        return config.get('DEFAULT', name)
+    except NoOptionError:
+        print(message)
+        quit()
+
+
+# Get a config option that may be left out, as the type of its default
+def Option(config, name, default=None):
+    try:
+        if isinstance(default, bool):
+            return config.getboolean('DEFAULT', name)
+        if isinstance(default, int):
+            return config.getint('DEFAULT', name)
+        if isinstance(default, float):
+            return config.getfloat('DEFAULT', name)
+        return config.get('DEFAULT', name)
+    except NoOptionError:
+        return default
+
+
+# Get the fetch, output and run metrics options the scripts share, all optional:
+#   page_size, fetch_workers - the number of issues requested per search page,
+#       and how many pages are fetched at once (1 fetches serially)
+#   cache_file, full_resync - a local cache file. When set, only issues updated
+#       since the last run are fetched, an interrupted fetch carries on where it
+#       stopped, and the output is generated from the cache. full_resync
+#       reloads it from scratch
+#   raw_json - decode search results straight from the raw JSON rather than
+#       through the jira library's Issue objects (faster on large projects)
+#   output_format - csv, or xlsx for an Excel workbook with the dates as Excel
+#       dates. Exits if it's anything else
+#   metrics_file, progress, profile_file - run metrics: a JSON file of phase
+#       timings, counts and peak memory, a live progress line, and a cProfile
+#       profile of the run
+def ReadCommonOptions(config):
+    output_format = Option(config, 'output_format', 'csv').lower()
+    if output_format not in OUTPUT_FORMATS:
+        print(f'Unknown output format {output_format}, exiting.')
+        quit()
+    return CommonOptions(page_size=Option(config, 'page_size', 100),
+                         fetch_workers=Option(config, 'fetch_workers', 1),
+                         cache_file=Option(config, 'cache_file'),
+                         full_resync=Option(config, 'full_resync', False),
+                         raw_json=Option(config, 'raw_json', False),
+                         output_format=output_format,
+                         metrics_file=Option(config, 'metrics_file'),
+                         progress=Option(config, 'progress', False),
+                         profile_file=Option(config, 'profile_file'))
+
+
+# Get the path of an output file in the output_dir from the config file, or the
+# default output folder if there isn't one
+def OutputFile(config, file_name):
+    output_dir = Option(config, 'output_dir', DEFAULT_OUTPUT_DIR)
+    if not output_dir or output_dir.endswith(('\\', '/')):
+        return output_dir + file_name
+    return join(output_dir, file_name)
+
+
+class RateLimiter:
+    '''
+    Spaces requests out to at most 'rate' a second across every thread that
+    shares it. A rate of 0 means no limit
+    '''
+    def __init__(self, rate=0):
+        self.interval = 1 / rate if rate > 0 else 0
+        self.next_time = 0
+        self.lock = Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = monotonic()
+            wait_until = max(self.next_time, now)
+            self.next_time = wait_until + self.interval
+        if wait_until > now:
+            sleep(wait_until - now)
+
+
+class RetryAdapter(HTTPAdapter):
+    '''
+    Connection pool that waits on a shared RateLimiter before each request and
+    retries throttled requests, server errors and dropped connections with
+    exponential backoff. Server errors and dropped connections are only
+    retried for requests that don't change anything. Each function in
+    throttle_listeners is called whenever a request is throttled, so
+    concurrent searches can ease off while it's retried
+    '''
+    def __init__(self, limiter, max_retries=5, backoff=1.0, pool_size=10):
+        super().__init__(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.limiter = limiter
+        self.retries = max_retries
+        self.backoff = backoff
+        self.throttle_listeners = []
+
+    # How long to wait before the given retry. A Retry-After header is either
+    # a number of seconds or an HTTP date
+    def delay(self, attempt, response=None):
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), MAX_BACKOFF)
+            except ValueError:
+                try:
+                    return min(max(parsedate_to_datetime(retry_after).timestamp() - time(), 0), MAX_BACKOFF)
+                except (TypeError, ValueError):
+                    pass
+        return uniform(0.5, 1) * min(self.backoff * 2 ** attempt, MAX_BACKOFF)
+
+    def send(self, request, **kwargs):
+        for attempt in range(self.retries + 1):
+            self.limiter.wait()
+            try:
+                response = super().send(request, **kwargs)
+            except (RequestConnectionError, Timeout):
+                if attempt == self.retries or request.method not in SAFE_METHODS:
+                    raise
+                metrics.count('http_retries')
+                sleep(self.delay(attempt))
+                continue
+            if response.status_code == 429:
+                metrics.count('throttled')
+                for listener in tuple(self.throttle_listeners):
+                    listener()
+            if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                return response
+            # A throttled request wasn't processed, but anything else that
+            # changes data could have been, so only gets are retried then
+            if response.status_code != 429 and request.method not in SAFE_METHODS:
+                return response
+            delay = self.delay(attempt, response)
+            response.close()
+            metrics.count('http_retries')
+            sleep(delay)
+
+
+# Count a response and the bytes it took to receive, compressed as they were sent
+def CountResponse(response, *args, **kwargs):
+    metrics.count('http_requests')
+    content = response.content
+    try:
+        received = response.raw.tell()
+    except (AttributeError, OSError):
+        received = 0
+    metrics.count('bytes_received', received or len(content))
+    return response
+
+
+# Keep Jira connections from now on, and hand the same one back whenever the
+# same connection details are asked for again
+def KeepConnections():
+    global kept_connections
+    if kept_connections is None:
+        kept_connections = {}
+
+
+# Connect to Jira using the connection details in the config file. Optional
+# items set the request rate limit (requests_per_second, 0 for none), the
+# number of retries (max_retries) and the first retry delay (retry_backoff)
+def ConnectJira(config, workers=1):
+    jira_url = RequiredOption(config, 'jira_url', 'Jira URL not provided in config file, exiting.')
+    auth_user = RequiredOption(config, 'auth_user', 'User name not provided in config file, exiting.')
+    auth_token = RequiredOption(config, 'auth_token', 'Authentication token not provided in config file, exiting.')
+    rate = Option(config, 'requests_per_second', 0.0)
+    max_retries = Option(config, 'max_retries', 5)
+    retry_backoff = Option(config, 'retry_backoff', 1.0)
+    pool_size = max(workers, 10)
+
+    key = (jira_url, auth_user, auth_token, rate, max_retries, retry_backoff, pool_size)
+    if kept_connections is not None and key in kept_connections:
+        auth_jira = kept_connections[key]
+        if metrics.started and CountResponse not in auth_jira._session.hooks['response']:
+            auth_jira._session.hooks['response'].append(CountResponse)
+        return auth_jira
+
+    limiter = RateLimiter(rate)
+    adapter = RetryAdapter(limiter, max_retries, retry_backoff, pool_size)
+
+    # The adapter does the retrying, so the jira library's own retries are
+    # turned off, and the server details are only fetched once it's in place
+    auth_jira = JIRA(jira_url, basic_auth=(auth_user, auth_token), max_retries=0, get_server_info=False)
+    auth_jira._session.mount('https://', adapter)
+    auth_jira._session.mount('http://', adapter)
+    auth_jira._session.headers['Accept-Encoding'] = 'gzip, deflate'
+    if metrics.started:
+        auth_jira._session.hooks['response'].append(CountResponse)
+
+    with metrics.phase('connect'):
+        server_info = auth_jira.server_info()
+    auth_jira._version = tuple(server_info['versionNumbers'])
+    auth_jira.deploymentType = server_info.get('deploymentType')
+    if kept_connections is not None:
+        kept_connections[key] = auth_jira
+    return auth_jira
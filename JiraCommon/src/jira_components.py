@@ -0,0 +1,58 @@
+'''
+Created on 18 Oct 2026
+
+Purpose: Fetches projects' components, with each component's number of issues,
+         and writes them to a CSV file. Shared by GetJiraComponents and the
+         pipeline's components stage. Component lists and issue counts are
+         fetched several at a time, through a ResponseCache.
+'''
+import csv                                  # CSV output
+from concurrent.futures import ThreadPoolExecutor # Fetching projects and counts at once
+from jira.exceptions import JIRAError       # Jira HTTP errors
+from run_metrics import metrics             # Phase timings and counts
+
+
+# Get a project's components as raw JSON, or none if the project can't be read
+def ProjectComponents(cache, auth_jira, project_id):
+    try:
+        return cache.get_json(auth_jira, f'project/{project_id}/components')
+    except JIRAError as e:
+        print(f'\nCould not get the components of project {project_id} ({e.status_code}), skipping.')
+        return []
+
+
+# Get the number of issues with a component, or an empty count if it can't be read
+def ComponentIssueCount(cache, auth_jira, project_id, component):
+    try:
+        return cache.get_json(auth_jira, f'component/{component["id"]}/relatedIssueCounts')['issueCount']
+    except JIRAError as e:
+        print(f'\nWarning - could not count the issues of component {component["name"]} in project {project_id} ({e.status_code})')
+        return ''
+
+
+# Fetch the components of the projects, fetch_workers requests at a time.
+# Returns a list of (project ID, component) pairs and a list of their issue
+# counts, which are left empty unless issue_counts is set
+def FetchComponents(cache, auth_jira, project_ids, fetch_workers=1, issue_counts=True):
+    with ThreadPoolExecutor(max_workers=fetch_workers) as executor, metrics.phase('components'):
+        component_lists = list(executor.map(lambda project_id: ProjectComponents(cache, auth_jira, project_id), project_ids))
+        components = [(project_id, component) for project_id, project_components in zip(project_ids, component_lists)
+                      for component in project_components]
+        if issue_counts:
+            counts = list(executor.map(lambda component: ComponentIssueCount(cache, auth_jira, *component), components))
+        else:
+            counts = [''] * len(components)
+    cache.save()
+    return components, counts
+
+
+# Write the components and their issue counts to a CSV file, a row per component
+def WriteComponents(file_name, components, counts):
+    with metrics.phase('write'), open(file_name, 'w', newline='') as output_file:
+        writer = csv.writer(output_file)
+        writer.writerow(['Project', 'Component', 'Lead', 'Description', 'Issues'])
+        # Loop through all components and write their details
+        for (project_id, component), count in zip(components, counts):
+            lead = component.get('lead', {}).get('displayName', '')
+            writer.writerow([project_id, component['name'], lead, component.get('description', ''), count])
+    metrics.count('rows_written', len(components))
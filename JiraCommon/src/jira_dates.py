@@ -0,0 +1,237 @@
+'''
+Created on 18 Oct 2026
+
+Purpose: Converts Jira date strings to the Excel-compatible 'dd/mm/yyyy hh:mm:ss'
+         format used in the export files. Jira always uses the same fixed layout
+         (2021-10-28T14:05:09.123+0100), so the fields are sliced out directly
+         rather than going through strptime, and the UK DST offsets are looked up
+         from a table built once rather than through pytz on every call.
+'''
+from bisect import bisect_right             # Finding the DST period for a time
+from datetime import datetime               # Fallback for unexpected layouts
+import pytz                                 # Time zone transition tables
+
+# NumPy, for vectorised batch conversion. It takes longer to load than most of
+# a small run, so it isn't loaded until a batch conversion needs it
+numpy = None
+
+JIRA_FORMAT = '%Y-%m-%dT%H:%M:%S.%f%z'
+EXCEL_FORMAT = '%d/%m/%Y %H:%M:%S'
+
+# Character positions of the date separators in a Jira date string
+SEPARATORS = ((4, '-'), (7, '-'), (10, 'T'), (13, ':'), (16, ':'), (19, '.'))
+
+
+# Load NumPy if it hasn't been loaded yet. Returns it, or None if it isn't installed
+def ImportNumpy():
+    global numpy
+    if numpy is None:
+        try:
+            import numpy as module
+        except ImportError:
+            return None
+        numpy = module
+    return numpy
+
+
+# Days since 1970-01-01 for a calendar date (proleptic Gregorian)
+def DaysFromCivil(year, month, day):
+    year = year - (month <= 2)
+    era = (year if year >= 0 else year - 399) // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * (month + (-3 if month > 2 else 9)) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+
+# Calendar date for a number of days since 1970-01-01, the inverse of DaysFromCivil
+def CivilFromDays(days):
+    days = days + 719468
+    era = (days if days >= 0 else days - 146096) // 146097
+    day_of_era = days - era * 146097
+    year_of_era = (day_of_era - day_of_era // 1460 + day_of_era // 36524 - day_of_era // 146096) // 365
+    day_of_year = day_of_era - (365 * year_of_era + year_of_era // 4 - year_of_era // 100)
+    mp = (5 * day_of_year + 2) // 153
+    day = day_of_year - (153 * mp + 2) // 5 + 1
+    month = mp + (3 if mp < 10 else -9)
+    return year_of_era + era * 400 + (month <= 2), month, day
+
+
+class DateConverter:
+    '''
+    Converts Jira dates to Excel dates. With tz_correction set, the time is
+    treated as UTC and shifted to UK local time, as ConvertDate always did.
+    '''
+    def __init__(self, tz_correction=False, timezone='Europe/London'):
+        self.tz_correction = bool(tz_correction)
+
+        # Resolve the time zone once, as a table of UTC transition times (in
+        # seconds since the epoch) and the UTC offset that applies from each
+        tz = self.tz = pytz.timezone(timezone)
+        transition_times = getattr(tz, '_utc_transition_times', None)
+        if transition_times:
+            self.transitions = [DaysFromCivil(t.year, t.month, t.day) * 86400 + t.hour * 3600 + t.minute * 60 + t.second
+                                for t in transition_times]
+            self.offsets = [int(info[0].total_seconds()) for info in tz._transition_info]
+        else:
+            self.transitions = [0]
+            self.offsets = [int(tz.utcoffset(datetime(2000, 1, 1)).total_seconds())]
+
+        # The DST period of the last lookup. Changelog dates arrive close
+        # together, so most lookups fall in the same period as the one before
+        self.period_start = self.period_end = 0
+        self.period_offset = None
+
+    # Get the UTC offset in seconds that applies at a time in seconds since the epoch
+    def offset(self, epoch):
+        if self.period_offset is not None and self.period_start <= epoch < self.period_end:
+            return self.period_offset
+
+        index = max(bisect_right(self.transitions, epoch) - 1, 0)
+        self.period_start = self.transitions[index] if index > 0 else -2**63
+        self.period_end = self.transitions[index + 1] if index + 1 < len(self.transitions) else 2**63
+        self.period_offset = self.offsets[index]
+        return self.period_offset
+
+    # Convert a single Jira date string to an Excel date string
+    def convert(self, jira_date):
+        # Anything not in Jira's usual layout goes the long way round
+        if len(jira_date) < 24 or any(jira_date[i] != c for i, c in SEPARATORS):
+            return self.convert_slow(jira_date)
+
+        if not self.tz_correction:
+            return f'{jira_date[8:10]}/{jira_date[5:7]}/{jira_date[0:4]} {jira_date[11:19]}'
+
+        days = DaysFromCivil(int(jira_date[0:4]), int(jira_date[5:7]), int(jira_date[8:10]))
+        seconds = int(jira_date[11:13]) * 3600 + int(jira_date[14:16]) * 60 + int(jira_date[17:19])
+        epoch = days * 86400 + seconds
+        days, seconds = divmod(epoch + self.offset(epoch), 86400)
+        year, month, day = CivilFromDays(days)
+        hour, seconds = divmod(seconds, 3600)
+        minute, second = divmod(seconds, 60)
+        return f'{day:02d}/{month:02d}/{year:04d} {hour:02d}:{minute:02d}:{second:02d}'
+
+    # Convert a Jira date with strptime and pytz, for layouts the fast path doesn't handle
+    def convert_slow(self, jira_date):
+        datetimeObj = datetime.strptime(jira_date, JIRA_FORMAT)
+        if self.tz_correction:
+            issue_dt = datetime(datetimeObj.year, datetimeObj.month, datetimeObj.day, datetimeObj.hour, datetimeObj.minute, datetimeObj.second, tzinfo=pytz.utc)
+            datetimeObj = issue_dt.astimezone(self.tz)
+        return datetimeObj.strftime(EXCEL_FORMAT)
+
+    # Convert a list of Jira date strings to a list of Excel date strings.
+    # Uses NumPy to convert the whole list at once where it is installed. Without
+    # DST correction the dates are only re-ordered, which slicing does faster
+    def convert_many(self, jira_dates):
+        if not self.tz_correction or len(jira_dates) == 0 or ImportNumpy() is None:
+            return [self.convert(jira_date) for jira_date in jira_dates]
+
+        # View the dates as a matrix of characters, one row per date
+        try:
+            chars = numpy.array(jira_dates, dtype='S28')
+        except UnicodeEncodeError:
+            return [self.convert(jira_date) for jira_date in jira_dates]
+        lengths = numpy.char.str_len(chars)
+        chars = chars.view(numpy.uint8).reshape(len(jira_dates), 28)
+        valid = lengths >= 24
+        for i, c in SEPARATORS:
+            valid &= chars[:, i] == ord(c)
+        digits = chars.astype(numpy.int64) - ord('0')
+
+        year = digits[:, 0] * 1000 + digits[:, 1] * 100 + digits[:, 2] * 10 + digits[:, 3]
+        month = digits[:, 5] * 10 + digits[:, 6]
+        day = digits[:, 8] * 10 + digits[:, 9]
+        seconds = (digits[:, 11] * 10 + digits[:, 12]) * 3600 + (digits[:, 14] * 10 + digits[:, 15]) * 60 + digits[:, 17] * 10 + digits[:, 18]
+
+        # Shift each time by the offset of the DST period it falls in
+        epoch = DaysFromCivilArray(year, month, day) * 86400 + seconds
+        index = numpy.maximum(numpy.searchsorted(numpy.array(self.transitions, dtype=numpy.int64), epoch, side='right') - 1, 0)
+        epoch = epoch + numpy.array(self.offsets, dtype=numpy.int64)[index]
+        days, seconds = numpy.divmod(epoch, 86400)
+        year, month, day = CivilFromDaysArray(days)
+
+        # Lay the output characters out as a matrix and view each row as a string
+        out = numpy.empty((len(jira_dates), 19), dtype=numpy.uint8)
+        out[:, [2, 5]] = ord('/')
+        out[:, 10] = ord(' ')
+        out[:, [13, 16]] = ord(':')
+        hour, seconds = numpy.divmod(seconds, 3600)
+        minute, second = numpy.divmod(seconds, 60)
+        for value, position, width in ((day, 0, 2), (month, 3, 2), (year, 6, 4), (hour, 11, 2), (minute, 14, 2), (second, 17, 2)):
+            for i in range(width - 1, -1, -1):
+                value, digit = numpy.divmod(value, 10)
+                out[:, position + i] = digit + ord('0')
+
+        converted = out.view('S19').ravel().astype(str).tolist()
+        # Fall back to the slow path for anything not in Jira's usual layout
+        if not valid.all():
+            for i in numpy.flatnonzero(~valid):
+                converted[i] = self.convert_slow(jira_dates[i])
+        return converted
+
+
+# Vectorised DaysFromCivil over NumPy integer arrays
+def DaysFromCivilArray(year, month, day):
+    year = year - (month <= 2)
+    era = numpy.where(year >= 0, year, year - 399) // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * (month + numpy.where(month > 2, -3, 9)) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+
+# Vectorised CivilFromDays over NumPy integer arrays
+def CivilFromDaysArray(days):
+    days = days + 719468
+    era = numpy.where(days >= 0, days, days - 146096) // 146097
+    day_of_era = days - era * 146097
+    year_of_era = (day_of_era - day_of_era // 1460 + day_of_era // 36524 - day_of_era // 146096) // 365
+    day_of_year = day_of_era - (365 * year_of_era + year_of_era // 4 - year_of_era // 100)
+    mp = (5 * day_of_year + 2) // 153
+    day = day_of_year - (153 * mp + 2) // 5 + 1
+    month = mp + numpy.where(mp < 10, 3, -9)
+    return year_of_era + era * 400 + (month <= 2), month, day
+
+
+# Seconds since the epoch (UTC) for a Jira date string, using its UTC offset
+def JiraEpoch(jira_date):
+    # Anything not in Jira's usual layout goes the long way round
+    if len(jira_date) != 28 or any(jira_date[i] != c for i, c in SEPARATORS) or jira_date[23] not in '+-':
+        return int(datetime.strptime(jira_date, JIRA_FORMAT).timestamp())
+
+    days = DaysFromCivil(int(jira_date[0:4]), int(jira_date[5:7]), int(jira_date[8:10]))
+    seconds = int(jira_date[11:13]) * 3600 + int(jira_date[14:16]) * 60 + int(jira_date[17:19])
+    offset = int(jira_date[24:26]) * 3600 + int(jira_date[26:28]) * 60
+    return days * 86400 + seconds - (offset if jira_date[23] == '+' else -offset)
+
+
+# Seconds since the epoch (UTC) for a list of Jira date strings, as a NumPy int64 array
+def JiraEpochs(jira_dates):
+    ImportNumpy()
+    if len(jira_dates) == 0:
+        return numpy.zeros(0, dtype=numpy.int64)
+    try:
+        chars = numpy.array(jira_dates, dtype='S28')
+    except UnicodeEncodeError:
+        return numpy.fromiter(map(JiraEpoch, jira_dates), dtype=numpy.int64, count=len(jira_dates))
+    lengths = numpy.char.str_len(chars)
+    chars = chars.view(numpy.uint8).reshape(len(jira_dates), 28)
+    valid = lengths == 28
+    for i, c in SEPARATORS:
+        valid &= chars[:, i] == ord(c)
+    valid &= (chars[:, 23] == ord('+')) | (chars[:, 23] == ord('-'))
+    digits = chars.astype(numpy.int64) - ord('0')
+
+    year = digits[:, 0] * 1000 + digits[:, 1] * 100 + digits[:, 2] * 10 + digits[:, 3]
+    month = digits[:, 5] * 10 + digits[:, 6]
+    day = digits[:, 8] * 10 + digits[:, 9]
+    seconds = (digits[:, 11] * 10 + digits[:, 12]) * 3600 + (digits[:, 14] * 10 + digits[:, 15]) * 60 + digits[:, 17] * 10 + digits[:, 18]
+    offset = (digits[:, 24] * 10 + digits[:, 25]) * 3600 + (digits[:, 26] * 10 + digits[:, 27]) * 60
+    offset = numpy.where(chars[:, 23] == ord('-'), -offset, offset)
+    epochs = DaysFromCivilArray(year, month, day) * 86400 + seconds - offset
+
+    # Fall back to the slow path for anything not in Jira's usual layout
+    if not valid.all():
+        for i in numpy.flatnonzero(~valid):
+            epochs[i] = JiraEpoch(jira_dates[i])
+    return epochs
@@ -0,0 +1,35 @@
+'''
+Created on 18 Oct 2026
+
+Purpose: Plain record types for the parts of a Jira issue the export scripts use,
+         so issues can come from a live search or from the local cache alike.
+'''
+from collections import namedtuple
+from run_metrics import metrics             # History counts
+
+# One status change from an issue's changelog. Dates are Jira date strings
+Transition = namedtuple('Transition', ['created', 'from_status', 'to_status'])
+
+# One issue with its status changes in changelog order.
+# last_change is the date of the final changelog entry (of any field), which
+# StatusFlow uses as the date of the initial status
+IssueRecord = namedtuple('IssueRecord', ['key', 'issue_type', 'created', 'updated', 'last_change', 'transitions'])
+
+
+# Build a record from the raw JSON of an issue fetched with the changelog
+# expanded. histories replaces the embedded changelog where it had to be
+# completed separately
+def IssueToRecord(issue, histories=None):
+    fields = issue['fields']
+    if histories is None:
+        histories = issue['changelog']['histories']
+    metrics.count('histories', len(histories))
+    transitions = []
+    last_change = None
+    for history in histories:
+        for item in history['items']:
+            if item['field'] == 'status':
+                transitions.append(Transition(history['created'], item.get('fromString'), item.get('toString')))
+        last_change = history['created']
+    return IssueRecord(issue['key'], fields['issuetype']['name'], fields['created'], fields.get('updated'),
+                       last_change, transitions)
\ No newline at end of file
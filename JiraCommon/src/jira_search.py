@@ -0,0 +1,270 @@
+'''
+Created on 18 Oct 2026
+
+Purpose: Shared Jira search functions. Walks a project search one page at a time,
+         either serially or by fetching offset ranges on a bounded pool of worker
+         threads, handing the pages back in issue order either way.
+         Searches only ask for the fields the export scripts use, and changelogs
+         that the search cut short are completed from the changelog endpoint.
+         In raw mode the search responses are decoded straight to plain JSON,
+         with orjson if it is installed, skipping the jira library's Resource
+         objects altogether.
+'''
+from collections import deque                       # Pages in flight, in order
+from concurrent.futures import ThreadPoolExecutor   # Worker thread pool
+from contextlib import nullcontext                  # No pool when fetching serially
+from threading import Condition                     # Adaptive concurrency limit
+from jira.exceptions import JIRAError               # Jira HTTP errors
+from jira_records import IssueToRecord              # Plain issue records
+from run_metrics import metrics                     # Phase timings
+
+try:
+    from orjson import loads as json_loads          # Faster JSON decoding
+except ImportError:
+    from json import loads as json_loads
+
+# Fields the export scripts use. Asking for these rather than every field keeps
+# descriptions, comments and custom fields out of the search results
+SEARCH_FIELDS = 'issuetype,created,updated'
+
+# Histories per page from the changelog endpoint. Searches also cut embedded
+# changelogs off at this many histories
+CHANGELOG_PAGE_SIZE = 100
+
+
+class RawPage(list):
+    '''
+    A page of search results as raw issue JSON, with the paging details a jira
+    ResultList carries
+    '''
+    def __init__(self, response):
+        super().__init__(response.get('issues', ()))
+        self.total = response.get('total')
+        self.nextPageToken = response.get('nextPageToken')
+
+
+# Fetch one page of a search. Jira Cloud pages with a next page token, Jira
+# Server/DC pages with startAt. With raw set, the response is decoded to plain
+# JSON rather than built into jira Issue resources
+def SearchPage(auth_jira, search_string, start_at, page_size, fields=SEARCH_FIELDS, raw=False, page_token=None):
+    if not raw:
+        with metrics.phase('search'):
+            if auth_jira._is_cloud:
+                return auth_jira.enhanced_search_issues(search_string, nextPageToken=page_token, maxResults=page_size, fields=fields, expand='changelog')
+            return auth_jira.search_issues(search_string, startAt=start_at, maxResults=page_size, fields=fields, expand='changelog')
+
+    params = {'jql': search_string, 'maxResults': page_size, 'fields': fields, 'expand': 'changelog'}
+    if auth_jira._is_cloud:
+        url = auth_jira._get_url('search/jql')
+        if page_token:
+            params['nextPageToken'] = page_token
+    else:
+        url = auth_jira._get_url('search')
+        params['startAt'] = start_at
+    with metrics.phase('search'):
+        response = auth_jira._session.get(url, params=params)
+    with metrics.phase('decode'):
+        return RawPage(json_loads(response.content))
+
+
+# Generator returning the search results one page at a time, so each page can be
+# written out and released before the next one is requested
+def IssuePages(auth_jira, search_string, page_size=100, start_at=0, fields=SEARCH_FIELDS, raw=False):
+    page_token = None
+    while True:
+        issues = SearchPage(auth_jira, search_string, start_at, page_size, fields, raw, page_token)
+        if len(issues) == 0:
+            return
+
+        # Work out where the next page starts, and whether there is one
+        start_at = start_at + len(issues)
+        page_token = issues.nextPageToken
+        if auth_jira._is_cloud:
+            last_page = not page_token
+        else:
+            last_page = start_at >= issues.total
+
+        yield issues
+        # Release the page before the next one is requested
+        issues = None
+        if last_page:
+            return
+
+
+# Get the number of issues a search matches without fetching them
+def IssueCount(auth_jira, search_string):
+    result = auth_jira.search_issues(search_string, maxResults=1, fields='key', json_result=True)
+    return result['total']
+
+
+# Generator returning the keys of the issues a search matches, in key order.
+# Each page follows on from the last key of the one before rather than from an
+# offset, so issues deleted or created part way through can't shift later
+# pages and leave an issue out
+def SearchKeys(auth_jira, search_string, page_size=1000):
+    last_key = None
+    while True:
+        params = {'jql': search_string + (' AND key > "' + last_key + '"' if last_key else '') + ' ORDER BY key ASC',
+                  'maxResults': page_size, 'fields': 'key'}
+        with metrics.phase('search'):
+            issues = auth_jira._get_json('search/jql' if auth_jira._is_cloud else 'search', params=params).get('issues')
+        if not issues:
+            return
+        for issue in issues:
+            yield issue['key']
+        last_key = issues[-1]['key']
+
+
+# Limit on the number of requests in flight. Halves whenever Jira throttles a
+# request (HTTP 429) and climbs back one request at a time as requests succeed
+class AdaptiveLimit:
+    def __init__(self, maximum):
+        self.maximum = maximum
+        self.limit = maximum
+        self.active = 0
+        self.successes = 0
+        self.condition = Condition()
+
+    def acquire(self):
+        with self.condition:
+            while self.active >= self.limit:
+                self.condition.wait()
+            self.active = self.active + 1
+
+    def release(self):
+        with self.condition:
+            self.active = self.active - 1
+            if self.limit < self.maximum:
+                self.successes = self.successes + 1
+                if self.successes >= self.limit:
+                    self.limit = self.limit + 1
+                    self.successes = 0
+            self.condition.notify_all()
+
+    # Called by the connection's RetryAdapter when a request is throttled
+    def throttled(self):
+        with self.condition:
+            self.limit = max(1, self.limit // 2)
+            self.successes = 0
+
+
+# Fetch a single page of a search from the given offset, holding a place under
+# the limit while it's in flight. Throttled requests are retried by the
+# connection's RetryAdapter, which honours Retry-After in either of its forms
+def FetchPage(auth_jira, search_string, start_at, page_size, limit, fields=SEARCH_FIELDS, raw=False):
+    limit.acquire()
+    try:
+        return SearchPage(auth_jira, search_string, start_at, page_size, fields, raw)
+    finally:
+        limit.release()
+
+
+# Generator returning the search results one page at a time, fetching up to
+# 'workers' pages at once. A count query sizes the search, which is then split
+# into startAt offset ranges. Pages are handed back in issue order, so output
+# is the same as a serial fetch.
+def SearchPages(auth_jira, search_string, page_size=100, workers=1, fields=SEARCH_FIELDS, raw=False, start_at=0):
+    # Jira Cloud only pages searches with next page tokens, so there are no
+    # offsets to split the search on - fetch serially instead
+    if workers <= 1 or auth_jira._is_cloud:
+        yield from IssuePages(auth_jira, search_string, page_size, start_at, fields, raw)
+        return
+
+    total = IssueCount(auth_jira, search_string)
+    limit = AdaptiveLimit(workers)
+
+    # The connection's RetryAdapter retries throttled requests itself, and
+    # tells the limit about them so fewer pages are fetched at once
+    listeners = getattr(auth_jira._session.get_adapter(auth_jira._get_url('search')), 'throttle_listeners', None)
+    if listeners is not None:
+        listeners.append(limit.throttled)
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            for offset in range(start_at, total, page_size):
+                pending.append(executor.submit(FetchPage, auth_jira, search_string, offset, page_size, limit, fields, raw))
+                # Keep a bounded number of pages in flight, handing back the oldest first
+                if len(pending) > workers:
+                    with metrics.phase('search'):
+                        issues = pending.popleft().result()
+                    if issues:
+                        yield issues
+                    issues = None
+            while pending:
+                with metrics.phase('search'):
+                    issues = pending.popleft().result()
+                if issues:
+                    yield issues
+                issues = None
+    finally:
+        if listeners is not None:
+            listeners.remove(limit.throttled)
+
+    # Pick up any issues created since the count was taken
+    yield from IssuePages(auth_jira, search_string, page_size, max(total, start_at), fields, raw)
+
+
+# Fetch one page of an issue's changelog from the given offset, keeping only
+# the status changes. Histories are kept even when they have no status items
+# left, as their dates are still needed. Jira Server has no changelog endpoint,
+# so the whole changelog is fetched with the issue there instead
+def FetchChangelog(auth_jira, key, start_at):
+    try:
+        page = auth_jira._get_json(f'issue/{key}/changelog', params={'startAt': start_at, 'maxResults': CHANGELOG_PAGE_SIZE})
+        histories = page['values']
+    except JIRAError as e:
+        if e.status_code != 404:
+            raise
+        histories = auth_jira._get_json(f'issue/{key}', params={'fields': 'key', 'expand': 'changelog'})['changelog']['histories']
+        histories = histories[start_at:start_at + CHANGELOG_PAGE_SIZE]
+    for history in histories:
+        history['items'] = [item for item in history['items'] if item['field'] == 'status']
+    return histories
+
+
+# Complete the changelogs of a page of raw issues where the search only
+# returned part of the history. Returns the full list of raw histories for
+# each issue that was cut short, keyed by issue key, oldest first.
+# Which part a search returns depends on the deployment: Jira Cloud embeds the
+# most recent histories while still reporting startAt 0, so the embedded part
+# is never relied on and the whole changelog is fetched from the endpoint
+def CompleteChangelogs(auth_jira, issues, executor=None):
+    fetches = []
+    for issue in issues:
+        changelog = issue['changelog']
+        if changelog.get('total', 0) > len(changelog['histories']):
+            fetches.extend((issue['key'], start_at) for start_at in range(0, changelog['total'], CHANGELOG_PAGE_SIZE))
+    if not fetches:
+        return {}
+
+    with metrics.phase('changelogs'):
+        if executor is None:
+            pages = [FetchChangelog(auth_jira, key, start_at) for key, start_at in fetches]
+        else:
+            pages = list(executor.map(lambda fetch: FetchChangelog(auth_jira, *fetch), fetches))
+
+    complete = {}
+    for (key, _), histories in zip(fetches, pages):
+        complete.setdefault(key, []).extend(histories)
+    return complete
+
+
+# Generator returning the search results as IssueRecords, one issue at a time.
+# Truncated changelogs are completed a page of issues at a time, fetching the
+# missing history pages on 'workers' threads. Each page is released once its
+# records have been handed out. With raw set, records are built straight from
+# the decoded search responses. start_at skips that many issues, to pick up an
+# interrupted search where it left off
+def SearchRecords(auth_jira, search_string, page_size=100, workers=1, raw=False, start_at=0):
+    with ThreadPoolExecutor(max_workers=workers) if workers > 1 else nullcontext() as executor:
+        pages = SearchPages(auth_jira, search_string, page_size, workers, raw=raw, start_at=start_at)
+        issues = next(pages, None)
+        while issues:
+            if not raw:
+                issues = [issue.raw for issue in issues]
+            complete = CompleteChangelogs(auth_jira, issues, executor)
+            with metrics.phase('records'):
+                records = [IssueToRecord(issue, complete.get(issue['key'])) for issue in issues]
+            yield from records
+            del issues, complete, records
+            issues = next(pages, None)
@@ -0,0 +1,243 @@
+'''
+Created on 18 Oct 2026
+
+Purpose: Output stages for IssueRecords. Each stage writes one report, and a
+         single pass over the records feeds every stage in turn, so several
+         reports can be produced from one Jira download. A new report is a new
+         stage: a class with start, add and finish methods.
+
+         The tabular reports are CSV files, or Excel workbooks if the file name
+         ends in .xlsx.
+'''
+import csv                                  # CSV output
+from transition_table import TransitionTable # Status changes for analysis
+from run_metrics import metrics             # Phase timings and counts
+from xlsx_writer import XlsxWriter          # Excel output
+from jira_components import FetchComponents, WriteComponents # Components and their issue counts
+
+# Number of dates the date-writing stages queue before converting them in one go
+BATCH_DATES = 50000
+
+
+class CsvTable:
+    '''
+    CSV file written a row at a time, quoted as needed, with the same
+    writerow and close methods as an XlsxWriter
+    '''
+    def __init__(self, file_name):
+        self.output_file = open(file_name, 'w', newline='')
+        self.writerow = csv.writer(self.output_file).writerow
+
+    def close(self):
+        self.output_file.close()
+
+
+# Open a table for writing: an Excel workbook if the file name ends in .xlsx,
+# with the values in date_columns written as Excel dates, otherwise a CSV file
+def OpenTable(file_name, sheet_name, date_columns=()):
+    if file_name.lower().endswith('.xlsx'):
+        return XlsxWriter(file_name, sheet_name, date_columns)
+    return CsvTable(file_name)
+
+
+# Feed every record to every stage in a single pass, then finish the stages.
+# Returns the number of records processed. Getting the records is timed as
+# 'read', less any time the record source times itself
+def RunStages(records, stages):
+    records = iter(records)
+    read = metrics.phase('read')
+    write = metrics.phase('write')
+    for stage in stages:
+        stage.start()
+    count = 0
+    while True:
+        with read:
+            record = next(records, None)
+        if record is None:
+            break
+        with write:
+            for stage in stages:
+                stage.add(record)
+        metrics.count('issues')
+        count = count + 1
+    with metrics.phase('finish'):
+        for stage in stages:
+            stage.finish()
+    return count
+
+
+class StatusChangesStage:
+    '''
+    Long-form table with a row per status change, plus a row for the status
+    each issue was created in, as written by ExportJiraStatus. Records are
+    queued and their dates converted a batch at a time with convert_dates,
+    which takes a list of Jira dates
+    '''
+    def __init__(self, file_name, convert_dates):
+        self.file_name = file_name
+        self.convert_dates = convert_dates
+        self.from_string = None
+        self.pending = []
+        self.pending_dates = 0
+
+    def start(self):
+        self.output = OpenTable(self.file_name, 'Status Changes', date_columns=(2,))
+        # Heading for tabular file output
+        self.output.writerow(('Issue', 'Issue Type', 'Date', 'From', 'To'))
+
+    def add(self, record):
+        self.pending.append(record)
+        self.pending_dates = self.pending_dates + len(record.transitions) + 1
+        if self.pending_dates >= BATCH_DATES:
+            self.flush()
+
+    # Convert the dates of the queued records in one go and write their rows
+    def flush(self):
+        dates = []
+        for record in self.pending:
+            dates.extend(transition.created for transition in record.transitions)
+            dates.append(record.created)
+        # Convert Jira date format to Excel-compatible
+        converted_dates = iter(self.convert_dates(dates))
+        writerow = self.output.writerow
+        for record in self.pending:
+            for transition in record.transitions:
+                self.from_string = transition.from_status
+                writerow((record.key, record.issue_type, next(converted_dates), transition.from_status, transition.to_status))
+            # The created row takes the from status of the issue's last change,
+            # or of the last issue that had one
+            writerow((record.key, record.issue_type, next(converted_dates), 'None', str(self.from_string)))
+        metrics.count('rows_written', len(dates))
+        self.pending = []
+        self.pending_dates = 0
+
+    def finish(self):
+        self.flush()
+        self.output.close()
+
+
+class StatusDatesStage:
+    '''
+    Wide table with a row per issue and a column per status, holding the date
+    the issue last entered that status, as written by StatusFlow. Rows are
+    queued and their dates converted a batch at a time with convert_dates,
+    which takes a list of Jira dates
+    '''
+    def __init__(self, file_name, statuses, convert_dates):
+        self.file_name = file_name
+        self.statuses = statuses
+        self.convert_dates = convert_dates
+        self.last_change = None
+        self.pending = []
+        self.pending_dates = 0
+
+    def start(self):
+        self.output = OpenTable(self.file_name, 'Status Dates', date_columns=range(1, len(self.statuses) + 1))
+        # Heading for tabular file output
+        self.output.writerow(['Issue ID'] + self.statuses)
+
+    def add(self, record):
+        status_dict = dict.fromkeys(self.statuses, '')
+        for transition in record.transitions:
+            if transition.to_status in status_dict:
+                status_dict[transition.to_status] = transition.created
+        # Set the initial (created) status from the last history item date,
+        # or that of the last issue that had one. It's left empty until an
+        # issue has had a change
+        if record.last_change:
+            self.last_change = record.last_change
+        status_dict[self.statuses[0]] = self.last_change or ''
+        self.pending.append([record.key, *status_dict.values()])
+        self.pending_dates = self.pending_dates + len(self.statuses)
+        if self.pending_dates >= BATCH_DATES:
+            self.flush()
+
+    # Convert the dates of the queued rows in one go and write the rows
+    def flush(self):
+        dates = [date for row in self.pending for date in row[1:] if date]
+        # Convert Jira date format to Excel-compatible
+        converted_dates = iter(self.convert_dates(dates))
+        writerow = self.output.writerow
+        for row in self.pending:
+            writerow([row[0]] + [next(converted_dates) if date else '' for date in row[1:]])
+        metrics.count('rows_written', len(self.pending))
+        self.pending = []
+        self.pending_dates = 0
+
+    def finish(self):
+        self.flush()
+        self.output.close()
+
+
+class FlowMetricsStage:
+    '''
+    Flow metrics CSVs (time in status, lead and cycle times, throughput and
+    cumulative flow) named from output_prefix. Needs NumPy
+    '''
+    def __init__(self, output_prefix, statuses, cycle_start, as_of):
+        from flow_metrics import WriteFlowMetrics
+        self.write_flow_metrics = WriteFlowMetrics
+        self.output_prefix = output_prefix
+        self.statuses = statuses
+        self.cycle_start = cycle_start
+        self.as_of = as_of
+        self.table = TransitionTable(statuses)
+
+    def start(self):
+        pass
+
+    def add(self, record):
+        self.table.add(record, self.statuses[0])
+
+    def finish(self):
+        self.table.flush()
+        self.write_flow_metrics(self.table, self.statuses, self.cycle_start, self.output_prefix, self.as_of)
+
+
+class StatusIndexStage:
+    '''
+    Status index file for StatusAsOf: the status changes saved as a
+    TransitionTable
+    '''
+    def __init__(self, file_name, statuses):
+        self.file_name = file_name
+        self.statuses = statuses
+        self.table = TransitionTable(statuses)
+
+    def start(self):
+        pass
+
+    def add(self, record):
+        self.table.add(record, self.statuses[0])
+
+    def finish(self):
+        self.table.save(self.file_name)
+
+
+class ComponentsStage:
+    '''
+    The project's components with their issue counts, as written by
+    GetJiraComponents. Components come from the project rather than its
+    issues, so this fetches them itself at the end, through cache (a
+    ResponseCache)
+    '''
+    def __init__(self, file_name, auth_jira, project_id, cache, fetch_workers=1, issue_counts=True):
+        self.file_name = file_name
+        self.auth_jira = auth_jira
+        self.project_id = project_id
+        self.cache = cache
+        self.fetch_workers = fetch_workers
+        self.issue_counts = issue_counts
+
+    def start(self):
+        pass
+
+    def add(self, record):
+        pass
+
+    def finish(self):
+        components, counts = FetchComponents(self.cache, self.auth_jira, [self.project_id], self.fetch_workers, self.issue_counts)
+        if len(components) == 0:
+            print(f'No components in project {self.project_id}')
+            return
+        WriteComponents(self.file_name, components, counts)
@@ -0,0 +1,70 @@
+'''
+Created on 18 Oct 2026
+
+Purpose: File cache of Jira REST responses for data that rarely changes, such as
+         projects and their components. A response younger than the cache's
+         time to live is used without asking Jira at all. An older one is
+         revalidated with its ETag, if Jira sent one, so an unchanged response
+         costs a 304 rather than the whole body.
+'''
+import json                                 # Cache file
+from os import replace                      # Saving the cache file safely
+from os.path import exists
+from threading import Lock                  # Shared by worker threads
+from time import time                       # Response ages
+from urllib.parse import urlencode
+from run_metrics import metrics             # Cache hit counts
+
+
+class ResponseCache:
+    '''
+    Cached JSON responses, keyed by request path and parameters, kept in
+    cache_file between runs. ttl is in seconds; 0 always asks Jira, though
+    unchanged responses can still be revalidated by ETag. With no cache_file
+    nothing is kept between runs
+    '''
+    def __init__(self, cache_file=None, ttl=0):
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.lock = Lock()
+        self.changed = False
+        self.entries = {}
+        if cache_file and exists(cache_file):
+            try:
+                with open(cache_file) as f:
+                    self.entries = json.load(f)
+            except ValueError:
+                # A damaged cache is only a slower run
+                self.entries = {}
+
+    # Get the JSON response for a Jira REST path, from the cache if it is fresh
+    def get_json(self, auth_jira, path, params=None):
+        key = path + ('?' + urlencode(sorted(params.items())) if params else '')
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry is not None and time() - entry['time'] < self.ttl:
+            metrics.count('cache_hits')
+            return entry['body']
+
+        headers = {'If-None-Match': entry['etag']} if entry is not None and entry.get('etag') else {}
+        response = auth_jira._session.get(auth_jira._get_url(path), params=params, headers=headers)
+        if response.status_code == 304 and entry is not None:
+            metrics.count('cache_revalidated')
+            body = entry['body']
+        else:
+            body = json.loads(response.content)
+        with self.lock:
+            self.entries[key] = {'time': time(), 'etag': response.headers.get('ETag'), 'body': body}
+            self.changed = True
+        return body
+
+    # Write the cache file, if anything has changed. The file is written
+    # alongside and then swapped in, so an interrupted save can't damage it
+    def save(self):
+        if not self.cache_file or not self.changed:
+            return
+        with self.lock:
+            with open(self.cache_file + '.tmp', 'w') as f:
+                json.dump(self.entries, f)
+            replace(self.cache_file + '.tmp', self.cache_file)
+            self.changed = False
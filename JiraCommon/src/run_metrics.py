@@ -0,0 +1,253 @@
+'''
+Created on 18 Oct 2026
+
+Purpose: Run metrics for the scripts: how long each phase of a run took, counts
+         of HTTP requests, bytes received, issues, histories and rows written,
+         throughput and peak memory, written to a JSON file at the end of the
+         run. Optionally shows a live progress line, and profiles the run with
+         cProfile.
+
+         There is one RunMetrics, 'metrics', shared by every module. It does
+         nothing until a script starts it, so the shared modules can time and
+         count as they go without the scripts having to pass it around.
+
+         Phases are timed on the main thread only, and are exclusive: time in
+         a phase entered from inside another counts towards the inner phase
+         alone, so the phase times add up to the run time. Worker threads
+         still count, but their time shows up as the main thread waiting.
+'''
+import json                                 # Metrics file
+import sys                                  # Progress line, platform
+from contextlib import nullcontext          # Phases when not started
+from datetime import datetime               # Start time
+from threading import Event, Lock, Thread, main_thread, current_thread
+from time import perf_counter               # Phase timers
+
+# Seconds between updates of the progress line
+PROGRESS_INTERVAL = 1.0
+
+# Phase for any time not spent in a named phase
+OTHER_PHASE = 'other'
+
+NOT_STARTED = nullcontext()
+
+
+# Get the peak memory (RSS) of this process so far in MB, or None if it can't
+# be found on this platform
+def PeakMemory():
+    try:
+        import resource
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1 << 20 if sys.platform == 'darwin' else 1 << 10)
+    except ImportError:
+        pass
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                        ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                        ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                        ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                        ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return counters.PeakWorkingSetSize / (1 << 20)
+    except (ImportError, AttributeError, OSError):
+        pass
+    return None
+
+
+class Phase:
+    '''
+    Context manager timing one named phase on the main thread
+    '''
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        if current_thread() is self.metrics.main:
+            self.metrics.enter(self.name)
+
+    def __exit__(self, *exc_info):
+        if current_thread() is self.metrics.main:
+            self.metrics.leave()
+
+
+class RunMetrics:
+    '''
+    Phase timers and counters for one run of a script
+    '''
+    def __init__(self):
+        self.started = False
+        self.main = main_thread()
+        self.lock = Lock()
+
+    # Start recording. metrics_file is written when the run finishes;
+    # progress shows a progress line on standard error; profile_file, if set,
+    # gets a cProfile profile of the main thread (a text report if it ends
+    # in .txt, otherwise pstats data)
+    def start(self, tool, metrics_file=None, progress=False, profile_file=None):
+        self.tool = tool
+        self.metrics_file = metrics_file
+        self.profile_file = profile_file
+        self.start_time = datetime.now()
+        self.counters = {}
+        self.phases = {}
+        self.phase_objects = {}
+        self.stack = []
+        self.started = True
+        self.mark = self.begin = perf_counter()
+
+        self.profiler = None
+        if profile_file:
+            import cProfile
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+        self.stop_progress = Event()
+        self.progress_shown = 0
+        self.progress_thread = None
+        if progress:
+            self.progress_thread = Thread(target=self.show_progress, daemon=True)
+            self.progress_thread.start()
+
+    # Get the context manager timing the named phase
+    def phase(self, name):
+        if not self.started:
+            return NOT_STARTED
+        phase = self.phase_objects.get(name)
+        if phase is None:
+            phase = self.phase_objects[name] = Phase(self, name)
+        return phase
+
+    # Charge the time since the last change of phase to the current phase
+    def charge(self, now):
+        name = self.stack[-1] if self.stack else OTHER_PHASE
+        self.phases[name] = self.phases.get(name, 0) + now - self.mark
+        self.mark = now
+
+    def enter(self, name):
+        self.charge(perf_counter())
+        self.stack.append(name)
+
+    def leave(self):
+        self.charge(perf_counter())
+        self.stack.pop()
+
+    # Wrap a function so calls to it are timed as the named phase, and
+    # counted against 'counter' if given. Returns the function itself if
+    # metrics aren't being recorded, so there is no cost then
+    def timed(self, name, function, counter=None):
+        if not self.started:
+            return function
+        phase = self.phase(name)
+        count = self.count
+
+        def timed_function(*args, **kwargs):
+            with phase:
+                if counter:
+                    count(counter)
+                return function(*args, **kwargs)
+        return timed_function
+
+    # Add to a counter. Safe to call from any thread
+    def count(self, name, amount=1):
+        if self.started:
+            with self.lock:
+                self.counters[name] = self.counters.get(name, 0) + amount
+
+    # Show a progress line on standard error until the run finishes
+    def show_progress(self):
+        while not self.stop_progress.wait(PROGRESS_INTERVAL):
+            line = self.progress_line()
+            sys.stderr.write('\r' + line.ljust(self.progress_shown))
+            sys.stderr.flush()
+            self.progress_shown = max(self.progress_shown, len(line))
+
+    def progress_line(self):
+        seconds = perf_counter() - self.begin
+        with self.lock:
+            counters = dict(self.counters)
+        issues = counters.get('issues', 0)
+        line = f'{seconds:.0f}s  {issues} issues ({issues / seconds:.0f}/s)'
+        if counters.get('http_requests'):
+            line = line + f'  {counters["http_requests"]} requests  {counters.get("bytes_received", 0) / (1 << 20):.1f} MB received'
+        if counters.get('rows_written'):
+            line = line + f'  {counters["rows_written"]} rows written'
+        return line
+
+    # Get the metrics for the run so far
+    def report(self):
+        seconds = perf_counter() - self.begin
+        with self.lock:
+            counters = dict(self.counters)
+        peak_memory = PeakMemory()
+        return {'tool': self.tool,
+                'started': self.start_time.isoformat(timespec='seconds'),
+                'seconds': round(seconds, 3),
+                'phases': {name: round(time, 3) for name, time in sorted(self.phases.items(), key=lambda phase: -phase[1])},
+                'counters': counters,
+                'throughput': {f'{name}_per_second': round(value / seconds, 1) for name, value in counters.items()
+                               if name in ('issues', 'histories', 'rows_written', 'bytes_received') and seconds > 0},
+                'peak_memory_mb': round(peak_memory, 1) if peak_memory is not None else None}
+
+    # Finish the run: stop the progress line and profiler, and write the
+    # metrics and profile files. Returns the metrics
+    def finish(self):
+        if not self.started:
+            return None
+        # Charge the time to now to the phases still running
+        self.charge(perf_counter())
+
+        if self.progress_thread is not None:
+            self.stop_progress.set()
+            self.progress_thread.join()
+            if self.progress_shown:
+                sys.stderr.write('\r' + ' ' * self.progress_shown + '\r')
+                sys.stderr.flush()
+
+        if self.profiler is not None:
+            self.profiler.disable()
+            if self.profile_file.endswith('.txt'):
+                import pstats
+                with open(self.profile_file, 'w') as f:
+                    pstats.Stats(self.profiler, stream=f).sort_stats('tottime').print_stats(50)
+            else:
+                self.profiler.dump_stats(self.profile_file)
+
+        report = self.report()
+        if self.metrics_file:
+            with open(self.metrics_file, 'w') as f:
+                json.dump(report, f, indent=2)
+        self.started = False
+        return report
+
+
+# The metrics for this run, shared by every module
+metrics = RunMetrics()
+
+
+# Pull the metrics options out of a command line, for scripts that don't have
+# a config file: --metrics=<file>, --progress and --profile=<file>. Returns
+# the rest of the command line and the metrics file, progress flag and profile file
+def MetricsArguments(argv):
+    rest = []
+    metrics_file = None
+    progress = False
+    profile_file = None
+    for arg in argv:
+        if arg.startswith('--metrics='):
+            metrics_file = arg[len('--metrics='):]
+        elif arg == '--progress':
+            progress = True
+        elif arg.startswith('--profile='):
+            profile_file = arg[len('--profile='):]
+        else:
+            rest.append(arg)
+    return rest, metrics_file, progress, profile_file
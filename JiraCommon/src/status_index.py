@@ -0,0 +1,78 @@
+'''
+Created on 18 Oct 2026
+
+Purpose: Point-in-time index of issue statuses, answering "what status was every
+         issue in at time T" without going back to Jira. Each issue's status
+         history is held as a time-sorted run of rows in one array, and a query
+         is a bisection into each issue's run, all issues at once with NumPy.
+'''
+import numpy                                # Array storage and searching
+from transition_table import TransitionTable # Saved status histories
+
+# Bits given to the time part of the combined issue/time search key. 2**34
+# seconds is over 500 years, so any Jira history fits
+TIME_BITS = 34
+NO_STATUS = -1
+
+
+class StatusIndex:
+    '''
+    Built from a TransitionTable, or loaded from a file a table was saved to.
+    Statuses come back as codes into status_names, or NO_STATUS for issues
+    that didn't exist yet at the time asked about.
+    '''
+    def __init__(self, keys, type_names, issue_types, status_names, issue, time, status):
+        self.keys = list(keys)
+        self.type_names = list(type_names)
+        self.issue_types = numpy.asarray(issue_types, dtype=numpy.int16)
+        self.status_names = list(status_names)
+        issue = numpy.asarray(issue, dtype=numpy.int32)
+        time = numpy.asarray(time, dtype=numpy.int64)
+
+        # Group the rows by issue and time-order them within each issue. A
+        # TransitionTable already has them that way unless a change is dated
+        # before the issue was created; the sort is stable, so rows at the
+        # same time keep their order
+        order = numpy.lexsort((time, issue))
+        self.issue = issue[order]
+        self.time = time[order]
+        self.status = numpy.asarray(status, dtype=numpy.int16)[order]
+
+        # With the rows sorted, a key of issue number then time is sorted across
+        # the whole array. Each issue's run of rows starts at starts[issue]
+        self.base = int(self.time.min()) if len(self.time) else 0
+        self.search_keys = (self.issue.astype(numpy.int64) << TIME_BITS) | (self.time - self.base)
+        self.starts = numpy.searchsorted(self.issue, numpy.arange(len(self.keys)))
+
+    # Build an index from a TransitionTable
+    @classmethod
+    def from_table(cls, table):
+        issue, time, status = table.columns()
+        return cls(table.keys, table.type_names, table.issue_types, table.status_names,
+                   issue.copy(), time.copy(), status.copy())
+
+    # Get the status code of every issue at each of the given times (seconds
+    # since the epoch), as an issues x times matrix
+    def snapshots(self, times):
+        times = numpy.asarray(times, dtype=numpy.int64)
+        offsets = numpy.clip(times - self.base, -1, (1 << TIME_BITS) - 1)
+        issues = numpy.arange(len(self.keys), dtype=numpy.int64)[:, None]
+
+        # Find the last row at or before each time within each issue's run. If
+        # that lands before the run starts, the issue hadn't been created yet
+        rows = numpy.searchsorted(self.search_keys, (issues << TIME_BITS) | numpy.maximum(offsets, 0)[None, :], side='right') - 1
+        found = (rows >= self.starts[:, None]) & (offsets[None, :] >= 0)
+        return numpy.where(found, self.status[numpy.maximum(rows, 0)], NO_STATUS)
+
+    # Get the status code of every issue at a time (seconds since the epoch)
+    def status_at(self, when):
+        return self.snapshots([when])[:, 0]
+
+    # Get the name of a status code, or '' for NO_STATUS
+    def status_name(self, code):
+        return self.status_names[code] if code != NO_STATUS else ''
+
+    # Load an index from a TransitionTable file
+    @classmethod
+    def load(cls, filename):
+        return cls.from_table(TransitionTable.load(filename))
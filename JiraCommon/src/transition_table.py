@@ -0,0 +1,170 @@
+'''
+Created on 18 Oct 2026
+
+Purpose: Columnar table of issue status changes for bulk analysis. Statuses and
+         issue types are interned to small integer codes and times are held as
+         seconds since the epoch, one array per column, so whole projects can be
+         processed with NumPy rather than issue by issue. A table saves to and
+         loads from a single binary file: a short JSON header holding the names,
+         followed by the raw bytes of each column. Records are added in
+         batches, so their dates are converted a whole batch at a time.
+'''
+import json                                 # File header
+from array import array                     # Compact typed columns
+from sys import byteorder                   # Byte order of saved columns
+from jira_dates import JiraEpoch, JiraEpochs, ImportNumpy # Jira dates to epoch seconds
+
+FILE_MAGIC = b'JTT1'
+
+# Dates held back before a batch of records is added to the columns
+BATCH_DATES = 50000
+
+
+class TransitionTable:
+    '''
+    One row per status an issue entered, grouped by issue and in time order
+    within each issue. The first row of each issue is the status it was created
+    in, at its created time. Per-issue columns hold each issue's key, type code,
+    created time and the index of its first row. Added records are held back
+    until there are enough of them to convert their dates in one go; call
+    flush() before reading the columns other than through columns(),
+    issue_rows() or save()
+    '''
+    def __init__(self, statuses=()):
+        # Interned names, indexed by code
+        self.status_names = []
+        self.status_codes = {}
+        self.type_names = []
+        self.type_codes = {}
+
+        # Per-issue columns
+        self.keys = []
+        self.issue_types = array('h')
+        self.created = array('q')
+        self.starts = array('i')
+
+        # Per-row columns
+        self.issue = array('i')
+        self.time = array('q')
+        self.status = array('h')
+
+        # Records waiting to be added, and the number of dates they hold
+        self.pending = []
+        self.pending_dates = 0
+
+        # Intern the known statuses first, so their codes follow the given order
+        for status in statuses:
+            self.status_code(status)
+
+    # Get the code for a status name, interning it if it's new
+    def status_code(self, status):
+        code = self.status_codes.get(status)
+        if code is None:
+            code = self.status_codes[status] = len(self.status_names)
+            self.status_names.append(status)
+        return code
+
+    # Get the code for an issue type name, interning it if it's new
+    def type_code(self, issue_type):
+        code = self.type_codes.get(issue_type)
+        if code is None:
+            code = self.type_codes[issue_type] = len(self.type_names)
+            self.type_names.append(issue_type)
+        return code
+
+    # Add an IssueRecord. Its transitions are put in time order, and the status
+    # it was created in is taken from the first of them, or initial_status if
+    # the issue has never changed status
+    def add(self, record, initial_status):
+        self.pending.append((record, initial_status))
+        self.pending_dates = self.pending_dates + 1 + len(record.transitions)
+        if self.pending_dates >= BATCH_DATES:
+            self.flush()
+
+    # Add the records held back, converting all their dates at once, with
+    # NumPy if it's installed
+    def flush(self):
+        if not self.pending:
+            return
+        dates = []
+        for record, _ in self.pending:
+            dates.append(record.created)
+            dates.extend(t.created for t in record.transitions)
+        epochs = JiraEpochs(dates).tolist() if ImportNumpy() is not None else [JiraEpoch(date) for date in dates]
+
+        position = 0
+        for record, initial_status in self.pending:
+            index = len(self.keys)
+            created = epochs[position]
+            times = epochs[position + 1:position + 1 + len(record.transitions)]
+            position = position + 1 + len(record.transitions)
+            self.keys.append(record.key)
+            self.issue_types.append(self.type_code(record.issue_type))
+            self.created.append(created)
+            self.starts.append(len(self.issue))
+
+            transitions = sorted(((time, t.from_status, t.to_status) for time, t in zip(times, record.transitions)), key=lambda t: t[0])
+            if transitions:
+                initial_status = transitions[0][1]
+            self.issue.append(index)
+            self.time.append(created)
+            self.status.append(self.status_code(initial_status))
+            for time, from_status, to_status in transitions:
+                self.issue.append(index)
+                self.time.append(time)
+                self.status.append(self.status_code(to_status))
+        self.pending = []
+        self.pending_dates = 0
+
+    # Get the times and status codes of one issue's rows. These are slices of
+    # memoryviews onto the table's own storage rather than copies, so they
+    # mustn't be kept while more issues are being added either
+    def issue_rows(self, index):
+        self.flush()
+        start = self.starts[index]
+        end = self.starts[index + 1] if index + 1 < len(self.starts) else len(self.issue)
+        return memoryview(self.time)[start:end], memoryview(self.status)[start:end]
+
+    # Per-row and per-issue columns, in the order they are saved
+    def _columns(self):
+        return (self.issue_types, self.created, self.starts, self.issue, self.time, self.status)
+
+    # Save the table to a single binary file
+    def save(self, filename):
+        self.flush()
+        header = json.dumps({'byteorder': byteorder, 'issues': len(self.keys), 'rows': len(self.issue),
+                             'status_names': self.status_names, 'type_names': self.type_names,
+                             'keys': self.keys}).encode('utf-8')
+        with open(filename, 'wb') as f:
+            f.write(FILE_MAGIC)
+            f.write(len(header).to_bytes(8, 'little'))
+            f.write(header)
+            for column in self._columns():
+                column.tofile(f)
+
+    # Load a table saved with save
+    @classmethod
+    def load(cls, filename):
+        with open(filename, 'rb') as f:
+            if f.read(len(FILE_MAGIC)) != FILE_MAGIC:
+                raise ValueError(f'{filename} is not a transition table file')
+            header = json.loads(f.read(int.from_bytes(f.read(8), 'little')).decode('utf-8'))
+
+            table = cls(header['status_names'])
+            for type_name in header['type_names']:
+                table.type_code(type_name)
+            table.keys = header['keys']
+            for column, count in zip(table._columns(), (header['issues'],) * 3 + (header['rows'],) * 3):
+                column.fromfile(f, count)
+                if header['byteorder'] != byteorder:
+                    column.byteswap()
+        return table
+
+    # Get the columns as NumPy arrays. These are views onto the table's own
+    # storage, so they mustn't be kept while more issues are being added
+    def columns(self):
+        import numpy                        # Loaded here, as only analysis needs it
+        self.flush()
+        return (numpy.frombuffer(self.issue, dtype=numpy.int32),
+                numpy.frombuffer(self.time, dtype=numpy.int64),
+                numpy.frombuffer(self.status, dtype=numpy.int16))
@@ -0,0 +1,274 @@
+'''
+Created on 18 Oct 2026
+
+Purpose: Writes Excel workbooks (.xlsx) a row at a time, so an export opens in
+         Excel without it having to parse CSV text, and dates arrive as real
+         Excel dates rather than text. Rows are streamed straight into the
+         compressed worksheet, so memory use doesn't grow with the number of
+         rows. Only the standard library is used.
+
+         A workbook is a zip file of XML parts. Strings are written inline in
+         the cells rather than in a shared string table, which would have to be
+         held in memory until the end. A sheet holds at most 1,048,576 rows, so
+         longer outputs carry on in further sheets, each starting with the
+         heading row again.
+'''
+import re
+from datetime import date                   # Dates to Excel serial numbers
+from math import isfinite                   # Numbers Excel can hold
+from zipfile import ZipFile, ZIP_DEFLATED
+
+# Excel's limits on rows per sheet and characters per cell
+MAX_ROWS = 1048576
+MAX_CELL_CHARS = 32767
+
+# Start a new sheet before a sheet's XML gets this big, so no part of the zip
+# file needs the ZIP64 extensions, which not every reader copes with
+MAX_SHEET_BYTES = 1 << 30
+
+# Rows held before being passed to the compressor
+BUFFER_ROWS = 500
+
+# Text cells are kept for reuse if the text is no longer than this, up to this
+# many of them. Statuses, issue types and the like repeat on almost every row
+CACHE_TEXT_CHARS = 100
+CACHE_TEXT_CELLS = 10000
+
+# Excel's day 0 is 1899-12-30 (allowing for its 1900 leap year bug)
+EXCEL_EPOCH = date(1899, 12, 30).toordinal()
+
+# Characters XML 1.0 doesn't allow at all, even escaped
+ILLEGAL_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+PACKAGE_REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+
+# Cell styles: 0 is the default, 1 shows a date and time as dd/mm/yyyy hh:mm:ss
+STYLES = (XML_HEADER +
+          f'<styleSheet xmlns="{MAIN_NS}">'
+          '<numFmts count="1"><numFmt numFmtId="164" formatCode="dd/mm/yyyy hh:mm:ss"/></numFmts>'
+          '<fonts count="1"><font><sz val="11"/><name val="Calibri"/><family val="2"/></font></fonts>'
+          '<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>'
+          '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+          '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+          '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+          '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>'
+          '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+          '</styleSheet>')
+
+# Width of date columns, so the dates show rather than ####
+DATE_COLUMN_WIDTH = 19
+
+
+# Get the Excel column name for a column index from 0, e.g. 0 is A, 27 is AB
+def ColumnName(index):
+    name = ''
+    index = index + 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        name = chr(ord('A') + remainder) + name
+    return name
+
+
+# Get the Excel serial number for a date and a time of day in seconds
+def ExcelSerial(year, month, day, seconds=0):
+    return date(year, month, day).toordinal() - EXCEL_EPOCH + seconds / 86400
+
+
+# Get the Excel serial number for a datetime
+def DatetimeSerial(value):
+    return ExcelSerial(value.year, value.month, value.day, value.hour * 3600 + value.minute * 60 + value.second)
+
+
+# Get the Excel serial number for a date in the 'dd/mm/yyyy hh:mm:ss' layout
+# DateConverter produces, or None if it isn't in that layout
+def ExcelDateSerial(excel_date):
+    if len(excel_date) != 19 or excel_date[2] != '/' or excel_date[5] != '/' or excel_date[13] != ':':
+        return None
+    try:
+        return ExcelSerial(int(excel_date[6:10]), int(excel_date[3:5]), int(excel_date[0:2]),
+                           int(excel_date[11:13]) * 3600 + int(excel_date[14:16]) * 60 + int(excel_date[17:19]))
+    except ValueError:
+        return None
+
+
+# Escape a string for use as XML text
+def XmlText(value):
+    if len(value) > MAX_CELL_CHARS:
+        value = value[:MAX_CELL_CHARS]
+    value = value.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+    if ILLEGAL_XML.search(value):
+        value = ILLEGAL_XML.sub('', value)
+    return value
+
+
+# Get the end of a cell holding a string, from after its reference
+def TextCell(value):
+    # Leading and trailing spaces are only kept if marked to be
+    space = ' xml:space="preserve"' if value[0].isspace() or value[-1].isspace() else ''
+    return f'" t="inlineStr"><is><t{space}>{XmlText(value)}</t></is></c>'
+
+
+class XlsxWriter:
+    '''
+    Streams rows into a new workbook, in the manner of csv.writer. The first
+    row is the heading, and is repeated at the top of any further sheets.
+    Values in date_columns (column indexes) are turned into Excel dates by
+    parse_date, which returns an Excel serial number, or None to leave the
+    value as text. Values in number_columns are written as numbers where they
+    are numbers. Call close() to finish the workbook
+    '''
+    def __init__(self, file_name, sheet_name='Sheet1', date_columns=(), number_columns=(), parse_date=ExcelDateSerial):
+        self.zip_file = ZipFile(file_name, 'w', compression=ZIP_DEFLATED, compresslevel=1)
+        self.sheet_name = sheet_name[:25]
+        self.date_columns = frozenset(date_columns)
+        self.number_columns = frozenset(number_columns)
+        self.parse_date = parse_date
+        self.column_names = []
+        self.text_cells = {}
+        self.heading = None
+        self.sheets = 0
+        self.stream = None
+        self.start_sheet()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # Start the next worksheet, with the heading row if there is one yet
+    def start_sheet(self):
+        if self.stream is not None:
+            self.end_sheet()
+        self.sheets = self.sheets + 1
+        self.stream = self.zip_file.open(f'xl/worksheets/sheet{self.sheets}.xml', 'w')
+        self.sheet_bytes = 0
+        self.rows = 0
+        self.buffer = []
+
+        # Freeze the heading row, and widen the date columns
+        parts = [XML_HEADER, f'<worksheet xmlns="{MAIN_NS}" xmlns:r="{REL_NS}">',
+                 '<sheetViews><sheetView workbookViewId="0">'
+                 '<pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" state="frozen"/>'
+                 '</sheetView></sheetViews>']
+        if self.date_columns:
+            parts.append('<cols>')
+            parts.extend(f'<col min="{index + 1}" max="{index + 1}" width="{DATE_COLUMN_WIDTH}" customWidth="1"/>'
+                         for index in sorted(self.date_columns))
+            parts.append('</cols>')
+        parts.append('<sheetData>')
+        self.write(''.join(parts))
+        if self.heading is not None:
+            self.add_row(self.heading, False)
+
+    # Finish the current worksheet
+    def end_sheet(self):
+        self.flush()
+        self.write('</sheetData></worksheet>')
+        self.stream.close()
+
+    def write(self, text):
+        data = text.encode('utf-8')
+        self.stream.write(data)
+        self.sheet_bytes = self.sheet_bytes + len(data)
+
+    def flush(self):
+        if self.buffer:
+            self.write(''.join(self.buffer))
+            self.buffer = []
+
+    # Write a row of values. None and empty strings leave the cell empty
+    def writerow(self, row):
+        if self.heading is None:
+            self.heading = list(row)
+            self.add_row(self.heading, False)
+            return
+        if self.rows == MAX_ROWS or self.sheet_bytes > MAX_SHEET_BYTES:
+            self.start_sheet()
+        self.add_row(row, True)
+
+    def writerows(self, rows):
+        for row in rows:
+            self.writerow(row)
+
+    def add_row(self, row, convert):
+        self.rows = self.rows + 1
+        number = str(self.rows)
+        column_names = self.column_names
+        while len(column_names) < len(row):
+            column_names.append(ColumnName(len(column_names)))
+        text_cells = self.text_cells
+
+        cells = [f'<row r="{number}">']
+        for index, value in enumerate(row):
+            if value is None or value == '':
+                continue
+            ref = column_names[index] + number
+            if isinstance(value, str):
+                if convert:
+                    if index in self.date_columns:
+                        serial = self.parse_date(value)
+                        if serial is not None:
+                            cells.append(f'<c r="{ref}" s="1"><v>{serial!r}</v></c>')
+                            continue
+                    elif index in self.number_columns:
+                        try:
+                            numeric = float(value)
+                        except ValueError:
+                            numeric = None
+                        # nan and inf parse as floats, but Excel has no number
+                        # for them, so they are written as text
+                        if numeric is not None and isfinite(numeric):
+                            cells.append(f'<c r="{ref}"><v>{numeric!r}</v></c>')
+                            continue
+                cell = text_cells.get(value)
+                if cell is None:
+                    cell = TextCell(value)
+                    if len(value) <= CACHE_TEXT_CHARS and len(text_cells) < CACHE_TEXT_CELLS:
+                        text_cells[value] = cell
+                cells.append(f'<c r="{ref}{cell}')
+            elif isinstance(value, int) and not isinstance(value, bool) or isinstance(value, float) and isfinite(value):
+                cells.append(f'<c r="{ref}"><v>{value!r}</v></c>')
+            else:
+                cells.append(f'<c r="{ref}{TextCell(str(value))}')
+        cells.append('</row>')
+        self.buffer.append(''.join(cells))
+        if len(self.buffer) >= BUFFER_ROWS:
+            self.flush()
+
+    # Finish the last worksheet and write the parts that describe the workbook
+    def close(self):
+        if self.zip_file is None:
+            return
+        self.end_sheet()
+        sheet_numbers = range(1, self.sheets + 1)
+        names = [self.sheet_name if n == 1 else f'{self.sheet_name} {n}' for n in sheet_numbers]
+
+        self.zip_file.writestr('[Content_Types].xml', XML_HEADER +
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+            + ''.join(f'<Override PartName="/xl/worksheets/sheet{n}.xml" '
+                      'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>' for n in sheet_numbers)
+            + '</Types>')
+        self.zip_file.writestr('_rels/.rels', XML_HEADER +
+            f'<Relationships xmlns="{PACKAGE_REL_NS}">'
+            f'<Relationship Id="rId1" Type="{REL_NS}/officeDocument" Target="xl/workbook.xml"/>'
+            '</Relationships>')
+        self.zip_file.writestr('xl/workbook.xml', XML_HEADER +
+            f'<workbook xmlns="{MAIN_NS}" xmlns:r="{REL_NS}"><sheets>'
+            + ''.join(f'<sheet name="{XmlText(name)}" sheetId="{n}" r:id="rId{n}"/>' for n, name in zip(sheet_numbers, names))
+            + '</sheets></workbook>')
+        self.zip_file.writestr('xl/_rels/workbook.xml.rels', XML_HEADER +
+            f'<Relationships xmlns="{PACKAGE_REL_NS}">'
+            + ''.join(f'<Relationship Id="rId{n}" Type="{REL_NS}/worksheet" Target="worksheets/sheet{n}.xml"/>' for n in sheet_numbers)
+            + f'<Relationship Id="rId{self.sheets + 1}" Type="{REL_NS}/styles" Target="styles.xml"/>'
+            '</Relationships>')
+        self.zip_file.writestr('xl/styles.xml', STYLES)
+        self.zip_file.close()
+        self.zip_file = None
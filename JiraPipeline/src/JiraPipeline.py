@@ -0,0 +1,123 @@
+'''
+Created on 18 Oct 2026
+
+Purpose: Produces several reports from one Jira download. The project's issues
+         are fetched once and each issue is passed through every configured
+         output stage in a single pass, rather than each report script running
+         its own full query.
+
+         Stages (the 'stages' config item, comma separated):
+           status_changes - one row per status change (as ExportJiraStatus)
+           status_dates   - one row per issue, a date per status (as StatusFlow)
+           flow_metrics   - flow metrics CSVs (needs NumPy)
+           status_index   - status index file for StatusAsOf
+           components     - the project's components (as GetJiraComponents)
+'''
+
+# Import modules
+from datetime import datetime   # date/time functions
+from time import time           # Current time for flow metrics
+from sys import argv, path      # Command line arguments, module search path
+from os.path import abspath, dirname, join # Locating the shared modules
+
+# Shared modules live in the JiraCommon project alongside this one
+path.append(join(dirname(abspath(__file__)), '..', '..', 'JiraCommon', 'src'))
+from jira_client import ReadConfig, ReadCommonOptions, RequiredOption, Option, OutputFile, ConnectJira # Config and Jira connection
+from jira_search import SearchRecords   # Paged and concurrent Jira searches
+from jira_cache import OpenCache, SyncProject, CachedRecords # Local issue cache
+from jira_dates import DateConverter, ImportNumpy # Jira to Excel date conversion, NumPy if installed
+from response_cache import ResponseCache # Cached component responses
+from run_metrics import metrics         # Run metrics
+from output_stages import RunStages, StatusChangesStage, StatusDatesStage, FlowMetricsStage, StatusIndexStage, ComponentsStage
+
+STAGE_NAMES = ('status_changes', 'status_dates', 'flow_metrics', 'status_index', 'components')
+
+
+def main(argv):
+
+    # Parse the config file to extract token values
+    config = ReadConfig(argv)
+
+    # Get options from config file
+    project_id = RequiredOption(config, 'project_id', 'No project ID provided in config file, exiting.')
+    stage_names = RequiredOption(config, 'stages', 'No output stages provided in config file, exiting.').split(',')
+    stage_names = [name.strip() for name in stage_names if name.strip()]
+    for name in stage_names:
+        if name not in STAGE_NAMES:
+            print(f'Unknown output stage {name}, exiting.')
+            quit()
+    statuses = RequiredOption(config, 'status_list', 'No Status list provided in config file, exiting.').split(', ')
+
+    # Correct dates for UK daylight saving (optional)
+    convert_dst = Option(config, 'convert_dst', '')
+
+    # Fetch, output and run metrics options (optional)
+    options = ReadCommonOptions(config)
+
+    # Count the issues with each component (optional, a request per
+    # component), and a response cache file for the components and counts
+    # with how many seconds a cached response is used for (optional)
+    issue_counts = Option(config, 'issue_counts', True)
+    response_cache_file = Option(config, 'response_cache_file')
+    cache_ttl = Option(config, 'cache_ttl', 3600)
+
+    # Status at which cycle time starts (optional, defaults to the second status)
+    cycle_start_status = Option(config, 'cycle_start_status')
+    if not cycle_start_status:
+        cycle_start_status = statuses[1] if len(statuses) > 1 else statuses[0]
+    elif cycle_start_status not in statuses:
+        print(f'Cycle start status {cycle_start_status} is not in the status list, exiting.')
+        quit()
+
+    print('done.')
+    metrics.start('JiraPipeline', options.metrics_file, options.progress, options.profile_file)
+
+    # Check the flow metrics can be produced
+    if 'flow_metrics' in stage_names:
+        if ImportNumpy() is None:
+            print('NumPy is not installed, flow metrics will not be written.')
+            stage_names.remove('flow_metrics')
+
+    # Convert Jira dates to Excel-compatible a batch at a time, correcting for
+    # DST if required
+    convert_dates = metrics.timed('convert_dates', DateConverter(convert_dst).convert_many)
+
+    # Authenticate with Jira
+    auth_jira = ConnectJira(config, options.fetch_workers)
+
+    # Set up the output stages, with a current date/time suffix on the filenames
+    dt = datetime.now().strftime("%Y-%m-%d_%H%M%S")
+    stages = []
+    for name in stage_names:
+        if name == 'status_changes':
+            stages.append(StatusChangesStage(OutputFile(config, 'Jira Status Export ' + dt + '.' + options.output_format), convert_dates))
+        elif name == 'status_dates':
+            stages.append(StatusDatesStage(OutputFile(config, 'Jira Status Flow ' + dt + '.' + options.output_format), statuses, convert_dates))
+        elif name == 'flow_metrics':
+            stages.append(FlowMetricsStage(OutputFile(config, 'Jira Flow Metrics ' + dt), statuses, cycle_start_status, int(time())))
+        elif name == 'status_index':
+            stages.append(StatusIndexStage(OutputFile(config, 'Jira Status Index ' + dt + '.jtt'), statuses))
+        elif name == 'components':
+            stages.append(ComponentsStage(OutputFile(config, project_id + ' Components Export ' + dt + '.csv'), auth_jira, project_id,
+                                          ResponseCache(response_cache_file, cache_ttl), options.fetch_workers, issue_counts))
+
+    print (f'Extracting issues from project {project_id}...', end='', flush=True)
+    # Get all issues from selected project in issue order, one page at a time
+    if options.cache_file:
+        cache = OpenCache(options.cache_file)
+        fetched = SyncProject(cache, auth_jira, project_id, options.page_size, options.fetch_workers, options.full_resync, options.raw_json)
+        print(f'{fetched} updated...', end='', flush=True)
+        records = CachedRecords(cache, project_id)
+    else:
+        search_string = 'project=' + project_id + ' ORDER BY issue ASC'
+        records = SearchRecords(auth_jira, search_string, options.page_size, options.fetch_workers, options.raw_json)
+
+    # Pass every issue through every stage as it arrives
+    count = RunStages(records, stages)
+    print(f'{count} issues...done.')
+
+    metrics.finish()
+    print('Finished.')
+
+if __name__ == '__main__':
+    main(argv[1:])
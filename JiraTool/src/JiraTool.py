@@ -0,0 +1,270 @@
+'''
+Created on 18 Oct 2026
+
+Purpose: One command line for the Jira tools, so a scheduler running many small
+         jobs has a single thing to call. A tool is only imported when its
+         command is run, so 'convert' never loads the jira library.
+
+         For many jobs back to back, a persistent worker can be started. It
+         keeps every tool imported and its Jira connections open, already
+         logged in, and runs the jobs sent to it over a local socket one at a
+         time, passing their output back as they run. A job sent with --worker
+         runs in the worker if there is one running, or in this process if not.
+
+Usage:   JiraTool.py [--worker[=<worker file>]] <command> <arguments>
+         Commands:
+           export-status <config file>                 - ExportJiraStatus
+           status-flow <config file>                   - StatusFlow
+           components <config file>                    - GetJiraComponents
+           convert <export file> [<processes>] [--xlsx] [--incremental]
+                                                       - ConvertJiraExport
+           pipeline <config file>                      - JiraPipeline
+           status-as-of <index file> <date> [<end date>] [<status>]
+                                                       - StatusAsOf
+         JiraTool.py worker [<worker file>]            - start a worker
+         JiraTool.py stop-worker [<worker file>]       - stop it
+         The worker listens on a free port on this machine only, and writes
+         the port and a secret token to the worker file (by default
+         .jiratool_worker in the user's home folder) for jobs to find it by.
+'''
+
+# Import modules. Only what every command needs is imported here
+import json                     # Worker messages
+import os                       # Working folder, worker file
+import socket                   # Worker connections
+from sys import argv, exit, path # Command line arguments, module search path
+import sys                      # Output streams
+from os.path import abspath, dirname, expanduser, join # Locating the tools
+
+REPO_DIR = join(dirname(abspath(__file__)), '..', '..')
+
+# The project and module of the tool each command runs
+COMMANDS = {'export-status': ('ExportJiraStatus', 'ExportJiraStatus'),
+            'status-flow':   ('StatusFlow', 'StatusFlow'),
+            'components':    ('GetJiraComponents', 'GetJiraComponents'),
+            'convert':       ('ConvertJiraExport', 'ConvertJiraExport'),
+            'pipeline':      ('JiraPipeline', 'JiraPipeline'),
+            'status-as-of':  ('ExportJiraStatus', 'StatusAsOf')}
+
+# The arguments each command takes, for the usage text
+ARGUMENTS = {'export-status': '<config file>',
+             'status-flow':   '<config file>',
+             'components':    '<config file>',
+             'convert':       '<export file> [<processes>] [--xlsx] [--incremental]',
+             'pipeline':      '<config file>',
+             'status-as-of':  '<index file> <date> [<end date>] [<status>]'}
+
+DEFAULT_WORKER_FILE = join(expanduser('~'), '.jiratool_worker')
+
+# Seconds the worker waits for a job's request once a client has connected
+REQUEST_TIMEOUT = 10
+
+USAGE = ('Usage: JiraTool.py [--worker[=<worker file>]] <command> <arguments>\n'
+         '       JiraTool.py worker|stop-worker [<worker file>]\n'
+         'Commands:\n' + '\n'.join(f'  {command} {ARGUMENTS[command]}' for command in COMMANDS))
+
+
+# Import a command's tool and return its main function
+def LoadCommand(command):
+    from importlib import import_module
+    project, module = COMMANDS[command]
+    src = join(REPO_DIR, project, 'src')
+    if src not in path:
+        path.append(src)
+    return import_module(module).main
+
+
+# Turn the code a tool exited with into an exit code. A message is printed,
+# and exits with 1, as Python does
+def ExitCode(code):
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    print(code, file=sys.stderr)
+    return 1
+
+
+# Run a command in this process and return its exit code
+def RunCommand(command, args):
+    main = LoadCommand(command)
+    try:
+        main(args)
+    except SystemExit as e:
+        return ExitCode(e.code)
+    return 0
+
+
+class JobOutput:
+    '''
+    Standard output or error of a job in the worker, sent back to the client
+    as it's written. lock is shared by a job's outputs, as the progress line
+    is written from another thread
+    '''
+    def __init__(self, connection, name, lock):
+        self.connection = connection
+        self.name = name
+        self.lock = lock
+
+    def send(self, message):
+        data = (json.dumps(message) + '\n').encode('utf-8')
+        with self.lock:
+            try:
+                self.connection.sendall(data)
+            except OSError:
+                pass    # The client has gone, but the job carries on
+
+    def write(self, text):
+        if text:
+            self.send({self.name: text})
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+# Run one job sent to the worker. Returns False if the worker was asked to stop
+def RunJob(connection, token):
+    from contextlib import redirect_stdout, redirect_stderr
+    from io import StringIO
+    from threading import Lock
+    from traceback import print_exc
+
+    # A client that connects and sends nothing mustn't hold up the worker,
+    # but the job itself can take as long as it takes
+    connection.settimeout(REQUEST_TIMEOUT)
+    try:
+        request = json.loads(connection.makefile('r', encoding='utf-8').readline())
+    except (ValueError, OSError):
+        return True
+    if not isinstance(request, dict) or request.get('token') != token:
+        return True
+    connection.settimeout(None)
+
+    lock = Lock()
+    out = JobOutput(connection, 'stdout', lock)
+    err = JobOutput(connection, 'stderr', lock)
+    command = request.get('command')
+    if command == 'stop':
+        out.send({'exit': 0})
+        return False
+    if command not in COMMANDS:
+        err.send({'stderr': f'Unknown command {command}\n', 'exit': 2})
+        return True
+
+    # Run the job in the client's working folder, with nothing to read on
+    # standard input, and its output going back to the client
+    cwd = os.getcwd()
+    stdin = sys.stdin
+    try:
+        os.chdir(request.get('cwd') or cwd)
+        sys.stdin = StringIO()
+        with redirect_stdout(out), redirect_stderr(err):
+            try:
+                code = RunCommand(command, [str(arg) for arg in request.get('args', [])])
+            except Exception:
+                print_exc()
+                code = 1
+    except OSError as e:
+        err.write(f'{e}\n')
+        code = 1
+    finally:
+        sys.stdin = stdin
+        os.chdir(cwd)
+    out.send({'exit': code})
+    return True
+
+
+# Run a worker until it's stopped, with Ctrl-C or stop-worker
+def RunWorker(worker_file):
+    from secrets import token_hex
+
+    # Keep Jira connections between jobs, and import every tool up front so
+    # the first job is as quick as the rest
+    path.append(join(REPO_DIR, 'JiraCommon', 'src'))
+    from jira_client import KeepConnections
+    KeepConnections()
+    for command in COMMANDS:
+        LoadCommand(command)
+
+    token = token_hex(16)
+    server = socket.create_server(('127.0.0.1', 0))
+    port = server.getsockname()[1]
+    # Only this user can read the token
+    with open(os.open(worker_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'w') as f:
+        json.dump({'port': port, 'token': token, 'pid': os.getpid()}, f)
+
+    print(f'Worker listening on port {port} (Ctrl-C to stop)', flush=True)
+    try:
+        while True:
+            connection, _ = server.accept()
+            with connection:
+                if not RunJob(connection, token):
+                    break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        os.remove(worker_file)
+    print('Worker stopped.')
+
+
+# Send a job to the worker, passing its output on as it comes. Returns the
+# job's exit code, or None if there is no worker running
+def SendJob(worker_file, command, args):
+    try:
+        with open(worker_file) as f:
+            worker = json.load(f)
+        connection = socket.create_connection(('127.0.0.1', worker['port']))
+    except (OSError, ValueError, KeyError):
+        return None
+    with connection:
+        request = {'token': worker.get('token'), 'command': command, 'args': args, 'cwd': os.getcwd()}
+        connection.sendall((json.dumps(request) + '\n').encode('utf-8'))
+        for line in connection.makefile('r', encoding='utf-8'):
+            message = json.loads(line)
+            if 'stdout' in message:
+                sys.stdout.write(message['stdout'])
+                sys.stdout.flush()
+            if 'stderr' in message:
+                sys.stderr.write(message['stderr'])
+                sys.stderr.flush()
+            if 'exit' in message:
+                return message['exit']
+    print('The worker stopped before the job finished.', file=sys.stderr)
+    return 1
+
+
+def main(argv):
+    # Send the job to a worker (optional)
+    worker_file = None
+    if argv and (argv[0] == '--worker' or argv[0].startswith('--worker=')):
+        worker_file = argv[0][len('--worker='):] or DEFAULT_WORKER_FILE
+        argv = argv[1:]
+
+    if not argv:
+        print(USAGE)
+        exit(2)
+    command, args = argv[0], argv[1:]
+
+    if command == 'worker':
+        RunWorker(args[0] if args else DEFAULT_WORKER_FILE)
+        return
+    if command == 'stop-worker':
+        if SendJob(args[0] if args else DEFAULT_WORKER_FILE, 'stop', []) is None:
+            print('No worker running.')
+        return
+    if command not in COMMANDS:
+        print(f'Unknown command {command}.\n{USAGE}')
+        exit(2)
+
+    if worker_file:
+        code = SendJob(worker_file, command, args)
+        if code is not None:
+            exit(code)
+        print('No worker running, running the job here.', file=sys.stderr)
+    exit(RunCommand(command, args))
+
+
+if __name__ == '__main__':
+    main(argv[1:])
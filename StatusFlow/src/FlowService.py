@@ -0,0 +1,310 @@
+'''
+Created on 18 Oct 2026
+
+Purpose: Keeps StatusFlow's status dates, and flow counts built from them, up to
+         date as a long-running local service, rather than rerunning StatusFlow
+         and downloading the whole project every few hours. Jira sends a webhook
+         for each issue change, which is applied to the in-memory flow model as
+         it arrives. Only the first start needs a full fetch from Jira: the
+         model is saved to a snapshot file every snapshot_interval seconds and
+         when the service stops, and loaded again on the next start. Webhooks
+         received since the last snapshot are kept in a journal file, and
+         replayed on start, so none are lost if the service is killed.
+
+         Endpoints:
+           POST /webhook             - Jira webhook (issue created, updated, deleted)
+           GET  /summary             - counts by status and issue type, weekly throughput (JSON)
+           GET  /issue/<key>         - one issue's status dates (JSON)
+           GET  /status_dates.csv    - every issue's status dates, as StatusFlow writes them
+
+         Responses are only worked out again after the model has changed, so
+         reads between changes just send the last response.
+
+Usage:   FlowService.py <config file>
+         Register a Jira webhook for issue created/updated/deleted events
+         pointing at http://<host>:<service_port>/webhook, adding
+         ?token=<webhook_token> if a webhook_token is set. replay_file, if
+         set, is a file of saved webhook payloads (one JSON object per line),
+         such as from a Jira webhook log, applied after a full fetch. Once it
+         is in a snapshot it isn't applied again. A journal_file needs a
+         snapshot_file, as the journal is only emptied when a snapshot is taken.
+'''
+
+# Import modules
+import csv                      # Status dates CSV
+import hmac                     # Checking the webhook token
+import json                     # Webhook payloads and responses
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from io import StringIO         # Building the CSV response
+from sys import argv, path      # Command line arguments, module search path
+from threading import Event, Lock, Thread # Snapshots in the background
+from urllib.parse import urlsplit, parse_qs, unquote
+from os.path import abspath, dirname, exists, join # Locating the shared modules
+
+# Shared modules live in the JiraCommon project alongside this one
+path.append(join(dirname(abspath(__file__)), '..', '..', 'JiraCommon', 'src'))
+from jira_client import ReadConfig, ReadCommonOptions, RequiredOption, Option, ConnectJira # Config and Jira connection
+from jira_search import SearchRecords   # Paged and concurrent Jira searches
+from jira_cache import OpenCache, SyncProject, CachedRecords # Local issue cache
+from jira_dates import DateConverter    # Jira to Excel date conversion
+from flow_model import FlowModel        # In-memory flow model
+from run_metrics import metrics         # Run metrics
+
+# Largest webhook body accepted, in bytes
+MAX_BODY = 10 << 20
+
+
+# Apply the webhook payloads saved in a file, one JSON object per line, to the
+# model. Returns the number applied. Lines that can't be read are skipped
+def ReplayEvents(model, file_name):
+    applied = 0
+    with open(file_name, encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                payload = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(payload, dict) and model.apply_event(payload):
+                applied = applied + 1
+    return applied
+
+
+class FlowService(ThreadingHTTPServer):
+    '''
+    HTTP server for a FlowModel, set in self.model before serving. Webhooks
+    are journalled, if there is a journal_file, and the model is snapshotted
+    to snapshot_file every snapshot_interval seconds if it has changed
+    '''
+    daemon_threads = True
+
+    def __init__(self, host, port, convert_date, snapshot_file=None, snapshot_interval=60, journal_file=None, webhook_token=None):
+        super().__init__((host, port), FlowServiceHandler)
+        self.model = None
+        self.convert_date = convert_date
+        self.snapshot_file = snapshot_file
+        self.snapshot_interval = snapshot_interval
+        self.journal_file = journal_file
+        self.webhook_token = webhook_token
+        self.journal_lock = Lock()
+        self.journal = open(journal_file, 'a', encoding='utf-8') if journal_file else None
+        self.snapshot_version = None    # Snapshot at the first chance
+        self.stopping = Event()
+
+    # Apply a webhook to the model, noting it in the journal first
+    def apply(self, payload):
+        with self.journal_lock:
+            if self.journal is not None:
+                self.journal.write(json.dumps(payload, separators=(',', ':')) + '\n')
+                self.journal.flush()
+            return self.model.apply_event(payload)
+
+    # Save a snapshot if the model has changed since the last one, and start
+    # the journal afresh, as everything in it is now in the snapshot
+    def snapshot(self):
+        if not self.snapshot_file or self.model.version == self.snapshot_version:
+            return
+        with self.journal_lock:
+            version = self.model.version
+            self.model.save(self.snapshot_file)
+            if self.journal is not None:
+                self.journal.seek(0)
+                self.journal.truncate()
+        self.snapshot_version = version
+
+    def take_snapshots(self):
+        while not self.stopping.wait(self.snapshot_interval):
+            self.snapshot()
+
+    def serve(self):
+        snapshots = Thread(target=self.take_snapshots, daemon=True)
+        snapshots.start()
+        try:
+            self.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        self.stopping.set()
+        snapshots.join()
+        self.snapshot()
+        self.server_close()
+        if self.journal is not None:
+            self.journal.close()
+
+    # Response bodies, rendered with the model's lock held
+    def summary_body(self):
+        return json.dumps(self.model.summary(), separators=(',', ':')).encode('utf-8')
+
+    def status_dates_body(self):
+        output = StringIO()
+        writer = csv.writer(output)
+        writer.writerow(['Issue ID'] + self.model.statuses)
+        writer.writerows(self.model.status_rows(self.convert_date))
+        return output.getvalue().encode('utf-8')
+
+
+class FlowServiceHandler(BaseHTTPRequestHandler):
+    '''
+    Request handler for a FlowService
+    '''
+    protocol_version = 'HTTP/1.1'
+
+    # Send small responses straight away rather than waiting to fill a packet
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_data(self, data, status=200, content_type='application/json;charset=UTF-8'):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_error_json(self, status, message):
+        self.send_data(json.dumps({'error': message}).encode('utf-8'), status)
+
+    def do_GET(self):
+        server = self.server
+        model = server.model
+        url = urlsplit(self.path)
+        if url.path == '/summary':
+            self.send_data(model.cached('summary', server.summary_body))
+        elif url.path == '/status_dates.csv':
+            self.send_data(model.cached('status_dates', server.status_dates_body), content_type='text/csv;charset=UTF-8')
+        elif url.path.startswith('/issue/'):
+            with model.lock:
+                issue = model.issue(unquote(url.path[len('/issue/'):]))
+            if issue is None:
+                self.send_error_json(404, 'Issue not found')
+            else:
+                self.send_data(json.dumps(issue, separators=(',', ':')).encode('utf-8'))
+        else:
+            self.send_error_json(404, 'Not found')
+
+    def do_POST(self):
+        server = self.server
+        url = urlsplit(self.path)
+        if url.path != '/webhook':
+            self.send_error_json(404, 'Not found')
+            return
+        # Compare in constant time, so the token can't be guessed from response times
+        token = parse_qs(url.query).get('token', [''])[0]
+        if server.webhook_token and not hmac.compare_digest(token.encode('utf-8'), server.webhook_token.encode('utf-8')):
+            self.send_error_json(403, 'Invalid token')
+            return
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY:
+            self.send_error_json(413, 'Webhook too large')
+            self.close_connection = True
+            return
+        body = self.rfile.read(length)
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            self.send_error_json(400, 'Webhook is not JSON')
+            return
+        if not isinstance(payload, dict):
+            self.send_error_json(400, 'Webhook is not a JSON object')
+            return
+        server.apply(payload)
+        self.send_data(b'', 204)
+
+
+def main(argv):
+
+    # Parse the config file to extract token values
+    config = ReadConfig(argv)
+
+    # Get options from config file
+    project_id = RequiredOption(config, 'project_id', 'No project ID provided in config file, exiting.')
+    convert_dst = RequiredOption(config, 'convert_dst', 'No DST correction flag provided in config file, exiting.')
+    status_list = RequiredOption(config, 'status_list', 'No Status list provided in config file, exiting.')
+
+    # Where the service listens (optional, defaults to port 8770 on this machine
+    # only), and the token webhooks must carry (optional)
+    service_host = Option(config, 'service_host', 'localhost')
+    service_port = Option(config, 'service_port', 8770)
+    webhook_token = Option(config, 'webhook_token')
+
+    # Snapshot file, and how many seconds between snapshots (optional, without
+    # a snapshot file every start is a full fetch)
+    snapshot_file = Option(config, 'snapshot_file')
+    snapshot_interval = Option(config, 'snapshot_interval', 60.0)
+
+    # Journal of webhooks since the last snapshot (optional, needs a snapshot
+    # file, or it would never be emptied), and a file of saved webhooks to
+    # apply after a full fetch (optional)
+    journal_file = Option(config, 'journal_file')
+    if journal_file and not snapshot_file:
+        print('A journal file needs a snapshot file, exiting.')
+        quit()
+    replay_file = Option(config, 'replay_file')
+
+    # Fetch and run metrics options for starting the service (optional). With a
+    # cache file, the first fetch only asks for issues updated since the cache
+    # was last synced. The run metrics cover the start, not the service
+    options = ReadCommonOptions(config)
+
+    print('done.')
+    metrics.start('FlowService', options.metrics_file, options.progress, options.profile_file)
+
+    statuses = status_list.split(', ')
+
+    # Convert Jira dates to Excel-compatible, correcting for DST if required
+    convert_date = DateConverter(convert_dst).convert
+
+    # Take the port first, so a clash shows up before a long fetch rather than after
+    service = FlowService(service_host, service_port, convert_date, snapshot_file, snapshot_interval, journal_file, webhook_token)
+
+    # Start from the last snapshot if there is one, otherwise fetch the project
+    model = None
+    if snapshot_file and exists(snapshot_file):
+        print(f'Loading snapshot {snapshot_file}...', end='', flush=True)
+        with metrics.phase('snapshot'):
+            model = FlowModel.load(snapshot_file, project_id, statuses)
+        print(f'{len(model.issues)} issues...done.' if model is not None else 'not usable for this project.')
+    full_fetch = model is None
+    if full_fetch:
+        model = FlowModel(project_id, statuses)
+        auth_jira = ConnectJira(config, options.fetch_workers)
+        print (f'Extracting issues from project {project_id}...', end='', flush=True)
+        if options.cache_file:
+            cache = OpenCache(options.cache_file)
+            fetched = SyncProject(cache, auth_jira, project_id, options.page_size, options.fetch_workers, False, options.raw_json)
+            print(f'{fetched} updated...', end='', flush=True)
+            records = CachedRecords(cache, project_id)
+        else:
+            search_string = 'project=' + project_id + ' ORDER BY issue ASC'
+            records = SearchRecords(auth_jira, search_string, options.page_size, options.fetch_workers, options.raw_json)
+        read = metrics.phase('read')
+        while True:
+            with read:
+                record = next(records, None)
+            if record is None:
+                break
+            model.add_record(record)
+            metrics.count('issues')
+        print(f'{len(model.issues)} issues...done.')
+
+    # Catch up with webhooks received since the snapshot, then any saved ones.
+    # The saved ones are only applied to a fresh fetch: a snapshot already has
+    # them, as one is taken straight after they are applied
+    with metrics.phase('replay'):
+        if journal_file and exists(journal_file):
+            print(f'Replayed {ReplayEvents(model, journal_file)} webhooks from the journal.')
+        if replay_file and full_fetch:
+            print(f'Replayed {ReplayEvents(model, replay_file)} webhooks from {replay_file}.')
+
+    service.model = model
+    service.snapshot()
+    metrics.finish()
+
+    print(f'Serving {project_id} flow on http://{service_host}:{service.server_address[1]}/ (Ctrl-C to stop)')
+    service.serve()
+    print('Finished.')
+
+
+if __name__ == '__main__':
+    main(argv[1:])
@@ -17,132 +17,91 @@ Created on 28 Oct 2021
 
 # Import modules
 from datetime import datetime   # date/time functions
-from jira import JIRA           # Jira functions
-from sys import argv            # Command line arguments
-from configparser import ConfigParser, NoOptionError
-import pytz
+from itertools import chain     # Putting the first record back
+from time import time           # Current time for flow metrics
+from sys import argv, path      # Command line arguments, module search path
+from os.path import abspath, dirname, join # Locating the shared modules
 
-# Function to convert Jira date to Excel date.
-def ConvertDate(jira_date, tz_correction=False):
-    fmt = '%d/%m/%Y %H:%M:%S'
-    datetimeObj = datetime.strptime(jira_date,'%Y-%m-%dT%H:%M:%S.%f%z')
-    # Correct for DST if required
-    if tz_correction:
-        lon = pytz.timezone('Europe/London')
-        issue_dt = datetime(datetimeObj.year, datetimeObj.month, datetimeObj.day, datetimeObj.hour, datetimeObj.minute, datetimeObj.second, tzinfo=pytz.utc)
-        datetimeObj = issue_dt.astimezone(lon)
-
-    return datetimeObj.strftime(fmt)
+# Shared modules live in the JiraCommon project alongside this one
+path.append(join(dirname(abspath(__file__)), '..', '..', 'JiraCommon', 'src'))
+from jira_client import ReadConfig, ReadCommonOptions, RequiredOption, Option, OutputFile, ConnectJira # Config and Jira connection
+from jira_search import SearchRecords   # Paged and concurrent Jira searches
+from jira_cache import OpenCache, SyncProject, CachedRecords # Local issue cache
+from jira_dates import DateConverter, ImportNumpy # Jira to Excel date conversion, NumPy if installed
+from run_metrics import metrics         # Run metrics
+from output_stages import RunStages, StatusDatesStage, FlowMetricsStage # Output files
 
 
 def main(argv):
 
-    #Check for config file being passed
-    if not argv:
-        print('No config file passed, exiting.')
-        quit()
-        
     # Parse the config file to extract token values
-    print('Parsing config file...', end='', flush=True)
-    config = ConfigParser()
-    config['DEFAULT']={}
-    try:
-        with open(argv[0]) as f:
-            config.read_file(f)
-    except IOError:
-        print('Config file does not exist, exiting.')
-        quit()
+    config = ReadConfig(argv)
          
     # Get options from config file
-    try:
-        jira_url = config.get('DEFAULT', 'jira_url')
-    except NoOptionError:
-        print('Jira URL not provided in config file, exiting.')
-        quit()
-
-    try:
-        auth_user = config.get('DEFAULT', 'auth_user')
-    except NoOptionError:
-        print('User name not provided in config file, exiting.')
-        quit()
-
-    try:
-        auth_token = config.get('DEFAULT', 'auth_token')
-    except NoOptionError:
-        print('Authentication token not provided in config file, exiting.')
-        quit()
-
-    try:
-        project_id = config.get("DEFAULT","project_id")
-    except NoOptionError:
-        print('No project ID provided in config file, exiting.')
-        quit()
-        
-    try:
-        convert_dst = config.get('DEFAULT', 'convert_dst')
-    except NoOptionError:
-        print('No DST correction flag provided in config file, exiting.')
-        
-    try:
-        status_list = config.get('DEFAULT', 'status_list')
-    except NoOptionError:
-        print('No Status list provided in config file, exiting.')
+    project_id = RequiredOption(config, 'project_id', 'No project ID provided in config file, exiting.')
+    convert_dst = RequiredOption(config, 'convert_dst', 'No DST correction flag provided in config file, exiting.')
+    status_list = RequiredOption(config, 'status_list', 'No Status list provided in config file, exiting.')
+
+    # Fetch, output and run metrics options (optional)
+    options = ReadCommonOptions(config)
+
+    # Write flow metrics alongside the status dates (optional, needs NumPy),
+    # with cycle time starting at cycle_start_status (defaults to the second status)
+    flow_metrics = Option(config, 'flow_metrics', False)
+    cycle_start_status = Option(config, 'cycle_start_status')
                 
     print('done.')
+    metrics.start('StatusFlow', options.metrics_file, options.progress, options.profile_file)
 
-    # Initialise status dictionary with keys
-    status_dict = {}
     statuses = status_list.split(', ')
-    status_dict = status_dict.fromkeys(statuses)
+
+    # Check the flow metrics can be produced
+    if flow_metrics:
+        if ImportNumpy() is None:
+            print('NumPy is not installed, flow metrics will not be written.')
+            flow_metrics = False
+        if not cycle_start_status:
+            cycle_start_status = statuses[1] if len(statuses) > 1 else statuses[0]
+        elif cycle_start_status not in statuses:
+            print(f'Cycle start status {cycle_start_status} is not in the status list, exiting.')
+            quit()
     
+    # Convert Jira dates to Excel-compatible a batch at a time, correcting for
+    # DST if required
+    convert_dates = metrics.timed('convert_dates', DateConverter(convert_dst).convert_many)
+
     # Authenticate with Jira
-    auth_jira = JIRA(jira_url, basic_auth=(auth_user, auth_token))
+    auth_jira = ConnectJira(config, options.fetch_workers)
     
     print (f'Extracting issues from project {project_id}...', end='', flush=True)
-    # Get all issues from selected project in issue order.
-    # Setting maxResults to false returns all records
+    # Get all issues from selected project in issue order, one page at a time.
     # Expanding changelog returns all change details, which include status transitions
-    search_string = 'project=' + project_id + ' ORDER BY issue ASC'
-    issues = auth_jira.search_issues(search_string, maxResults=0, expand=['changelog'])
+    if options.cache_file:
+        cache = OpenCache(options.cache_file)
+        fetched = SyncProject(cache, auth_jira, project_id, options.page_size, options.fetch_workers, options.full_resync, options.raw_json)
+        print(f'{fetched} updated...', end='', flush=True)
+        records = CachedRecords(cache, project_id)
+    else:
+        search_string = 'project=' + project_id + ' ORDER BY issue ASC'
+        records = SearchRecords(auth_jira, search_string, options.page_size, options.fetch_workers, options.raw_json)
+    record = next(records, None)
     print('done.')
     
     # Check there are records to process
-    if len(issues) > 0:
+    if record:
         # Define filename with current date/time suffix
         dt = datetime.now().strftime("%Y-%m-%d_%H%M%S")
         
-        # TODO: make output filename a configuration item
-        file_name = 'C:\\Users\\Jim.Strange\\Valtech\\UK.Client.Wiggle - General\\01 Delivery Management\\WiggleCRC Jira Tracking\\Deep Dive\\Jira Status Export ' + dt + '.csv'
+        file_name = OutputFile(config, 'Jira Status Export ' + dt + '.' + options.output_format)
         
-        # Open file for writing data
-        with open(file_name, 'w') as output_file:
-            # Heading for tabular file output
-            output_file.write("Issue ID,"+status_list)
-
-            print('Creating change log...', end='', flush=True),
-            # Loop through all issues and write status change info
-            for issue in issues:
-                # Set dictionary items to empty string
-                for key in status_dict.items():
-                    status_dict[key[0]]=""
-                    
-                # Loop through history looking for status changes
-                for history in issue.changelog.histories:
-                    for item in history.items:
-                        if item.field == 'status':
-                            # Convert Jira date format to Excel-compatible
-                            converted_date = ConvertDate(history.created, convert_dst)
-                            # Set appropriate dictionary entry depending on status change type
-                            for key in status_dict.items():
-                                if key[0] == item.toString:
-                                    status_dict[key[0]] = converted_date
-                # Set the initial (created) status from the item created date
-                status_dict[statuses[0]] = ConvertDate(history.created, convert_dst)
-                status_history = ','.join(status_dict.values())
-                
-                # write the row to file            
-                output_file.write(f'\n{issue.key},{status_history}')
+        # Write the status dates, and the flow metrics if asked for, in one pass
+        stages = [StatusDatesStage(file_name, statuses, convert_dates)]
+        if flow_metrics:
+            stages.append(FlowMetricsStage(OutputFile(config, 'Jira Flow Metrics ' + dt), statuses, cycle_start_status, int(time())))
+        print('Creating change log...', end='', flush=True),
+        RunStages(chain([record], records), stages)
     
+    metrics.finish()
     print('Finished.')
 
 if __name__ == '__main__':